@@ -1,50 +1,276 @@
 """
 Go through and calculate the average students sizes for the different state types in the system.
 
+Given assessment packages, also estimate the number of outcomes per assessment type, the bytes on disk per
+output format and the run time. The outcome counts come from the packages and the configured rates; the
+bytes and time per outcome are calibrated by generating (and writing) a small sample of outcomes with the
+real generators.
+
 """
 
+import argparse
+import datetime
+import os
+import tempfile
+import time
+from functools import partial
+
+import datagen.config.cfg as cfg
 import datagen.config.hierarchy as hier_config
 import datagen.config.state_types as state_config
+import datagen.generators.hierarchy as hier_gen
+import datagen.generators.iab_assessment as iab_asmt_gen
+import datagen.generators.population as pop_gen
+import datagen.generators.summative_or_ica_assessment as asmt_gen
 import datagen.util.hierarchy as hier_util
+from datagen.generators.subject import generate_default_subjects
+from datagen.model.assessment import Assessment
+from datagen.outputworkers.csv_worker import CsvWorker
+from datagen.outputworkers.json_worker import JsonWorker
+from datagen.outputworkers.sqlite_worker import SqliteWorker
+from datagen.outputworkers.xml_worker import XmlWorker
+from datagen.readers.subject_reader import load_subjects
+from datagen.readers.tabulator_reader import load_assessments
+from datagen.util.id_gen import IDGen
+from datagen.util.rng import derive_rng
+
+# output formats that can be estimated, format name -> worker factory taking the output directory
+FORMATS = {
+    'xml': XmlWorker,
+    'xml.zip': partial(XmlWorker, archive='zip'),
+    'xml.tar.gz': partial(XmlWorker, archive='tar.gz'),
+    'xml.gz': partial(XmlWorker, compress='gzip'),
+    'csv': CsvWorker,
+    'csv.gz': partial(CsvWorker, compress='gzip'),
+    'json': JsonWorker,
+    'sqlite': SqliteWorker,
+}
+
+ASMT_TYPES = ('SUM', 'ICA', 'IAB')
+
+
+def calculate_state_size(state_type_config):
+    """
+    Calculate the average size of a state.
+
+    :param state_type_config: state type configuration
+    :return: tuple of (district count, school count, dictionary of grade -> student count)
+    """
+    students_by_grade = {}
+    state_school_count = 0
+    state_district_count = 0
+    for district_type, district_count in state_type_config['district_types_and_counts']:
+        # Get the district config
+        district_config = hier_config.DISTRICT_TYPES[district_type]
+        avg_school_count = district_config['school_counts']['avg']
+
+        # Convert school type counts into decimal ratios
+        hier_util.convert_config_school_count_to_ratios(district_config)
+
+        # Go through each, calculate how many (on average) and the number of students in that school
+        for school_type, school_ratio in district_config['school_types_and_ratios'].items():
+            # Get the school config
+            school_config = hier_config.SCHOOL_TYPES[school_type]
+            avg_student_count = school_config['students']['avg']
+
+            # Determine the number of schools that will be created for this district (on average)
+            num_schools_for_district = max(1, int(avg_school_count * school_ratio))
+
+            # Add the average number of students in each grade of this school to the state totals
+            for grade in school_config['grades']:
+                students_by_grade[grade] = students_by_grade.get(grade, 0) + \
+                    avg_student_count * num_schools_for_district * district_count
+
+        # Add to the state totals
+        state_school_count += avg_school_count * district_count
+        state_district_count += district_count
+
+    return state_district_count, state_school_count, students_by_grade
+
+
+def _asmt_type(asmt: Assessment):
+    return 'IAB' if asmt.is_iab() else 'SUM' if asmt.is_summative() else 'ICA'
+
+
+def outcome_rates(asmt: Assessment, state_type_config):
+    """
+    Calculate, per student in the assessment's grade, the expected number of outcomes generated for
+    the assessment and the expected number of those that are written (inactive and deleted outcomes
+    are generated but not written).
+
+    :param asmt: assessment
+    :param state_type_config: state type configuration
+    :return: tuple of (generated outcomes per student, written outcomes per student)
+    """
+    if asmt.is_iab():
+        rate = cfg.INTERIM_ASMT_RATE * cfg.IAB_STUDENT_RATE
+        return rate, rate
+
+    # this mirrors create_assessment_outcome_object
+    skip_rates = state_type_config['subject_skip_percentages']
+    taken = 1 - skip_rates.get(asmt.subject.code, skip_rates['Math'])
+    retake, update, delete = cfg.ASMT_RETAKE_RATE, cfg.ASMT_UPDATE_RATE, cfg.ASMT_DELETE_RATE
+    second = max(retake, update)
+    generated = taken * (1 + second)
+    written = taken * (retake + max(0, update - retake) * (1 - delete) + (1 - max(second, delete)))
+    return generated, written
+
+
+def estimate_outcome_counts(assessments: [Assessment], state_type_config, students_by_grade):
+    """
+    Estimate the number of outcomes per assessment type.
+
+    :param assessments: assessment packages
+    :param state_type_config: state type configuration
+    :param students_by_grade: dictionary of grade -> student count
+    :return: tuple of dictionaries of assessment type -> count, for generated and for written outcomes
+    """
+    generated = {asmt_type: 0 for asmt_type in ASMT_TYPES}
+    written = {asmt_type: 0 for asmt_type in ASMT_TYPES}
+    for asmt in assessments:
+        students = students_by_grade.get(asmt.grade, 0)
+        generated_rate, written_rate = outcome_rates(asmt, state_type_config)
+        generated[_asmt_type(asmt)] += students * generated_rate
+        written[_asmt_type(asmt)] += students * written_rate
+    return generated, written
+
+
+def sample_outcomes(state_type, assessments: [Assessment], gen_item, sample=10, formats=FORMATS):
+    """
+    Generate and write a sample of outcomes for every assessment with the real generators and workers,
+    measuring the time and bytes per outcome.
+
+    :param state_type: state type
+    :param assessments: assessment packages
+    :param gen_item: True to generate item level data
+    :param sample: number of students sampled per assessment
+    :param formats: output formats to measure, format name -> worker factory
+    :return: tuple of dictionaries of assessment type -> value: generation seconds per outcome, and for each
+             format, write seconds per outcome and bytes per outcome
+    """
+    id_gen = IDGen()
+    rng = derive_rng(0, 'sample')
+    state = hier_gen.generate_state(state_type, 'Sample', 'SS', id_gen)
+    district_type = state.config['district_types_and_counts'][0][0]
+    district = hier_gen.generate_district(district_type, state, id_gen, rng=rng)
+    subject_codes = sorted(set(asmt.subject.code for asmt in assessments))
+
+    schools = {}
+    gen_seconds = {asmt_type: [0.0, 0] for asmt_type in ASMT_TYPES}
+    write_seconds = {name: {asmt_type: 0.0 for asmt_type in ASMT_TYPES} for name in formats}
+    write_bytes = {name: {asmt_type: 0 for asmt_type in ASMT_TYPES} for name in formats}
+    for asmt in assessments:
+        asmt_type = _asmt_type(asmt)
+        if asmt.grade not in schools:
+            school_type = next((st for st, config in hier_config.SCHOOL_TYPES.items() if asmt.grade in config['grades']))
+            schools[asmt.grade] = hier_gen.generate_school(school_type, district, id_gen, interim_asmt_rate=1, rng=rng)
+        school = schools[asmt.grade]
+        students = pop_gen.generate_students(school, asmt.grade, sample, id_gen, asmt.year, subject_codes, rng=rng)
+        date_taken = datetime.date(asmt.year, 5, 10)
+
+        start = time.perf_counter()
+        if asmt.is_iab():
+            outcomes = [iab_asmt_gen.generate_interim_assessment_outcome(date_taken, student, asmt, id_gen,
+                                                                         gen_item=gen_item, rng=rng)
+                        for student in students]
+        else:
+            outcomes = [asmt_gen.generate_assessment_outcome(date_taken, student, asmt, id_gen,
+                                                             gen_item=gen_item, rng=rng)
+                        for student in students]
+        gen_seconds[asmt_type][0] += time.perf_counter() - start
+        gen_seconds[asmt_type][1] += len(outcomes)
+
+        for name, factory in formats.items():
+            with tempfile.TemporaryDirectory() as out_dir:
+                worker = factory(out_dir)
+                start = time.perf_counter()
+                worker.prepare()
+                if asmt.is_iab():
+                    worker.write_iab_outcome(outcomes, asmt.guid)
+                else:
+                    worker.write_assessment_outcome(outcomes, asmt.guid, state.code, district.guid)
+                worker.cleanup()
+                write_seconds[name][asmt_type] += time.perf_counter() - start
+                write_bytes[name][asmt_type] += _dir_size(out_dir)
+
+    def per_outcome(totals):
+        return {asmt_type: totals[asmt_type] / gen_seconds[asmt_type][1]
+                for asmt_type in ASMT_TYPES if gen_seconds[asmt_type][1]}
+
+    return (per_outcome({asmt_type: seconds for asmt_type, (seconds, _) in gen_seconds.items()}),
+            {name: per_outcome(seconds) for name, seconds in write_seconds.items()},
+            {name: per_outcome(size) for name, size in write_bytes.items()})
+
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(path) for file in files)
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            return '{:.1f} {}'.format(size, unit)
+        size /= 1024
+
+
+def _format_seconds(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '{}h {:02}m {:02}s'.format(hours, minutes, seconds)
+
 
 if __name__ == '__main__':
-    for state_type, state_config in state_config.STATE_TYPES.items():
+    parser = argparse.ArgumentParser(description='Calculate the size of the configured state types and, given '
+                                                 'assessment packages, estimate the output volume and run time.')
+    parser.add_argument('-st', '--state_type', dest='state_type', action='store', default=None, help='The state type to calculate for (default=all)')
+    parser.add_argument('-sub', '--subject_source', dest='subject_source', action='store', default='generate', help='Source of subject definitions files, either \'generate\' or a glob expression matching files, e.g. ./in/*_subject.xml')
+    parser.add_argument('-pkg', '--pkg_source', dest='pkg_source', action='store', help='Source of assessment packages, a glob expression matching files, e.g. ./in/20*.csv')
+    parser.add_argument('-gsum', '--gen_sum', dest='gen_sum', action='store_true', default=False, help='Estimate summative outcomes')
+    parser.add_argument('-gica', '--gen_ica', dest='gen_ica', action='store_true', default=False, help='Estimate ICA outcomes')
+    parser.add_argument('-giab', '--gen_iab', dest='gen_iab', action='store_true', default=False, help='Estimate IAB outcomes')
+    parser.add_argument('-gitem', '--gen_item', dest='gen_item', action='store_true', default=False, help='Generate item level data')
+    parser.add_argument('--sample', dest='sample', type=int, action='store', default=10, help='Number of students sampled per assessment to calibrate the estimates (default=10)')
+    parser.add_argument('-p', '--processes', dest='processes', type=int, action='store', default=1, help='Number of processes to estimate the run time for (default=1)')
+    args = parser.parse_args()
+
+    assessments = []
+    samples = None
+    if args.pkg_source:
+        subjects = generate_default_subjects() if args.subject_source in ('generate', 'default') \
+            else load_subjects(args.subject_source)
+        assessments = load_assessments(args.pkg_source, subjects, args.gen_sum, args.gen_ica, args.gen_iab,
+                                       args.gen_item)
+        if len(assessments) == 0:
+            print('No assessment packages found')
+
+    for state_type, state_type_config in state_config.STATE_TYPES.items():
+        if args.state_type and state_type != args.state_type:
+            continue
         print('Calculating for type: {}'.format(state_type))
 
-        state_student_count = 0
-        state_school_count = 0
-        state_district_count = 0
-        for district_type, district_count in state_config['district_types_and_counts']:
-            # Get the district config
-            district_config = hier_config.DISTRICT_TYPES[district_type]
-            avg_school_count = district_config['school_counts']['avg']
-
-            # Convert school type counts into decimal ratios
-            hier_util.convert_config_school_count_to_ratios(district_config)
-
-            # Go through each, calculate how many (on average) and the number of students in that school
-            district_student_count = 0
-            for school_type, school_ratio in district_config['school_types_and_ratios'].items():
-                # Get the school config
-                school_config = hier_config.SCHOOL_TYPES[school_type]
-                avg_student_count = school_config['students']['avg']
-
-                # Determine the number of schools that will be created for this district (on average)
-                num_schools_for_district = max(1, int(avg_school_count * school_ratio))
-
-                # Determine the average number of students in this school
-                school_student_count = 0
-                for grade in school_config['grades']:
-                    school_student_count += avg_student_count
-
-                # Add to the district total
-                district_student_count += school_student_count * num_schools_for_district
-
-            # Add to the state totals
-            state_student_count += district_student_count * district_count
-            state_school_count += avg_school_count * district_count
-            state_district_count += district_count
-
-        print('    Districts: {}'.format(state_district_count))
-        print('    Schools  : {}'.format(state_school_count))
-        print('    Students : {}'.format(state_student_count))
+        district_count, school_count, students_by_grade = calculate_state_size(state_type_config)
+        print('    Districts: {}'.format(district_count))
+        print('    Schools  : {}'.format(school_count))
+        print('    Students : {}'.format(sum(students_by_grade.values())))
+        if not assessments:
+            continue
+
+        generated, written = estimate_outcome_counts(assessments, state_type_config, students_by_grade)
+        print('    Outcomes : {} (written, generated {})'.format(
+            ', '.join('{} {:.0f}'.format(t, written[t]) for t in ASMT_TYPES if generated[t]),
+            '{:.0f}'.format(sum(generated.values()))))
+
+        # calibrate with a sample run (for the first state type; the per-outcome values don't depend on it)
+        if samples is None:
+            samples = sample_outcomes(state_type, assessments, args.gen_item, args.sample)
+        gen_seconds, write_seconds, write_bytes = samples
+
+        for name in FORMATS:
+            size = sum(written[t] * write_bytes[name].get(t, 0) for t in ASMT_TYPES)
+            print('    {:10}: {} ({} per outcome)'.format(
+                name, _format_bytes(size), _format_bytes(size / max(1, sum(written.values())))))
+
+            seconds = sum(generated[t] * gen_seconds.get(t, 0) + written[t] * write_seconds[name].get(t, 0)
+                          for t in ASMT_TYPES)
+            print('    {:10}  {} on 1 core, {} on {} processes'.format(
+                '', _format_seconds(seconds), _format_seconds(seconds / max(1, args.processes)), args.processes))
@@ -6,6 +6,10 @@ The data generator for the SBAC project.
 import argparse
 import datetime
 
+from datagen.outputworkers.xml_worker import SERIALIZERS
+from datagen.writers.archive_writer import ARCHIVE_FORMATS
+from datagen.writers.compressed_writer import COMPRESSIONS
+from datagen.util.hierarchy import parse_shard
 from datagen.worker_manager import WorkerManager
 
 if __name__ == '__main__':
@@ -30,17 +34,33 @@ if __name__ == '__main__':
     group.add_argument('-gica', '--gen_ica', dest='gen_ica', action='store_true', default=False, help='Generate ICA outcomes')
     group.add_argument('-giab', '--gen_iab', dest='gen_iab', action='store_true', default=False, help='Generate IAB outcomes')
     group.add_argument('-gitem', '--gen_item', dest='gen_item', action='store_true', default=False, help='Generate item level data')
+    group.add_argument('-litem', '--lazy_item', dest='lazy_item', action='store_true', default=False, help='Generate the item level data of an outcome when it is written, keeping only its seeds until then (much less memory; other, still reproducible, item data)')
 
     parser.add_argument('-o', '--out_dir', dest='out_dir', action='store', default='out', help='Specify the root directory for writing output files to')
     # since there is only a single output format right now, default it to true for convenience
-    parser.add_argument('-xo', '--xml_out', dest='xml_out', action='store_true', default=True, help='Output data to (TRT) XML')
+    parser.add_argument('-xo', '--xml_out', dest='xml_out', action='store_true', default=None, help='Output data to (TRT) XML (default, if no other output is selected)')
+    parser.add_argument('--xml_serializer', dest='xml_serializer', choices=SERIALIZERS, default='template', help='How (TRT) XML is serialized: \'template\' (fast), \'etree\' (ElementTree, for verification) or \'stream\' (elements streamed to the file, no tree); all write the same XML (default=template)')
+    parser.add_argument('--xml_archive', dest='xml_archive', choices=ARCHIVE_FORMATS, default=None, help='Write the (TRT) XML of each school and year into one archive, with an index, instead of a file per outcome')
+
+    parser.add_argument('-co', '--csv_out', dest='csv_out', action='store_true', default=False, help='Output data to CSV files for bulk loading into a database, a set per district and year')
+    parser.add_argument('-jo', '--json_out', dest='json_out', action='store_true', default=False, help='Output data to NDJSON files, a JSON document per outcome (with the content of its TRT XML), a file per school and year')
+    parser.add_argument('-so', '--sqlite_out', dest='sqlite_out', action='store_true', default=False, help='Output data to a SQLite database, datagen.db')
+    parser.add_argument('--compress', dest='compress', choices=COMPRESSIONS, default=None, help='Compress the output files (XML, CSV, JSON and assessments.csv) on a separate thread, adding .gz, .bz2 or .xz to their names (default=no compression)')
+    parser.add_argument('--compress_level', dest='compress_level', type=int, action='store', default=None, help='Compression level, 1-9 (0-9 for lzma), lower is faster (default=6 for gzip and lzma, 9 for bz2)')
+    parser.add_argument('-wq', '--write_queue', dest='write_queue', type=int, action='store', default=0, help='Write output on a separate thread, through a queue holding up to N batches (default=0, write synchronously)')
+    parser.add_argument('--shard', dest='shard', action='store', default=None, help='Generate only one shard of the districts, i/N for shard i (0-based) of N; combine the shards with datagen.merge')
+    parser.add_argument('--seed', dest='seed', type=int, action='store', default=None, help='Seed for the random number generators; runs with the same seed and arguments generate the same data (default=random)')
+    parser.add_argument('--resume', dest='resume', action='store_true', default=False, help='Resume an interrupted run from the checkpoint in the output directory, skipping finished districts')
+    parser.add_argument('--continue_from', dest='continue_from', action='store', default=None, help='Continue the students of a previous run (its output directory) into the years of the assessment packages, generating only those years')
+    parser.add_argument('--checkpoint_years', dest='checkpoint_years', action='store_true', default=False, help='Also checkpoint each district after every year, so a resumed run can continue part way through a district')
+    parser.add_argument('--max_memory_mb', dest='max_memory_mb', type=int, action='store', default=None, help='Fail if the memory use (RSS) of a generating process goes over this many MB, and report the peak per school')
+    parser.add_argument('-p', '--processes', dest='processes', type=int, action='store', default=1, help='Number of processes used to generate district data in parallel (default=1)')
 
     args, unknown = parser.parse_known_args()
 
-    if not args.xml_out:
-        print('Please specify at least one output format')
-        print('  --xml_out   Output (TRT) XML')
-        exit()
+    # XML is written unless only other formats are selected
+    if args.xml_out is None:
+        args.xml_out = not (args.csv_out or args.json_out or args.sqlite_out)
 
     if not args.pkg_source:
         print('Please specify the source for assessment packages, e.g.')
@@ -54,6 +74,17 @@ if __name__ == '__main__':
         print('  --gen_iab  Interim assessment block (IAB) package')
         exit()
 
+    if args.shard:
+        try:
+            parse_shard(args.shard)
+        except ValueError as e:
+            print(e)
+            exit()
+        if args.hier_source == 'generate' and args.seed is None:
+            print('Please specify the same seed for every shard so they generate the same hierarchy, e.g.')
+            print('  --shard 0/4 --seed 1234')
+            exit()
+
     worker = WorkerManager(args)
 
     # Record current (start) time
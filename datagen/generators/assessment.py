@@ -1,9 +1,9 @@
 """Generate assessment elements.
 """
 import hashlib
+import random
 from datetime import timedelta, datetime, time
 from math import ceil
-from random import choice, randrange, random, sample, randint
 from string import ascii_uppercase
 
 from datagen.config import cfg
@@ -12,22 +12,28 @@ from datagen.generators.text import RandomText
 from datagen.model.assessment import Assessment
 from datagen.model.assessmentoutcome import AssessmentOutcome
 from datagen.model.item import AssessmentItem
-from datagen.model.itemdata import AssessmentOutcomeItemData
+from datagen.model.itemdata import AssessmentOutcomeItemData, ItemResponses, response_date
 from datagen.model.student import Student
 from datagen.util.id_gen import IDGen
 
+# item type -> range of the time (seconds) a student spends answering an item, as for randrange
+PAGE_TIME_RANGES = {'MC': (1, 15), 'MS': (2, 30), 'EBSR': (10, 60), 'SA': (60, 300), 'ER': (60, 300),
+                    'WER': (120, 600), 'EQ': (10, 60), 'HTQ': (10, 60), 'MI': (10, 60), 'TI': (10, 60)}
+DEFAULT_PAGE_TIME_RANGE = (2, 60)
 
-def generate_assessment_outcome(student: Student, assessment: Assessment, id_gen: IDGen):
+
+def generate_assessment_outcome(student: Student, assessment: Assessment, id_gen: IDGen, rng=random):
     """Generate an assessment outcome for a given student.
 
     :param student: The student to create the outcome for
     :param assessment: The assessment to create the outcome for
     :param id_gen: ID generator
+    :param rng: random number generator
     :returns: The assessment outcome
     """
     # Create the object
     ao = AssessmentOutcome()
-    ao.guid = IDGen.get_uuid()
+    ao.guid = IDGen.get_uuid(rng)
     ao.student = student
     ao.assessment = assessment
 
@@ -39,34 +45,34 @@ def generate_assessment_outcome(student: Student, assessment: Assessment, id_gen
     # hack for custom subjects
     subject_code = assessment.subject.code if assessment.subject.code in ['Math', 'ELA'] else 'ELA'
     ao.acc_asl_video_embed = _pick_accommodation_code(
-        cfg.LEGACY_ACCOMMODATIONS['acc_asl_video_embed'][subject_code])
+        cfg.LEGACY_ACCOMMODATIONS['acc_asl_video_embed'][subject_code], rng)
     ao.acc_print_on_demand_items_nonembed = _pick_accommodation_code(
-        cfg.LEGACY_ACCOMMODATIONS['acc_print_on_demand_items_nonembed'][subject_code])
+        cfg.LEGACY_ACCOMMODATIONS['acc_print_on_demand_items_nonembed'][subject_code], rng)
     ao.acc_noise_buffer_nonembed = _pick_accommodation_code(
-        cfg.LEGACY_ACCOMMODATIONS['acc_noise_buffer_nonembed'][subject_code])
-    ao.acc_braile_embed = _pick_accommodation_code(cfg.LEGACY_ACCOMMODATIONS['acc_braile_embed'][subject_code])
+        cfg.LEGACY_ACCOMMODATIONS['acc_noise_buffer_nonembed'][subject_code], rng)
+    ao.acc_braile_embed = _pick_accommodation_code(cfg.LEGACY_ACCOMMODATIONS['acc_braile_embed'][subject_code], rng)
     ao.acc_closed_captioning_embed = _pick_accommodation_code(
-        cfg.LEGACY_ACCOMMODATIONS['acc_closed_captioning_embed'][subject_code])
+        cfg.LEGACY_ACCOMMODATIONS['acc_closed_captioning_embed'][subject_code], rng)
     ao.acc_text_to_speech_embed = _pick_accommodation_code(
-        cfg.LEGACY_ACCOMMODATIONS['acc_text_to_speech_embed'][subject_code])
+        cfg.LEGACY_ACCOMMODATIONS['acc_text_to_speech_embed'][subject_code], rng)
     ao.acc_abacus_nonembed = _pick_accommodation_code(
-        cfg.LEGACY_ACCOMMODATIONS['acc_abacus_nonembed'][subject_code])
+        cfg.LEGACY_ACCOMMODATIONS['acc_abacus_nonembed'][subject_code], rng)
     ao.acc_alternate_response_options_nonembed = _pick_accommodation_code(
-        cfg.LEGACY_ACCOMMODATIONS['acc_alternate_response_options_nonembed'][subject_code])
+        cfg.LEGACY_ACCOMMODATIONS['acc_alternate_response_options_nonembed'][subject_code], rng)
     ao.acc_calculator_nonembed = _pick_accommodation_code(
-        cfg.LEGACY_ACCOMMODATIONS['acc_calculator_nonembed'][subject_code])
+        cfg.LEGACY_ACCOMMODATIONS['acc_calculator_nonembed'][subject_code], rng)
     ao.acc_multiplication_table_nonembed = _pick_accommodation_code(
-        cfg.LEGACY_ACCOMMODATIONS['acc_multiplication_table_nonembed'][subject_code])
+        cfg.LEGACY_ACCOMMODATIONS['acc_multiplication_table_nonembed'][subject_code], rng)
     ao.acc_print_on_demand_nonembed = _pick_accommodation_code(
-        cfg.LEGACY_ACCOMMODATIONS['acc_asl_video_embed'][subject_code])
+        cfg.LEGACY_ACCOMMODATIONS['acc_asl_video_embed'][subject_code], rng)
     ao.acc_read_aloud_nonembed = _pick_accommodation_code(
-        cfg.LEGACY_ACCOMMODATIONS['acc_read_aloud_nonembed'][subject_code])
+        cfg.LEGACY_ACCOMMODATIONS['acc_read_aloud_nonembed'][subject_code], rng)
     ao.acc_scribe_nonembed = _pick_accommodation_code(
-        cfg.LEGACY_ACCOMMODATIONS['acc_scribe_nonembed'][subject_code])
+        cfg.LEGACY_ACCOMMODATIONS['acc_scribe_nonembed'][subject_code], rng)
     ao.acc_speech_to_text_nonembed = _pick_accommodation_code(
-        cfg.LEGACY_ACCOMMODATIONS['acc_speech_to_text_nonembed'][subject_code])
+        cfg.LEGACY_ACCOMMODATIONS['acc_speech_to_text_nonembed'][subject_code], rng)
     ao.acc_streamline_mode = _pick_accommodation_code(
-        cfg.LEGACY_ACCOMMODATIONS['acc_streamline_mode'][subject_code])
+        cfg.LEGACY_ACCOMMODATIONS['acc_streamline_mode'][subject_code], rng)
 
     # Create real accommodations based on assessment and other data.
     # Yeah, this should be driven by configuration at some point but for now, let's get a couple emitted ...
@@ -90,8 +96,13 @@ def generate_assessment_outcome(student: Student, assessment: Assessment, id_gen
     return ao
 
 
-def generate_item_data(outcome: AssessmentOutcome):
-    # given items, generate item response data in the outcome
+def generate_item_data(outcome: AssessmentOutcome, rng=random, lazy=False):
+    """ given items, generate item response data in the outcome
+
+    :param outcome outcome to set the item data of
+    :param rng random number generator
+    :param lazy True to keep only what is needed to generate the item data when it is read, see LazyItemResponses
+    """
     outcome.item_data = []
 
     asmt = outcome.assessment
@@ -103,31 +114,103 @@ def generate_item_data(outcome: AssessmentOutcome):
     capability = outcome.student.capability[asmt.subject.code] \
         if outcome.student.capability and asmt.subject.code in outcome.student.capability else None
     answer_rate = (0.88 + 0.03 * capability) if capability is not None else 0.94
-    admin_date = datetime.combine(outcome.date_taken, time(hour=randrange(7, 14)))
-    resp_date = admin_date
+    admin_date = datetime.combine(outcome.date_taken, time(hour=rng.randrange(7, 14)))
+    if lazy:
+        outcome.item_data = LazyItemResponses(items, admin_date, capability, answer_rate,
+                                              rng.getrandbits(64), rng.getrandbits(64))
+        return
 
+    # the responses are generated into a single item data object and copied into the columns
+    responses = ItemResponses(items, admin_date)
+    aid = AssessmentOutcomeItemData()
     for item in items:
-        aid = AssessmentOutcomeItemData()
-        aid.item = item
-        aid.number_visits = 1
-        aid.page_number = 1
-        aid.page_visits = 1
-        aid.dropped = '0'
-        aid.admin_date = admin_date
-        aid.score_status = 'SCORED'
-
-        if random() < answer_rate:
-            generate_response(aid, item, capability)
+        if rng.random() < answer_rate:
+            aid.sub_scores = None
+            generate_response(aid, item, capability, rng)
+            responses.append(aid.page_time, True, aid.score, aid.response_value, aid.sub_scores)
         else:
-            aid.page_time = randrange(1000, 5000)
-            aid.is_selected = '0'
-            aid.score = 0
-            aid.response_value = None
+            responses.append(rng.randrange(1000, 5000), False, 0, None)
 
-        resp_date += timedelta(milliseconds=aid.page_time)
-        aid.response_date = resp_date
+    outcome.item_data = responses
 
-        outcome.item_data.append(aid)
+
+class LazyItemResponses:
+    """
+    The item data of an outcome, generated every time it is read rather than kept: the outcome holds the seeds
+    of the generation instead of the responses, so the item data of all the outcomes of a grade are never in
+    memory together. It is read like ItemResponses, by rows().
+
+    Whether an item is answered, and the time spent on it, are drawn from a stream of their own, which is run
+    once up front for the dates of the opportunity; the responses are drawn from another stream. The item data
+    is the same every time it is read, but not the same as that generated by an ItemResponses from the same
+    random number generator.
+    """
+
+    __slots__ = ('items', 'admin_date', 'capability', 'answer_rate', 'time_seed', 'response_seed',
+                 'first_response_date', 'last_response_date')
+
+    number_visits = ItemResponses.number_visits
+    page_number = ItemResponses.page_number
+    page_visits = ItemResponses.page_visits
+    dropped = ItemResponses.dropped
+    score_status = ItemResponses.score_status
+
+    def __init__(self, items: [AssessmentItem], admin_date: datetime, capability: float, answer_rate: float,
+                 time_seed: int, response_seed: int):
+        """
+        :param items: the items of the assessment, in order
+        :param admin_date: date and time the items were administered
+        :param capability: student's capability (0.0 - 4.0), None if unknown
+        :param answer_rate: chance the student answers an item
+        :param time_seed: seed of the answers and page times
+        :param response_seed: seed of the responses
+        """
+        self.items = items
+        self.admin_date = admin_date
+        self.capability = capability
+        self.answer_rate = answer_rate
+        self.time_seed = time_seed
+        self.response_seed = response_seed
+
+        # the dates of the opportunity come from the first and last responses
+        duration = 0
+        first = None
+        for _, page_time in self._times():
+            duration += page_time
+            if first is None:
+                first = duration
+        self.first_response_date = response_date(admin_date, first)
+        self.last_response_date = response_date(admin_date, duration)
+
+    def __len__(self):
+        return len(self.items)
+
+    def rows(self):
+        """
+        Generate the item data.
+
+        :return: iterator of (item, selected, page time, score, response value, sub-scores, response offset), see
+                 ItemResponses.rows
+        """
+        rng = random.Random(self.response_seed)
+        aid = AssessmentOutcomeItemData()
+        offset = 0
+        for item, (selected, page_time) in zip(self.items, self._times()):
+            offset += page_time
+            if selected:
+                aid.sub_scores = None
+                generate_response(aid, item, self.capability, rng, page_time)
+                yield item, True, page_time, aid.score, aid.response_value, aid.sub_scores, offset
+            else:
+                yield item, False, page_time, 0, None, None, offset
+
+    def _times(self):
+        rng = random.Random(self.time_seed)
+        for item in self.items:
+            if rng.random() < self.answer_rate:
+                yield True, generate_page_time(item, rng)
+            else:
+                yield False, rng.randrange(1000, 5000)
 
 
 def generate_session(outcome: [AssessmentOutcome]):
@@ -147,22 +230,25 @@ def generate_session(outcome: [AssessmentOutcome]):
     outcome.session = names.PEOPLE_NAMES.last_names[int(hexdigest[-4:], 16)][:3].upper() + '-' + hexdigest[:4]
 
 
-def set_opportunity_dates(outcome: [AssessmentOutcome]):
+def set_opportunity_dates(outcome: [AssessmentOutcome], rng=random):
     if len(outcome.item_data) == 0:
-        outcome.start_date = datetime.combine(outcome.date_taken, time(hour=randrange(7, 14)))
-        outcome.submit_date = outcome.start_date + timedelta(minutes=randrange(45, 60))
+        outcome.start_date = datetime.combine(outcome.date_taken, time(hour=rng.randrange(7, 14)))
+        outcome.submit_date = outcome.start_date + timedelta(minutes=rng.randrange(45, 60))
     else:
-        outcome.start_date = outcome.item_data[0].response_date
-        outcome.submit_date = outcome.item_data[-1].response_date
+        outcome.start_date = outcome.item_data.first_response_date
+        outcome.submit_date = outcome.item_data.last_response_date
     outcome.status_date = outcome.submit_date
 
 
-def generate_response(aid: AssessmentOutcomeItemData, item: AssessmentItem, capability: float = None):
+def generate_response(aid: AssessmentOutcomeItemData, item: AssessmentItem, capability: float = None, rng=random,
+                      page_time: int = None):
     """ generate and set response-related fields in outcome
 
     :param aid outcome to set
     :param item outcome's item
     :param capability student's capability (0.0 - 4.0)
+    :param rng random number generator
+    :param page_time time spent on the item (ms), None to generate it (see generate_page_time)
     """
     # difficulty ranges from -3.0 to 10.0 (more or less)
     # difficulty cut points vary by asmt/subject/grade but approximately:
@@ -174,19 +260,18 @@ def generate_response(aid: AssessmentOutcomeItemData, item: AssessmentItem, capa
     # chance to answer correctly is based on capability if it's available
     correct_rate = (0.40 + 0.15 * capability) if capability is not None else 0.70
     correct_rate += (0 if not item.difficulty else -0.05 * item.difficulty)
-    correct = random() < correct_rate
+    correct = rng.random() < correct_rate
 
     aid.is_selected = '1'
+    aid.page_time = generate_page_time(item, rng) if page_time is None else page_time
     if item.type == 'MC':  # multiple choice
-        aid.page_time = 1000 * randrange(1, 15)
         if correct:
             aid.response_value = item.answer_key
             aid.score = item.max_score
         else:
-            aid.response_value = choice(ascii_uppercase[0:item.options_count].replace(item.answer_key, ''))
+            aid.response_value = rng.choice(ascii_uppercase[0:item.options_count].replace(item.answer_key, ''))
             aid.score = 0
     elif item.type == 'MS':  # multi select
-        aid.page_time = 1000 * randrange(2, 30)
         if correct:
             aid.response_value = item.answer_key
             aid.score = item.max_score
@@ -195,69 +280,72 @@ def generate_response(aid: AssessmentOutcomeItemData, item: AssessmentItem, capa
             for ch in item.answer_key.split(','):
                 wrong_answers = wrong_answers.replace(ch, '')
             aid.response_value = ','.join(
-                sorted(sample(ascii_uppercase[0:item.options_count].replace(item.answer_key[0], ''), 2)))
+                sorted(rng.sample(ascii_uppercase[0:item.options_count].replace(item.answer_key[0], ''), 2)))
             aid.score = 0
     elif item.type == 'EBSR':  # evidence-based selected response
         # usually requires two responses, the second may be: not required, single choice, multi-select
         # answer key examples: "B;D", "D", "A;C,E"; options_count is always 0, max_score is 1
-        aid.page_time = 1000 * randrange(10, 60)
         answers = item.answer_key.split(';')
         if correct:
             aid.response_value = _generate_ebsr_response(answers[0], answers[1] if len(answers) > 1 else None)
             aid.score = item.max_score
         else:
             wrong_answers = ascii_uppercase[0:4].replace(answers[0], '')
-            wrong_answer = wrong_answers[randrange(len(wrong_answers))]
+            wrong_answer = wrong_answers[rng.randrange(len(wrong_answers))]
             # it doesn't really matter what the second value is, so just reuse the first answer
             aid.response_value = _generate_ebsr_response(wrong_answer, wrong_answer)
             aid.score = 0
     elif item.type == 'SA' or item.type == 'ER':  # short answer text response
-        aid.page_time = 1000 * randrange(60, 300)
-        aid.response_value = text.paragraph()
+        aid.response_value = text.paragraph(rng)
         if correct:
             aid.score = item.max_score
         else:
             aid.score = 0
     elif item.type == 'WER':  # writing extended response (lots of text, shorter for wrong answer; has sub-scores)
-        aid.page_time = 1000 * randrange(120, 600)
         if correct:
-            aid.response_value = _generate_wer_response(randint(3, 8))
+            aid.response_value = _generate_wer_response(rng.randint(3, 8), rng)
             # score for organization and evidence = round(4 * capability / 4.0) = round(capability)
-            aid.sub_scores = [round(capability), round(capability), randrange(0, 3)] if capability \
-                else [randrange(1,5), randrange(1,5), randrange(0,3)]
+            aid.sub_scores = [round(capability), round(capability), rng.randrange(0, 3)] if capability \
+                else [rng.randrange(1,5), rng.randrange(1,5), rng.randrange(0,3)]
         else:
-            aid.response_value = _generate_wer_response(1)
-            aid.sub_scores = [randrange(0, 2), randrange(0, 2), 0]
+            aid.response_value = _generate_wer_response(1, rng)
+            aid.sub_scores = [rng.randrange(0, 2), rng.randrange(0, 2), 0]
         aid.score = ceil((aid.sub_scores[0] + aid.sub_scores[1]) / 2.0) + aid.sub_scores[2]
     elif item.type == 'EQ':  # equation response
-        aid.page_time = 1000 * randrange(10, 60)
         # note that this doesn't consider whether answer is correct or not, just hardcoded response
         aid.response_value = '<response> <math xmlns="http://www.w3.org/1998/Math/MathML"> <mstyle displaystyle="true"> <mn>2</mn> <mn>0</mn> <mn>1</mn> </mstyle> </math> </response>'
-        aid.score = item.max_score if correct else randrange(0, item.max_score)
+        aid.score = item.max_score if correct else rng.randrange(0, item.max_score)
     elif item.type == 'HTQ':  # hot text
-        aid.page_time = 1000 * randrange(10, 60)
         # note that this doesn't consider whether answer is correct or not, just hardcoded response
         aid.response_value = _generate_htq_response(item.item_key)
-        aid.score = item.max_score if correct else randrange(0, item.max_score)
+        aid.score = item.max_score if correct else rng.randrange(0, item.max_score)
     elif item.type == 'MI':  # match interaction
-        aid.page_time = 1000 * randrange(10, 60)
         # note that this doesn't consider whether answer is correct or not, just hardcoded response
         aid.response_value = _generate_mi_response(item.item_key)
-        aid.score = item.max_score if correct else randrange(0, item.max_score)
+        aid.score = item.max_score if correct else rng.randrange(0, item.max_score)
     elif item.type == 'TI':  # table interaction
-        aid.page_time = 1000 * randrange(10, 60)
         # note that this doesn't consider whether answer is correct or not, just hardcoded response
         aid.response_value = _generate_ti_response(item.item_key)
-        aid.score = item.max_score if correct else randrange(0, item.max_score)
+        aid.score = item.max_score if correct else rng.randrange(0, item.max_score)
     # elif item.type == 'GI':     # grid item response ?
     else:
-        aid.page_time = 1000 * randrange(2, 60)
         aid.response_value = ('good ' if correct else 'poor ') + item.type + ' response'
-        aid.score = item.max_score if correct else randrange(0, item.max_score)
+        aid.score = item.max_score if correct else rng.randrange(0, item.max_score)
+
+
+def generate_page_time(item: AssessmentItem, rng=random) -> int:
+    """ generate the time a student spends answering an item, depending on the item type
+
+    :param item item
+    :param rng random number generator
+    :return time in ms
+    """
+    low, high = PAGE_TIME_RANGES.get(item.type, DEFAULT_PAGE_TIME_RANGE)
+    return 1000 * rng.randrange(low, high)
 
 
-def _generate_wer_response(paragraphs):
-    rt = RandomText()
+def _generate_wer_response(paragraphs, rng=random):
+    rt = RandomText(rng)
     return '\n\n'.join(('<p>\n' + rt.paragraph() + '\n</p>') for _ in range(paragraphs))
 
 
@@ -376,17 +464,18 @@ def _generate_ti_response(item_key):
     return '<responseSpec><responseTable>' + table + '</responseTable></responseSpec>'
 
 
-def _pick_accommodation_code(default_code):
+def _pick_accommodation_code(default_code, rng=random):
     """
     Pick a random accommodation code between 4 and 26 inclusive if default_code is 4.
     If code is 0 return 0.
 
     @param default_code: The default code from configuration
+    @param rng: random number generator
     @return: Generated random code
     """
     if default_code == 0:
         return 0
     elif default_code == 4:
-        return randint(4, 26)
+        return rng.randint(4, 26)
     else:
         raise ValueError('invalid default_code \'{}\' (must be 0 or 4)'.format(default_code))
@@ -2,6 +2,7 @@
 """
 
 import datetime
+import random
 
 import datagen.config.enrollment as general_enroll_config
 import datagen.generators.population as general_pop_gen
@@ -13,18 +14,19 @@ from datagen.model.student import Student
 from datagen.util.id_gen import IDGen as id_gen
 
 
-def generate_class(name, subject_code, school: School, sub_class=None):
+def generate_class(name, subject_code, school: School, sub_class=None, rng=random):
     """Generate a class for a subject in a school.
 
     :param name: The name of the class
     :param subject_code: The subject this class covers
     :param school: The school containing the class
     :param sub_class: The sub-class of class to create (if requested, must be subclass of Class)
+    :param rng: random number generator
     :returns: A class object
     """
     # Create the class
     c = Class() if sub_class is None else sub_class()
-    c.guid = id_gen.get_uuid()
+    c.guid = id_gen.get_uuid(rng)
     c.school = school
     c.name = name
     c.subject_code = subject_code
@@ -33,7 +35,7 @@ def generate_class(name, subject_code, school: School, sub_class=None):
 
 
 def generate_section(clss: Class, name, grade, year=datetime.datetime.now().year, most_recent=False,
-                     teachers_for_section=general_enroll_config.TEACHERS_PER_SECTION, sub_class=None):
+                     teachers_for_section=general_enroll_config.TEACHERS_PER_SECTION, sub_class=None, rng=random):
     """Generate a section for a given class. This will also generate the necessary number of teaching staff for the
     section.
 
@@ -44,11 +46,12 @@ def generate_section(clss: Class, name, grade, year=datetime.datetime.now().year
     :param most_recent: If the section is the most recent section for this grade and class
     :param teachers_for_section: The number of teachers to generate for this section
     :param sub_class: The sub-class of section to create (if requested, must be subclass of Section)
+    :param rng: random number generator
     :returns: A section object
     """
     # Create the section
     s = Section() if sub_class is None else sub_class()
-    s.guid = id_gen.get_uuid()
+    s.guid = id_gen.get_uuid(rng)
     s.clss = clss
     s.name = name
     s.grade = grade
@@ -60,23 +63,24 @@ def generate_section(clss: Class, name, grade, year=datetime.datetime.now().year
 
     # Generate teaching staff
     for i in range(teachers_for_section):
-        s.teachers.append(general_pop_gen.generate_teaching_staff_member(clss.school))
+        s.teachers.append(general_pop_gen.generate_teaching_staff_member(clss.school, rng=rng))
 
     return s
 
 
-def generate_enrollment(section: Section, student: Student, grade=None, sub_class=None):
+def generate_enrollment(section: Section, student: Student, grade=None, sub_class=None, rng=random):
     """Generate an enrollment record linking a student with a section.
 
     :param section: The section the student is enrolled in
     :param student: The student enrolled in the section
     :param grade: The grade of the student at the time of enrollment (defaults to student current grade)
     :param sub_class: The sub-class of enrollment to create (if requested, must be subclass of Enrollment)
+    :param rng: random number generator
     :returns: An enrollment object
     """
     # Create the enrollment
     e = Enrollment() if sub_class is None else sub_class()
-    e.guid = id_gen.get_uuid()
+    e.guid = id_gen.get_uuid(rng)
     e.section = section
     e.student = student
     e.grade = grade if grade is not None else student.grade
@@ -16,7 +16,7 @@ from datagen.util.id_gen import IDGen
 
 
 def generate_state(state_type, name, code, id_gen=IDGen,
-                   state_types=state_config.STATE_TYPES, pop_demos=pop_config.DEMOGRAPHICS):
+                   state_types=state_config.STATE_TYPES, pop_demos=pop_config.DEMOGRAPHICS, rng=random):
     """Generate a state of the given state type.
 
     :param state_type: The type of state to generate
@@ -25,6 +25,7 @@ def generate_state(state_type, name, code, id_gen=IDGen,
     :param id_gen: id generator
     :param state_types: The state types configuration object
     :param pop_demos: The population demographics configuration object
+    :param rng: random number generator
     :returns: The state
     """
     # Validate state type
@@ -33,7 +34,7 @@ def generate_state(state_type, name, code, id_gen=IDGen,
 
     # Create the state
     s = State()
-    s.guid = id_gen.get_uuid()
+    s.guid = id_gen.get_uuid(rng)
     s.name = name
     s.code = code
     s.type_str = state_type
@@ -50,12 +51,14 @@ def generate_state(state_type, name, code, id_gen=IDGen,
     return s
 
 
-def generate_district(district_type, state: State, id_gen=IDGen, district_types=hier_config.DISTRICT_TYPES):
+def generate_district(district_type, state: State, id_gen=IDGen, district_types=hier_config.DISTRICT_TYPES,
+                      rng=random):
     """Generate a district specified by the parameters.
 
     :param district_type: The type of district to generate
     :param state: The state the district belongs to
     :param district_types: The district types configuration object
+    :param rng: random number generator
     :returns: The district
     """
     # Validate district type
@@ -64,8 +67,8 @@ def generate_district(district_type, state: State, id_gen=IDGen, district_types=
 
     # Create and store the district
     d = District()
-    d.guid = id_gen.get_uuid()
-    d.name = name_gen.generate_district_name()
+    d.guid = id_gen.get_uuid(rng)
+    d.name = name_gen.generate_district_name(rng=rng)
     d.state = state
     d.type_str = district_type
     d.config = district_types[district_type]
@@ -76,7 +79,7 @@ def generate_district(district_type, state: State, id_gen=IDGen, district_types=
 
 
 def generate_school(school_type, district: District, id_gen=IDGen, school_types=hier_config.SCHOOL_TYPES,
-                    interim_asmt_rate=cfg.INTERIM_ASMT_RATE):
+                    interim_asmt_rate=cfg.INTERIM_ASMT_RATE, rng=random):
     """Generate a school specified by the parameters.
 
     :param school_type: The type of school to generate
@@ -84,6 +87,7 @@ def generate_school(school_type, district: District, id_gen=IDGen, school_types=
     :param id_gen: ID generator
     :param school_types: The school types configuration object
     :param interim_asmt_rate: The rate (chance) that students in this school will take interim assessments
+    :param rng: random number generator
     :returns: The school
     """
     # Validate the school type
@@ -92,8 +96,8 @@ def generate_school(school_type, district: District, id_gen=IDGen, school_types=
 
     # Create and store the school
     s = School()
-    s.guid = id_gen.get_uuid()
-    s.name = name_gen.generate_school_name(hier_config.SCHOOL_TYPES[school_type]['type'])
+    s.guid = id_gen.get_uuid(rng)
+    s.name = name_gen.generate_school_name(hier_config.SCHOOL_TYPES[school_type]['type'], rng=rng)
     s.district = district
     s.type_str = school_type
     s.config = school_types[school_type]
@@ -101,25 +105,26 @@ def generate_school(school_type, district: District, id_gen=IDGen, school_types=
     s.id = id_gen.get_school_id(district.id)
 
     # Decide if the school takes interim assessments
-    if random.random() < interim_asmt_rate:
+    if rng.random() < interim_asmt_rate:
         s.takes_interim_asmts = True
 
     return s
 
 
-def generate_registration_system(year, extract_date, id_gen):
+def generate_registration_system(year, extract_date, id_gen, rng=random):
     """
     Generate a registration system.
 
     @param year: The academic year
     @param extract_date: The date of the data extract
     @param id_gen: ID generator
+    @param rng: random number generator
     @returns: The registration system
     """
     # Create the object
     ars = RegistrationSystem()
-    ars.guid = id_gen.get_uuid()
-    ars.sys_guid = id_gen.get_uuid()
+    ars.guid = id_gen.get_uuid(rng)
+    ars.sys_guid = id_gen.get_uuid(rng)
     ars.academic_year = year
     ars.extract_date = extract_date
     ars.callback_url = 'SateTestReg.gov/StuReg/CallBack'
@@ -127,7 +132,7 @@ def generate_registration_system(year, extract_date, id_gen):
     return ars
 
 
-def generate_institution_hierarchy(state: State, district: District, school: School, id_gen):
+def generate_institution_hierarchy(state: State, district: District, school: School, id_gen, rng=random):
     """
     Generate a hierarchy institution object for a set of hierarchy institutions.
 
@@ -135,12 +140,13 @@ def generate_institution_hierarchy(state: State, district: District, school: Sch
     @param district: The district in the hierarchy
     @param school: The school in the hierarchy
     @param id_gen: ID generator
+    @param rng: random number generator
     @returns: An institution hierarchy object
     """
     # Create the object
     ih = InstitutionHierarchy()
     ih.rec_id = id_gen.get_rec_id('inst_hier')
-    ih.guid = id_gen.get_uuid()
+    ih.guid = id_gen.get_uuid(rng)
     ih.state = state
     ih.district = district
     ih.school = school
@@ -3,6 +3,7 @@ An assessment generator
 """
 
 import datetime
+import random
 
 import datagen.generators.assessment as gen_asmt_generator
 from datagen.model.assessment import Assessment
@@ -18,7 +19,9 @@ def create_iab_outcome_object(date_taken: datetime.date,
                               iab_asmt: Assessment,
                               id_gen: IDGen,
                               iab_results: {str: AssessmentOutcome},
-                              gen_item=True):
+                              gen_item=True,
+                              lazy_item=False,
+                              rng=random):
     """
 
     :param date_taken:
@@ -27,6 +30,8 @@ def create_iab_outcome_object(date_taken: datetime.date,
     :param id_gen:
     :param iab_results:
     :param gen_item:
+    :param lazy_item:
+    :param rng:
     :return:
     """
     # Make sure the assessment is known in the results
@@ -34,7 +39,8 @@ def create_iab_outcome_object(date_taken: datetime.date,
         iab_results[iab_asmt.guid] = []
 
     # Create the original outcome object
-    ao = generate_interim_assessment_outcome(date_taken, student, iab_asmt, id_gen, gen_item=gen_item)
+    ao = generate_interim_assessment_outcome(date_taken, student, iab_asmt, id_gen, gen_item=gen_item,
+                                             lazy_item=lazy_item, rng=rng)
     iab_results[iab_asmt.guid].append(ao)
 
 
@@ -42,7 +48,9 @@ def generate_interim_assessment_outcome(date_taken: datetime.date,
                                         student: Student,
                                         assessment: Assessment,
                                         id_gen: IDGen,
-                                        gen_item=True):
+                                        gen_item=True,
+                                        lazy_item=False,
+                                        rng=random):
     """
     Generate an assessment outcome for a given student.
 
@@ -51,11 +59,13 @@ def generate_interim_assessment_outcome(date_taken: datetime.date,
     @param assessment: The assessment to create the outcome for
     @param id_gen: ID generator
     @param gen_item: If should create item-level responses
+    @param lazy_item: If the item-level responses should be generated when they are written (see LazyItemResponses)
+    @param rng: random number generator
     @returns: The assessment outcome
     """
 
     # Run the General generator
-    sao = gen_asmt_generator.generate_assessment_outcome(student, assessment, id_gen)
+    sao = gen_asmt_generator.generate_assessment_outcome(student, assessment, id_gen, rng)
 
     # Set other specifics
     sao.school = student.school
@@ -65,17 +75,17 @@ def generate_interim_assessment_outcome(date_taken: datetime.date,
 
     # Generate assessment outcome Item-level data
     if gen_item:
-        gen_asmt_generator.generate_item_data(sao)
+        gen_asmt_generator.generate_item_data(sao, rng, lazy=lazy_item)
 
     # set timestamps for the opportunity
-    gen_asmt_generator.set_opportunity_dates(sao)
+    gen_asmt_generator.set_opportunity_dates(sao, rng)
 
     # use the student capability to generate an overall score
     # note that IAB level is calculated differently using SB formulae
     overall = Score('Overall')
     overall.score, level = \
-        score_given_capability(student.capability[assessment.subject.code], assessment.overall.get_cuts())
-    overall.stderr = random_stderr(overall.score, assessment.overall.score_min, assessment.overall.score_max)
+        score_given_capability(student.capability[assessment.subject.code], assessment.overall.get_cuts(), rng)
+    overall.stderr = random_stderr(overall.score, assessment.overall.score_min, assessment.overall.score_max, rng)
     overall.perf_lvl = claim_perf_lvl(overall.score, overall.stderr, assessment.overall.cut_points[1])
     sao.overall = overall
 
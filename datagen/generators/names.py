@@ -37,83 +37,98 @@ APARTMENT_PREFIXES = ['#', 'Apt', 'Suite']
 PEOPLE_NAMES = PeopleNames(NAMES_MALE_FIRST, NAMES_FEMALE_FIRST, NAMES_LAST)
 
 
-def generate_district_name(max_name_length=None):
+def generate_district_name(max_name_length=None, rng=random):
     """Generate a name for a district.
 
     :param max_name_length: The longest a name can be
+    :param rng: random number generator
     :returns: New district name
     """
-    return _generate_name_from_lists(NAMES_ANIMALS, NAMES_ANIMALS, DISTRICT_SUFFIXES, max_name_length)
+    return _generate_name_from_lists(NAMES_ANIMALS, NAMES_ANIMALS, DISTRICT_SUFFIXES, max_name_length, rng)
 
 
-def generate_school_name(school_type, max_name_length=None):
+def generate_school_name(school_type, max_name_length=None, rng=random):
     """Generate a name for a school by combining a word from each provided list, taking length into consideration.
 
     :param school_type: (High School, Middle School, Elementary School) used to determine appropriate suffix for name.
     :param max_name_length: The length of the longest acceptable name
+    :param rng: random number generator
     :returns: New school name
     """
     if school_type not in SCHOOL_SUFFIXES:
         raise KeyError("School type '" + school_type + "' not found")
-    return _generate_name_from_lists(NAMES_ANIMALS, NAMES_ANIMALS, SCHOOL_SUFFIXES[school_type], max_name_length)
+    return _generate_name_from_lists(NAMES_ANIMALS, NAMES_ANIMALS, SCHOOL_SUFFIXES[school_type], max_name_length, rng)
 
 
-def generate_person_name(gender):
+def generate_person_name(gender, rng=random):
     """Generate a gender-appropriate name for a person.
 
     :param gender: The gender of the person
+    :param rng: random number generator
     :returns: A tuple of (first, middle, last) name pieces
     """
-    l_names = PEOPLE_NAMES.last_names
-    if gender == 'male':
-        fm_names = PEOPLE_NAMES.male_names
-    elif gender == 'female':
-        fm_names = PEOPLE_NAMES.female_names
-    elif gender == 'none' or gender == 'non_binary':
-        fm_names = random.choice([PEOPLE_NAMES.male_names, PEOPLE_NAMES.female_names])
-    else:
-        raise Exception("Unknown gender value '{}' provided [expected 'male', 'female', 'non_binary' or 'none']"
-                        .format(str(gender)))
-
-    return random.choice(fm_names), \
-        random.choice(fm_names) if random.random() < 0.70 else None, \
-        random.choice(l_names) + ('' if random.random() < 0.92 else '-' + random.choice(l_names))
-
-
-def generate_street_address_line_1():
-    """Generate a street address (a.k.a. address line 1).
-
-    :returns: The street address
-    """
-    return str(random.randint(1, 5000)) + ' ' + random.choice(NAMES_BIRDS) + ' ' + random.choice(STREET_SUFFIXES)
+    return generate_person_names([gender], rng)[0]
 
 
-def generate_street_address_line_2():
-    """Generate the second line of a street address.
+def generate_person_names(genders: [str], rng=random) -> [(str, str, str)]:
+    """Generate gender-appropriate names for a batch of people.
 
-    :returns: The second line of a street address
+    :param genders: The gender of each person
+    :param rng: random number generator
+    :returns: A list of tuples of (first, middle, last) name pieces
     """
-    return random.choice(APARTMENT_PREFIXES) + ' ' + str(random.randint(1, 20))
-
-
-def generate_street_address_city():
-    """Generate the city name of a street address.
-
-    :returns: The city name of a street address
+    random_ = rng.random
+    l_names = PEOPLE_NAMES.last_names
+    names_by_gender = {'male': PEOPLE_NAMES.male_names, 'female': PEOPLE_NAMES.female_names}
+    names = []
+    for gender in genders:
+        fm_names = names_by_gender.get(gender)
+        if fm_names is None:
+            if gender != 'none' and gender != 'non_binary':
+                raise Exception("Unknown gender value '{}' provided [expected 'male', 'female', 'non_binary' or 'none']"
+                                .format(str(gender)))
+            fm_names = PEOPLE_NAMES.male_names if random_() < 0.5 else PEOPLE_NAMES.female_names
+        first = fm_names[int(random_() * len(fm_names))]
+        middle = fm_names[int(random_() * len(fm_names))] if random_() < 0.70 else None
+        last = l_names[int(random_() * len(l_names))]
+        if random_() >= 0.92:
+            last += '-' + l_names[int(random_() * len(l_names))]
+        names.append((first, middle, last))
+    return names
+
+
+def generate_street_addresses(count, line_2_rate, rng=random) -> [(str, str, str)]:
+    """Generate a batch of street addresses (line 1, the optional line 2 and the city).
+
+    :param count: The number of addresses
+    :param line_2_rate: The rate at which to generate a line two
+    :param rng: random number generator
+    :returns: A list of tuples of (line 1, line 2 or None, city)
     """
-    return random.choice(NAMES_BIRDS) + ' ' + random.choice(NAMES_BIRDS)
-
-
-def _generate_name_from_lists(list_1, list_2, suffix_list, max_name_length=None):
+    random_ = rng.random
+    birds = len(NAMES_BIRDS)
+    addresses = []
+    for _ in range(count):
+        line_1 = str(1 + int(random_() * 5000)) + ' ' + NAMES_BIRDS[int(random_() * birds)] + ' ' + \
+            STREET_SUFFIXES[int(random_() * len(STREET_SUFFIXES))]
+        line_2 = APARTMENT_PREFIXES[int(random_() * len(APARTMENT_PREFIXES))] + ' ' + str(1 + int(random_() * 20)) \
+            if random_() < line_2_rate else None
+        city = NAMES_BIRDS[int(random_() * birds)] + ' ' + NAMES_BIRDS[int(random_() * birds)]
+        addresses.append((line_1, line_2, city))
+    return addresses
+
+
+def _generate_name_from_lists(list_1, list_2, suffix_list, max_name_length=None, rng=random):
     """Generate a name by combining a word from each provided list, taking length into consideration
 
     :param list_1: a list of strings to use as a component of a name
     :param list_2: a list of strings to use as a component of a name
     :param suffix_list: a list of suffix strings to use in the name
     :param max_name_length: The length of the longest acceptable name
+    :param rng: random number generator
     """
     # Pick suffix
-    suffix = random.choice(suffix_list)
+    suffix = rng.choice(suffix_list)
     # Adding the plus 1 to account for the space between the name and the suffix
     suffix_length = len(suffix) + 1
     if max_name_length:
@@ -123,11 +138,11 @@ def _generate_name_from_lists(list_1, list_2, suffix_list, max_name_length=None)
             raise Exception('Maximum name length is too small. Please increase and try again.')
 
     # Build the name
-    name_1 = str(random.choice(list_1))
-    name_2 = str(random.choice(list_2))
+    name_1 = str(rng.choice(list_1))
+    name_2 = str(rng.choice(list_2))
 
     if 'fish' in name_1.lower() and 'fish' in name_2.lower():
-        name_2 = str(random.choice(list_2))
+        name_2 = str(rng.choice(list_2))
 
     result = name_1 + ' ' + name_2
     if max_name_length and (len(result) > max_name_length):
@@ -18,40 +18,53 @@ from datagen.model.school import School
 from datagen.model.staff import DistrictStaff, TeachingStaff
 from datagen.model.student import Student
 from datagen.model.studentgroup import StudentGroup
-from datagen.util.assessment_stats import Properties, RandomLevelByDemographics, random_capability, \
-    adjust_capability, inverse_adjustment
+from datagen.util.assessment_stats import Properties, RandomLevelByDemographics, adjust_capability, \
+    inverse_adjustment
 from datagen.util.id_gen import IDGen
-from datagen.util.weighted_choice import weighted_choice
+from datagen.util.weighted_choice import AliasSampler
 
+# RandomLevelByDemographics by (grade, subject family), see _level_generator
+_level_generators = {}
 
-def generate_district_staff_member(district: District, id_gen: IDGen=IDGen, sub_class=None):
+# student attribute flagged by each ethnicity of the demographic configs
+ETHNICITY_ATTRIBUTES = {'amer_ind': 'eth_amer_ind', 'black': 'eth_black', 'hispanic': 'eth_hispanic',
+                        'asian': 'eth_asian', 'filipino': 'eth_filipino', 'pac_isl': 'eth_pacific',
+                        'white': 'eth_white', 'multi': 'eth_multi', 'none': 'eth_none'}
+
+# (config, AliasSampler) by the id of a multi-select config, see _demo_sampler
+_demo_samplers = {}
+
+
+def generate_district_staff_member(district: District, id_gen: IDGen=IDGen, sub_class=None, rng=random):
     """Generate a district-level staff member.
 
     :param district: The district the staff member belongs to
     :param id_gen: id generator
     :param sub_class: The sub-class of district staff to create (if requested, must be subclass of DistrictStaff)
+    :param rng: random number generator
     :return: The staff member
     """
     s = DistrictStaff() if sub_class is None else sub_class()
-    s.guid = id_gen.get_uuid()
-    s.gender = random.choice(['male', 'female'])
-    s.first_name, s.middle_name, s.last_name = name_gen.generate_person_name(s.gender)
+    s.guid = id_gen.get_uuid(rng)
+    s.gender = rng.choice(['male', 'female'])
+    s.first_name, s.middle_name, s.last_name = name_gen.generate_person_name(s.gender, rng)
     s.district = district
     return s
 
 
-def generate_teaching_staff_member(school: School, id_gen: IDGen=IDGen, sub_class=None):
+def generate_teaching_staff_member(school: School, id_gen: IDGen=IDGen, sub_class=None, rng=random):
     """Generate a teacher in a given school.
 
     :param school: The school the teacher teaches in
     :param id_gen: id generator
     :param sub_class: The sub-class of teaching staff to create (if requested, must be subclass of TeachingStaff)
+    :param rng: random number generator
     :returns: The staff member
     """
     s = TeachingStaff() if sub_class is None else sub_class()
-    s.guid = id_gen.get_uuid()
-    s.gender = random.choice(['male', 'female'])
-    s.first_name, s.middle_name, s.last_name = name_gen.generate_person_name(s.gender)
+    s.guid = id_gen.get_uuid(rng)
+    s.gender = rng.choice(['male', 'female'])
+    s.first_name, s.middle_name, s.last_name = name_gen.generate_person_name(s.gender, rng)
     s.school = school
     return s
 
@@ -60,9 +73,10 @@ def generate_student(school: School, grade, id_gen: IDGen, acad_year, subject_co
                      military_connected_dist=pop_config.MILITARY_CONNECTED_DIST,
                      has_email_address_rate=pop_config.HAS_EMAIL_ADDRESS_RATE,
                      has_physical_address_rate=pop_config.HAS_PHYSICAL_ADDRESS_RATE,
-                     has_address_line_2_rate=pop_config.HAS_ADDRESS_LINE_2_RATE):
+                     has_address_line_2_rate=pop_config.HAS_ADDRESS_LINE_2_RATE,
+                     rng=random):
     """
-    Generate a student.
+    Generate a student, a batch of one, see generate_students.
 
     :param school: The school the student belongs to
     :param grade: The grade the student belongs to
@@ -73,95 +87,145 @@ def generate_student(school: School, grade, id_gen: IDGen, acad_year, subject_co
     :param has_email_address_rate: The rate at which to generate an email address for the student
     :param has_physical_address_rate: The rate at which to generate a physical address for the student
     :param has_address_line_2_rate: The rate at which to generate a line two address for the student
+    :param rng: random number generator
     :return: The student
     """
+    return generate_students(school, grade, 1, id_gen, acad_year, subject_codes, military_connected_dist,
+                             has_email_address_rate, has_physical_address_rate, has_address_line_2_rate, rng)[0]
+
+
+def generate_students(school: School, grade, count, id_gen: IDGen, acad_year, subject_codes: [str],
+                      military_connected_dist=pop_config.MILITARY_CONNECTED_DIST,
+                      has_email_address_rate=pop_config.HAS_EMAIL_ADDRESS_RATE,
+                      has_physical_address_rate=pop_config.HAS_PHYSICAL_ADDRESS_RATE,
+                      has_address_line_2_rate=pop_config.HAS_ADDRESS_LINE_2_RATE,
+                      rng=random):
+    """
+    Generate a batch of students for a school grade.
+
+    Each attribute is drawn for the whole batch before the next one, with what depends only on the school and
+    grade (the demographic config, the samplers, the level generators) looked up once, and uniform choices made
+    from a single random number.
+
+    :param school: The school the students belong to
+    :param grade: The grade the students belong to
+    :param count: The number of students
+    :param id_gen: id generator
+    :param acad_year: The current academic year the students are being created for
+    :param subject_codes: list of subject codes (for generating student capability)
+    :param military_connected_dist: The distribution of military-connected values
+    :param has_email_address_rate: The rate at which to generate an email address for a student
+    :param has_physical_address_rate: The rate at which to generate a physical address for a student
+    :param has_address_line_2_rate: The rate at which to generate a line two address for a student
+    :param rng: random number generator
+    :return: The students
+    """
+    random_ = rng.random
+    demo_config = school.demo_config[str(grade)]
+    state = school.district.state
+    district = school.district
+
     # Build student basics
-    s = Student()
-    s.guid = id_gen.get_uuid()
-    s.grade = grade
-    s.school = school
-    s.dob = _determine_student_dob(s.grade, acad_year)
+    students = [Student() for _ in range(count)]
+    birth_date = datetime.date(acad_year - grade - 6, 1, 1)
+    birth_days = 366 if calendar.isleap(birth_date.year) else 365
+    for s in students:
+        s.guid = id_gen.get_uuid(rng)
+        s.grade = grade
+        s.school = school
+        s.state = state
+        s.district = district
+        # an offset from January 1st
+        s.dob = birth_date + datetime.timedelta(days=int(random_() * birth_days))
 
     # Determine demographics
-    (gender, ethnicities, iep, sec504, lep, ed) = _determine_demographics(school.demo_config[str(grade)])
-    s.gender = gender
-    s.prg_iep = iep
-    s.prg_sec504 = sec504
-    s.prg_lep = lep
-    s.prg_econ_disad = ed
-
-    if 'amer_ind' in ethnicities:
-        s.eth_amer_ind = True
-    if 'black' in ethnicities:
-        s.eth_black = True
-    if 'hispanic' in ethnicities:
-        s.eth_hispanic = True
-    if 'asian' in ethnicities:
-        s.eth_asian = True
-    if 'filipino' in ethnicities:
-        s.eth_filipino = True
-    if 'pac_isl' in ethnicities:
-        s.eth_pacific = True
-    if 'white' in ethnicities:
-        s.eth_white = True
-    if 'multi' in ethnicities:
-        s.eth_multi = True
-    if 'none' in ethnicities:
-        s.eth_none = True
-
-    # Create the name
-    s.first_name, s.middle_name, s.last_name = name_gen.generate_person_name(s.gender)
+    gender_sampler = _demo_sampler(demo_config['gender'])
+    for s in students:
+        s.gender = gender_sampler.choose(rng)
+    ethnicity_sampler = _demo_sampler(demo_config['ethnicity'])
+    ethnicities = [ethnicity_sampler.choose(rng) for _ in students]
+    for name, attr in (('iep', 'prg_iep'), ('504', 'prg_sec504'), ('lep', 'prg_lep'), ('econ_dis', 'prg_econ_disad')):
+        perc = demo_config[name]['perc']
+        for s in students:
+            setattr(s, attr, random_() < perc)
+
+    # Pick more ethnicities if needed
+    for s, ethnicity in zip(students, ethnicities):
+        if ethnicity == 'multi':
+            eth1 = 'multi'
+            eth2 = 'multi'
+            while eth1 == 'multi' or eth2 == 'multi':
+                eth1 = ethnicity_sampler.choose(rng) if eth1 == 'multi' else eth1
+                eth2 = ethnicity_sampler.choose(rng) if eth2 == 'multi' else eth2
+            s.eth_multi = True
+            for ethnicity in (eth1, eth2):
+                setattr(s, ETHNICITY_ATTRIBUTES[ethnicity], True)
+        else:
+            setattr(s, ETHNICITY_ATTRIBUTES[ethnicity], True)
+
+    # Create the names
+    for s, (first, middle, last) in zip(students, name_gen.generate_person_names([s.gender for s in students], rng)):
+        s.first_name, s.middle_name, s.last_name = first, middle, last
 
     # Create physical and email addresses
-    if random.random() < has_email_address_rate:
-        # Email address (first.last.#@example.com)
-        s.email = s.first_name + '.' + s.last_name + '.' + str(random.randint(1, 5000)) + '@example.com'
-
-    if random.random() < has_physical_address_rate:
-        s.address_line_1 = name_gen.generate_street_address_line_1()
-        if random.random() < has_address_line_2_rate:
-            s.address_line_2 = name_gen.generate_street_address_line_2()
-        s.address_city = name_gen.generate_street_address_city()
-        s.address_zip = random.randint(10000, 99999)
-
-    # Get the demographic config
-    demo_config = school.demo_config[str(grade)]
+    for s in students:
+        if random_() < has_email_address_rate:
+            # Email address (first.last.#@example.com)
+            s.email = s.first_name + '.' + s.last_name + '.' + str(1 + int(random_() * 5000)) + '@example.com'
+    addressed = [s for s in students if random_() < has_physical_address_rate]
+    for s, (line_1, line_2, city) in zip(addressed, name_gen.generate_street_addresses(len(addressed),
+                                                                                       has_address_line_2_rate, rng)):
+        s.address_line_1, s.address_line_2, s.address_city = line_1, line_2, city
+        s.address_zip = 10000 + int(random_() * 90000)
 
     # Set other specifics
-    s.state = school.district.state
-    s.district = school.district
-    s.id = id_gen.get_student_id()
-    s.external_ssid = hashlib.md5(s.id.encode('utf-8')).hexdigest()
-    s.rec_id = id_gen.get_rec_id('student')
-    s.school_entry_date = _generate_date_enter_us_school(s.grade, acad_year)
-    s.derived_demographic = _generate_derived_demographic(s)
-    s.prg_migrant = determine_demo_option_selected(demo_config['migrant'])
-    s.prg_idea = determine_demo_option_selected(demo_config['idea'])
-    s.prg_primary_disability = random.choice(cfg.PRG_DISABILITY_TYPES)
-    s.military_connected = _pick_demo_option(military_connected_dist)
-
-    # None-out primary disability if it doesn't make sense
-    if not s.prg_iep and not s.prg_idea and not s.prg_sec504:
-        s.prg_primary_disability = None
+    for s in students:
+        s.id = id_gen.get_student_id(rng)
+        s.external_ssid = hashlib.md5(s.id.encode('utf-8')).hexdigest()
+        s.rec_id = id_gen.get_rec_id('student')
+    # assuming all students entered school in grade K, between August 15th and September 15th
+    entry_year = acad_year - grade - 1
+    for s in students:
+        s.school_entry_date = datetime.date(entry_year, 8, 15 + int(random_() * 17)) if random_() < 0.5 else \
+            datetime.date(entry_year, 9, 1 + int(random_() * 15))
+        s.derived_demographic = _generate_derived_demographic(s)
+    for name, attr in (('migrant', 'prg_migrant'), ('idea', 'prg_idea')):
+        perc = demo_config[name]['perc']
+        for s in students:
+            setattr(s, attr, random_() < perc)
+    disability_types = cfg.PRG_DISABILITY_TYPES
+    military_connected_sampler = _demo_sampler(military_connected_dist)
+    for s in students:
+        s.prg_primary_disability = disability_types[int(random_() * len(disability_types))]
+        s.military_connected = military_connected_sampler.choose(rng)
+
+        # None-out primary disability if it doesn't make sense
+        if not s.prg_iep and not s.prg_idea and not s.prg_sec504:
+            s.prg_primary_disability = None
 
     # Set language items
-    _set_lang_items(s, acad_year)
+    for s in students:
+        _set_lang_items(s, acad_year, rng=rng)
 
-    # generate and store the student's capability based on demographics and school adjustment
+    # generate and store the students' capability based on demographics and school adjustment
     adj = hier_config.SCHOOL_TYPES[school.type_str]['students'].get('adjust_pld', 0.0)
+    demographics = [_level_demographics(s) for s in students]
     for subject_code in subject_codes:
-        # hack to make performance in EL-related subjects reflect student's english-learner status
-        subject_adj = adj
-        if get_el_adjacent(subject_code) and s.elas == 'EL' and cfg.LEP_PROFICIENCY_LEVELS.index(s.lang_prof_level) < 3:
-            subject_adj += 0.4 * (cfg.LEP_PROFICIENCY_LEVELS.index(s.lang_prof_level) - 3)
-        generator, demo = _get_level_demographics(s, subject_code)
-        s.capability[subject_code] = random_capability(generator.distribution(demo), subject_adj)
+        el_adjacent = get_el_adjacent(subject_code)
+        generator = _level_generator(grade, subject_code)
+        for s, demo in zip(students, demographics):
+            # hack to make performance in EL-related subjects reflect student's english-learner status
+            subject_adj = adj
+            if el_adjacent and s.elas == 'EL' and cfg.LEP_PROFICIENCY_LEVELS.index(s.lang_prof_level) < 3:
+                subject_adj += 0.4 * (cfg.LEP_PROFICIENCY_LEVELS.index(s.lang_prof_level) - 3)
+            s.capability[subject_code] = generator.random_capability(demo, subject_adj, rng)
 
-    return s
+    return students
 
 
 def advance_student(student: Student, schools_by_grade, hold_back_rate=pop_config.STUDENT_HOLD_BACK_RATE,
-                    drop_out_rate=pop_config.STUDENT_DROP_OUT_RATE, transfer_rate=pop_config.STUDENT_TRANSFER_RATE):
+                    drop_out_rate=pop_config.STUDENT_DROP_OUT_RATE, transfer_rate=pop_config.STUDENT_TRANSFER_RATE,
+                    rng=random):
     """Take a student and advance them to the next grade. If the next grade takes the student out of the current school,
     pick a new school for them to go to. Should that new grade not be available in any school, the student will be
     marked to drop out of the system.
@@ -172,6 +236,7 @@ def advance_student(student: Student, schools_by_grade, hold_back_rate=pop_confi
     :param drop_out_rate: The rate that a student will drop out at if they are not advanced
     :param transfer_rate: The rate at which a student will transfer to a new school without being forced to by grade
                           boundaries
+    :param rng: random number generator
     :returns: True if the student still exists in the system, False if they do not
     """
 
@@ -180,13 +245,13 @@ def advance_student(student: Student, schools_by_grade, hold_back_rate=pop_confi
     student.transfer = False
 
     # Now check if this student should be advanced
-    if random.random() < hold_back_rate:
+    if rng.random() < hold_back_rate:
         # The student is not being advanced
         # Decide if the student should drop out and make sure the student's grade is valid
         #   If the student's grade is not valid, we could accidentally return True
         #   Return False to indicate the student is dropped out
         student.held_back = True
-        if random.random() < drop_out_rate:
+        if rng.random() < drop_out_rate:
             # The student is being dropped out, so make them go away
             return False
         else:
@@ -204,12 +269,12 @@ def advance_student(student: Student, schools_by_grade, hold_back_rate=pop_confi
     adjustments = []
 
     # If the new grade of the student is not available in the school, pick a new school
-    if student.grade not in student.school.grades or random.random() < transfer_rate:
+    if student.grade not in student.school.grades or rng.random() < transfer_rate:
         student.transfer = True
         # apply capability adjustments by undoing old school and applying new school
         adjustments.append(
             inverse_adjustment(hier_config.SCHOOL_TYPES[student.school.type_str]['students'].get('adjust_pld', 0.0)))
-        student.school = random.choice(schools_by_grade[student.grade])
+        student.school = rng.choice(schools_by_grade[student.grade])
         adjustments.append(hier_config.SCHOOL_TYPES[student.school.type_str]['students'].get('adjust_pld', 0.0))
 
     # SmarterBalanced wants to see students get better so apply a small adjustment each time they advance
@@ -219,90 +284,58 @@ def advance_student(student: Student, schools_by_grade, hold_back_rate=pop_confi
     return True
 
 
-def determine_demo_option_selected(sub_config):
+def determine_demo_option_selected(sub_config, rng=random):
     """Decide if a boolean characteristic is selected (is true).
 
     :param sub_config: A dictionary for a single boolean characteristic
+    :param rng: random number generator
     :returns: If the characteristic is selected
     """
-    rand_val = random.random()
+    rand_val = rng.random()
     if rand_val < sub_config['perc']:
         return True
     return False
 
 
-def _determine_student_dob(grade, acad_year=datetime.datetime.now().year):
-    """Generates an appropriate date of birth given the student's current grade
+def _demo_sampler(sub_config) -> AliasSampler:
+    """Get the sampler of a multi-select demographic characteristic, compiled the first time.
 
-    :param grade: The current grade of the student
-    :param acad_year: The current academic year this student is being created for (optional, defaults to your machine
-                      clock's current year)
-    :return: A string representation of the student's date of birth
+    :param sub_config: A dictionary for a single multi-select characteristic
+    :returns: Sampler choosing a value for the characteristic
     """
-    approx_age = grade + 6
-    birth_year = acad_year - approx_age
-
-    if calendar.isleap(birth_year):
-        bday_offset = random.randint(0, 365)
-    else:
-        bday_offset = random.randint(0, 364)
+    # the configs are constants, so each is compiled once; the entry keeps the config so its id isn't reused
+    entry = _demo_samplers.get(id(sub_config))
+    if entry is None or entry[0] is not sub_config:
+        entry = _demo_samplers[id(sub_config)] = (sub_config, AliasSampler({name: obj['perc']
+                                                                            for name, obj in sub_config.items()}))
+    return entry[1]
 
-    # construct a birth date as an offset from January 1st
-    return datetime.date(birth_year, 1, 1) + datetime.timedelta(days=bday_offset)
 
-
-def _determine_demographics(config):
-    """Determine the demographic characteristics for a student based on the configuration dictionary.
-
-    :param config: Demographics configuration dictionary to use
-    :returns: A tuple of characteristics
+def _level_generator(grade, subject_code) -> RandomLevelByDemographics:
     """
-    # Determine characteristics
-    gender = _pick_demo_option(config['gender'])
-    ethnicity = _pick_demo_option(config['ethnicity'])
-    iep = determine_demo_option_selected(config['iep'])
-    sec504 = determine_demo_option_selected(config['504'])
-    lep = determine_demo_option_selected(config['lep'])
-    ed = determine_demo_option_selected(config['econ_dis'])
-
-    # Pick more ethnicities if needed
-    if ethnicity == 'multi':
-        eth1 = 'multi'
-        eth2 = 'multi'
-        while eth1 == 'multi' or eth2 == 'multi':
-            eth1 = _pick_demo_option(config['ethnicity']) if eth1 == 'multi' else eth1
-            eth2 = _pick_demo_option(config['ethnicity']) if eth2 == 'multi' else eth2
-        ethnicities = ['multi', eth1, eth2]
-    else:
-        ethnicities = [ethnicity]
-
-    # Return the characteristics
-    return gender, ethnicities, iep, sec504, lep, ed
-
+    Get the assessment stats generator of a grade and subject (one per grade and subject family, kept with the
+    distributions it has computed). It is used with the student properties of _level_demographics.
 
-def _pick_demo_option(sub_config):
-    """Pick a single demographic characteristic from a dict of options.
-
-    :param sub_config: A dictionary for a single multi-select characteristic
-    :returns: Selected value for characteristic
+    :param grade: grade
+    :param subject_code: subject code
+    :return: RandomLevelByDemographics
     """
-    return weighted_choice({name: obj['perc'] for name, obj in sub_config.items()})
+    # hack for custom subjects
+    subject_family = 'ELA' if get_el_adjacent(subject_code) else 'Math'
+    level_generator = _level_generators.get((grade, subject_family))
+    if level_generator is None:
+        level_generator = _level_generators[(grade, subject_family)] = RandomLevelByDemographics(
+            cfg.DEMOGRAPHICS_BY_GRADE[grade], cfg.LEVELS_BY_GRADE_BY_SUBJ[subject_family][grade])
+    return level_generator
 
 
-def _get_level_demographics(student: Student, subject_code):
+def _level_demographics(student: Student) -> Properties:
     """
-    Creates the assessment stats generator and corresponding student demographics.
-    They can be used to make calls in RandomLevelByDemographics like random_level and distribution
+    Get the student properties used by RandomLevelByDemographics, e.g. for distribution
 
     :param student: student
-    :param subject_code: subject code
-    :return: RandomLevelByDemographics and student properties
+    :return: student properties
     """
-    demographics = cfg.DEMOGRAPHICS_BY_GRADE[student.grade]
-    # hack for custom subjects
-    level_breakdowns = cfg.LEVELS_BY_GRADE_BY_SUBJ['ELA' if get_el_adjacent(subject_code) else 'Math'][student.grade]
-    level_generator = RandomLevelByDemographics(demographics, level_breakdowns)
-
     student_race = ('dmg_eth_2mr' if student.eth_multi else
                     'dmg_eth_ami' if student.eth_amer_ind else
                     'dmg_eth_asn' if student.eth_asian else
@@ -320,12 +353,12 @@ def _get_level_demographics(student: Student, subject_code):
                                       gender=student.gender,
                                       race=student_race)
 
-    return level_generator, student_demographics
+    return student_demographics
 
 
 def repopulate_school_grade(school: School, grade, grade_students, id_gen, reg_sys,
                             acad_year, subject_codes: [str],
-                            additional_student_choice=pop_config.REPOPULATE_ADDITIONAL_STUDENTS):
+                            additional_student_choice=pop_config.REPOPULATE_ADDITIONAL_STUDENTS, rng=random):
     """
     Take a school grade and make sure it has enough students. The list of students is updated in-place.
 
@@ -338,25 +371,28 @@ def repopulate_school_grade(school: School, grade, grade_students, id_gen, reg_s
                       machine clock's current year)
     @param subject_codes: List of subject codes (for generating new student capabilities); defaults to cfg.SUBJECTS
     @param additional_student_choice: Array of values for additional students to create in the grade
+    @param rng: random number generator
     """
     # Calculate a new theoretically student count
     if school.student_count_min < school.student_count_max:
-        student_count = int(random.triangular(school.student_count_min, school.student_count_max,
-                                              school.student_count_avg))
+        student_count = int(rng.triangular(school.student_count_min, school.student_count_max,
+                                           school.student_count_avg))
     else:
         student_count = school.student_count_min
 
     # Add in additional students
-    student_count = student_count + random.choice(additional_student_choice)
+    student_count = student_count + rng.choice(additional_student_choice)
 
     # Re-fill grade to this new student count
-    while len(grade_students) < student_count:
-        s = generate_student(school, grade, id_gen, acad_year, subject_codes)
-        s.reg_sys = reg_sys
-        grade_students.append(s)
+    if len(grade_students) < student_count:
+        students = generate_students(school, grade, student_count - len(grade_students), id_gen, acad_year,
+                                     subject_codes, rng=rng)
+        for s in students:
+            s.reg_sys = reg_sys
+        grade_students.extend(students)
 
 
-def assign_student_groups(school, grade, grade_students, id_gen: IDGen, subject_codes: [str]):
+def assign_student_groups(school, grade, grade_students, id_gen: IDGen, subject_codes: [str], rng=random):
     """
     Assign students to groups.
     Each student is assigned to one group per subject. The groups assigned correspond
@@ -369,6 +405,7 @@ def assign_student_groups(school, grade, grade_students, id_gen: IDGen, subject_
     @param grade_students: The students currently in the grade for this school
     @param id_gen: The IDGen instance, used to make groups unique across multiple schools
     @param subject_codes: The list of subject codes
+    @param rng: random number generator
     """
     num_groups = int(ceil(len(grade_students) / school.group_size))
     for subject_code in subject_codes:
@@ -380,26 +417,10 @@ def assign_student_groups(school, grade, grade_students, id_gen: IDGen, subject_
             subgroups.append((group_id, group_name))
         # assign each student a (randomly selected) group for this subject
         for grade_student in grade_students:
-            (group_id, group_name) = random.choice(subgroups)
+            (group_id, group_name) = rng.choice(subgroups)
             grade_student.set_group(StudentGroup(subject_code, group_id, group_name))
 
 
-def _generate_date_enter_us_school(grade, acad_year=datetime.datetime.now().year):
-    """
-    Generates an appropriate date of when a student would have entered a US school, assuming all students entered
-    school in grade K.
-
-    @param grade: the current grade of the student
-    @param acad_year: The current academic year to use to create the date (optional, defaults to your machine clock's
-                      current year)
-    @return: a date object that represents the student's entry date
-    """
-    entry_year = acad_year - grade - 1
-    entry_month = random.randint(8, 9)
-    entry_day = random.randint(15, 31) if entry_month == 8 else random.randint(1, 15)
-    return datetime.date(entry_year, entry_month, entry_day)
-
-
 def _generate_derived_demographic(student):
     """
     Generate the derived demographic value for a student.
@@ -438,7 +459,8 @@ def _set_lang_items(student, acad_year=datetime.datetime.now().year,
                     lep_proficiency_levels=cfg.LEP_PROFICIENCY_LEVELS,
                     lep_proficiency_levels_exit=cfg.LEP_PROFICIENCY_LEVELS_EXIT,
                     lep_title_3_programs=cfg.LEP_TITLE_3_PROGRAMS,
-                    ifep_rate=pop_config.IFEP_RATE):
+                    ifep_rate=pop_config.IFEP_RATE,
+                    rng=random):
     """
     Set the language values for a student.
 
@@ -451,20 +473,21 @@ def _set_lang_items(student, acad_year=datetime.datetime.now().year,
     @param lep_proficiency_levels_exit: Proficiency levels that are good enough for the student to have exited LEP
     @param lep_title_3_programs: Title 3 programs that can be assigned to an LEP student
     @param ifep_rate: IFEP rate
+    @param rng: random number generator
     """
     if student.prg_lep:
         # Pick a random non-English language
-        student.lang_code = random.choice(lep_language_codes)
-        student.lang_prof_level = random.choice(lep_proficiency_levels)
-        student.lang_title_3_prg = random.choice(lep_title_3_programs)
+        student.lang_code = rng.choice(lep_language_codes)
+        student.lang_prof_level = rng.choice(lep_proficiency_levels)
+        student.lang_title_3_prg = rng.choice(lep_title_3_programs)
 
         # Decide if to set entry date for LEP
-        if random.random() < lep_has_entry_date_rate:
-            student.prg_lep_entry_date = _generate_date_lep_entry(student.grade, acad_year)
+        if rng.random() < lep_has_entry_date_rate:
+            student.prg_lep_entry_date = _generate_date_lep_entry(student.grade, acad_year, rng)
 
         # Set an exit date if the proficiency level is good enough
         if student.lang_prof_level in lep_proficiency_levels_exit:
-            student.prg_lep_exit_date = _generate_date_lep_exit(student.grade, acad_year)
+            student.prg_lep_exit_date = _generate_date_lep_exit(student.grade, acad_year, rng)
             student.lang_title_3_prg = None
             student.elas = 'RFEP'
             student.elas_start_date = student.prg_lep_exit_date
@@ -474,39 +497,41 @@ def _set_lang_items(student, acad_year=datetime.datetime.now().year,
     else:
         # rarely set lang_code to not english, proficiency "very good", and ELAS to "IFEP"
         # IFEP = student tested out of, and never entered LEP/ELAS
-        if random.random() < ifep_rate:
-            student.lang_code = random.choice(lep_language_codes)
-            student.lang_prof_level = random.choice(lep_proficiency_levels_exit)
+        if rng.random() < ifep_rate:
+            student.lang_code = rng.choice(lep_language_codes)
+            student.lang_prof_level = rng.choice(lep_proficiency_levels_exit)
             student.elas = 'IFEP'
         else:
             student.elas = 'EO'
 
 
-def _generate_date_lep_entry(grade, acad_year=datetime.datetime.now().year):
+def _generate_date_lep_entry(grade, acad_year=datetime.datetime.now().year, rng=random):
     """
     Generates an appropriate date of when a student would have been designated as LEP
 
     @param grade: the current grade of the student
+    @param rng: random number generator
     @return: a date object that represents the student's entry date
     """
-    entry_year = acad_year - (grade if grade < 5 else random.randint(4, grade))
-    entry_month = random.randint(8, 9)
-    entry_day = random.randint(15, 31) if entry_month == 8 else random.randint(1, 15)
+    entry_year = acad_year - (grade if grade < 5 else rng.randint(4, grade))
+    entry_month = rng.randint(8, 9)
+    entry_day = rng.randint(15, 31) if entry_month == 8 else rng.randint(1, 15)
     return datetime.date(entry_year, entry_month, entry_day)
 
 
-def _generate_date_lep_exit(grade, acad_year=datetime.datetime.now().year):
+def _generate_date_lep_exit(grade, acad_year=datetime.datetime.now().year, rng=random):
     """
     Generates an appropriate date of when a student would have been promoted from LEP status
 
     @param grade: the current grade of the student
     @param acad_year: The current academic year to use to create the date (optional, defaults to your machine clock's
                       current year)
+    @param rng: random number generator
     @return: a date object that represents the student's exit date
     """
     entry_year = acad_year - (3 if grade > 3 else 1)
-    entry_month = random.randint(3, 6)
-    entry_day = random.randint(1, 30)
+    entry_month = rng.randint(3, 6)
+    entry_day = rng.randint(1, 30)
     return datetime.date(entry_year, entry_month, entry_day)
 
 
@@ -12,38 +12,39 @@ WORDS = ("adipisci aliquam amet consectetur dolor dolore dolorem eius est et"
 
 
 class RandomText():
-    def __init__(self):
+    def __init__(self, rng=random):
+        self.rng = rng
         self.words = WORDS
         self.sentence_word_range = (4, 12)
         self.paragraph_sentence_range = (3, 8)
         self.text_paragraph_range = (2, 5)
 
     def word(self):
-        w = random.choice(self.words)
+        w = self.rng.choice(self.words)
         return w
 
     def sentence(self, number_words=None):
         if not number_words:
-            number_words = random.randint(*self.sentence_word_range)
+            number_words = self.rng.randint(*self.sentence_word_range)
         s = ' '.join(self.word() for _ in range(number_words))
         return s[0].upper() + s[1:] + '.'
 
     def paragraph(self, number_sentences=None):
         if not number_sentences:
-            number_sentences = random.randint(*self.paragraph_sentence_range)
+            number_sentences = self.rng.randint(*self.paragraph_sentence_range)
         p = ' '.join(self.sentence() for _ in range(number_sentences))
         return p
 
     def text(self, number_paragraphs=None):
         if not number_paragraphs:
-            number_paragraphs = random.randint(*self.text_paragraph_range)
+            number_paragraphs = self.rng.randint(*self.text_paragraph_range)
         t = '\n\n'.join(self.paragraph() for _ in range(number_paragraphs))
         return t
 
 
-def sentence():
-    return RandomText().sentence()
+def sentence(rng=random):
+    return RandomText(rng).sentence()
 
 
-def paragraph():
-    return RandomText().paragraph()
+def paragraph(rng=random):
+    return RandomText(rng).paragraph()
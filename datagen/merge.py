@@ -0,0 +1,154 @@
+"""
+Merge the output of sharded data generation runs (--shard i/N) into a single output tree.
+
+The outcome files of the shards don't overlap (each district belongs to a single shard) so they are
+simply copied. The files describing the run, organizations.json, hierarchy.csv and args.txt, are
+combined in shard order, as are the SQLite databases (--sqlite_out).
+
+"""
+
+import argparse
+import os
+import re
+import shutil
+
+from datagen.outputworkers.sqlite_worker import DB_FILE, merge_databases
+from datagen.util.hierarchy import read_hierarchy, write_hierarchy
+from datagen.writers.organizations_writer import OrganizationsWriter
+
+MERGED_FILES = ('organizations.json', 'hierarchy.csv', 'args.txt', DB_FILE)
+
+
+def shard_of(shard_dir: str) -> (int, int):
+    """
+    Get the shard (index and count) of a shard output directory from its args.txt.
+
+    :param shard_dir: shard output directory
+    :return: tuple of shard index and number of shards, (0, 1) if the run wasn't sharded
+    """
+    file = os.path.join(shard_dir, 'args.txt')
+    if not os.path.isfile(file):
+        raise ValueError('No args.txt in {}, is it a data generator output directory?'.format(shard_dir))
+    with open(file) as f:
+        shards = re.findall(r'--shard (\d+)/(\d+)', f.read())
+    return (int(shards[-1][0]), int(shards[-1][1])) if shards else (0, 1)
+
+
+def order_shards(shard_dirs: [str]) -> [str]:
+    """
+    Sort shard output directories by shard index, making sure they are all part of the same set of shards.
+
+    :param shard_dirs: shard output directories
+    :return: sorted shard output directories
+    """
+    shards = {}
+    count = None
+    for shard_dir in shard_dirs:
+        shard, shards_count = shard_of(shard_dir)
+        if count is not None and shards_count != count:
+            raise ValueError('{} is shard {}/{}, expected a shard of {}'.format(shard_dir, shard, shards_count, count))
+        if shard in shards:
+            raise ValueError('{} and {} are both shard {}'.format(shards[shard], shard_dir, shard))
+        count = shards_count
+        shards[shard] = shard_dir
+
+    missing = [str(i) for i in range(count or 0) if i not in shards]
+    if missing:
+        print('Warning: missing shard(s) {} of {}'.format(', '.join(missing), count))
+
+    return [shards[shard] for shard in sorted(shards)]
+
+
+def merge_organizations(files: [str], out_file: str):
+    """
+    Combine organizations.json files, keeping the order of the districts and institutions.
+
+    :param files: organizations.json files to combine
+    :param out_file: combined organizations.json file
+    """
+    organizations = OrganizationsWriter()
+    for file in files:
+        organizations.load(file)
+    organizations.write(out_file)
+
+
+def merge_hierarchies(files: [str], out_file: str):
+    """
+    Combine hierarchy.csv files. They must all be for the same state.
+
+    :param files: hierarchy.csv files to combine
+    :param out_file: combined hierarchy.csv file
+    """
+    state = None
+    schools = []
+    for file in files:
+        file_state, _, file_schools = read_hierarchy(file)
+        if state and file_state and (state.code, state.name) != (file_state.code, file_state.name):
+            raise ValueError('State mismatch, {} is for {} not {}'.format(file, file_state.name, state.name))
+        state = state or file_state
+        schools.extend(file_schools)
+
+    write_hierarchy(out_file, schools)
+
+
+def merge_args(files: [str], out_file: str):
+    """
+    Combine args.txt files, one line per run.
+
+    :param files: args.txt files to combine
+    :param out_file: combined args.txt file
+    """
+    lines = []
+    for file in files:
+        with open(file) as f:
+            lines.extend(line for line in f.read().splitlines() if line)
+
+    with open(out_file, 'w') as f:
+        f.writelines(line + '\n' for line in lines)
+
+
+def merge(shard_dirs: [str], out_dir: str):
+    """
+    Merge the output of sharded runs into a single output tree.
+    Each of the combined files is read completely before it is written, so the output directory
+    may be one of the shard directories.
+
+    :param shard_dirs: shard output directories
+    :param out_dir: output directory
+    """
+    shard_dirs = order_shards(shard_dirs)
+    os.makedirs(out_dir, exist_ok=True)
+
+    for shard_dir in shard_dirs:
+        if os.path.abspath(shard_dir) == os.path.abspath(out_dir):
+            continue
+        print('Copying {}'.format(shard_dir))
+        for name in os.listdir(shard_dir):
+            src = os.path.join(shard_dir, name)
+            if name in MERGED_FILES:
+                continue
+            if os.path.isdir(src):
+                shutil.copytree(src, os.path.join(out_dir, name), dirs_exist_ok=True)
+            else:
+                shutil.copy2(src, os.path.join(out_dir, name))
+
+    for name, merge_files in (('organizations.json', merge_organizations),
+                              ('hierarchy.csv', merge_hierarchies),
+                              ('args.txt', merge_args),
+                              (DB_FILE, merge_databases)):
+        files = [os.path.join(d, name) for d in shard_dirs if os.path.isfile(os.path.join(d, name))]
+        if files:
+            merge_files(files, os.path.join(out_dir, name))
+
+    print('Merged {} shards into {}'.format(len(shard_dirs), out_dir))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Merge the output of sharded SBAC data generation runs.',
+                                     epilog='Example arguments:' +
+                                            '\n  --out_dir out shard0 shard1 shard2 shard3')
+    parser.add_argument('-o', '--out_dir', dest='out_dir', action='store', default='out', help='Specify the root directory for the merged output')
+    parser.add_argument('shard_dirs', nargs='+', help='Output directories of the shards')
+
+    args = parser.parse_args()
+    merge(args.shard_dirs, args.out_dir)
@@ -62,4 +62,4 @@ class AssessmentOutcome:
         self.from_date = cfg.HIERARCHY_FROM_DATE
         self.to_date = cfg.HIERARCHY_TO_DATE
         self.accommodations = []    # list of (type, code, value), e.g. ('Calculator', 'TDS_Calc0', 'None')
-        self.item_data = []
+        self.item_data = []             # ItemResponses, if item data is generated
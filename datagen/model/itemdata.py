@@ -1,8 +1,15 @@
 """
 Model an item data generated for an assessment outcome.
 
+The item data of an outcome are kept in columns, ItemResponses, rather than an object for each item:
+an outcome with items has 50 to 130 of them, and an object (with a couple of datetimes) for each item
+of each outcome takes much more memory, and garbage collection time, than the values.
+
 """
 
+from array import array
+from datetime import timedelta
+
 
 class AssessmentOutcomeItemData:
     """
@@ -25,3 +32,113 @@ class AssessmentOutcomeItemData:
         self.score = None
         self.score_status = None
         self.sub_scores = None      # array of subscores: "Organization/Purpose", "Evidence/Elaboration", "Conventions"
+
+
+class ItemResponses:
+    """
+    The item data of an assessment outcome, a column for each value with a row for each item.
+    The values that are the same for every item are attributes of the class.
+    """
+
+    __slots__ = ('items', 'admin_date', 'page_times', 'response_offsets', 'scores', 'selected', 'response_values',
+                 'sub_scores')
+
+    number_visits = 1
+    page_number = 1
+    page_visits = 1
+    dropped = '0'
+    score_status = 'SCORED'
+
+    def __init__(self, items: list, admin_date):
+        """
+        :param items: the items of the assessment, in order; the rows are appended for them
+        :param admin_date: date and time the items were administered
+        """
+        self.items = items
+        self.admin_date = admin_date
+        self.page_times = array('l')            # milliseconds
+        self.response_offsets = array('q')      # milliseconds from admin_date to the response
+        self.scores = array('l')
+        self.selected = array('b')              # 1 if the student attempted an answer
+        self.response_values = []               # response text, the generated (or item's) string
+        self.sub_scores = {}                    # row -> sub-scores, for WER items only
+
+    def append(self, page_time: int, selected: bool, score: int, response_value: str, sub_scores=None):
+        """
+        Add the row of the next item, responded to right after the previous one.
+
+        :param page_time: time spent on the item, milliseconds
+        :param selected: True if the student attempted an answer
+        :param score: item score
+        :param response_value: response, None if there is none
+        :param sub_scores: sub-scores "Organization/Purpose", "Evidence/Elaboration", "Conventions", or None
+        """
+        row = len(self.page_times)
+        self.response_offsets.append((self.response_offsets[-1] if row else 0) + page_time)
+        self.page_times.append(page_time)
+        self.scores.append(score)
+        self.selected.append(1 if selected else 0)
+        self.response_values.append(response_value)
+        if sub_scores:
+            self.sub_scores[row] = sub_scores
+
+    def rows(self):
+        """
+        :return: iterator of (item, selected, page time, score, response value, sub-scores, response offset) of the
+                 items; sub-scores are None but for WER items, the response offset is as for response_date
+        """
+        return zip(self.items, self.selected, self.page_times, self.scores, self.response_values,
+                   map(self.sub_scores.get, range(len(self))), self.response_offsets)
+
+    def response_date(self, row: int):
+        """
+        :param row: row of an item, negative to count from the last
+        :return: date and time of the response to the item
+        """
+        return response_date(self.admin_date, self.response_offsets[row])
+
+    @property
+    def first_response_date(self):
+        return self.response_date(0)
+
+    @property
+    def last_response_date(self):
+        return self.response_date(-1)
+
+    def __len__(self):
+        return len(self.page_times)
+
+    def __getitem__(self, row: int) -> AssessmentOutcomeItemData:
+        """
+        Get the item data of a row as an object, a copy of its values.
+        """
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('Item data row {} is out of range'.format(row))
+        aid = AssessmentOutcomeItemData()
+        aid.item = self.items[row]
+        aid.admin_date = self.admin_date
+        aid.number_visits = self.number_visits
+        aid.page_number = self.page_number
+        aid.page_visits = self.page_visits
+        aid.page_time = self.page_times[row]
+        aid.dropped = self.dropped
+        aid.response_date = self.response_date(row)
+        aid.response_value = self.response_values[row]
+        aid.is_selected = '1' if self.selected[row] else '0'
+        aid.score = self.scores[row]
+        aid.score_status = self.score_status
+        aid.sub_scores = self.sub_scores.get(row)
+        return aid
+
+
+def response_date(admin_date, offset: int):
+    """
+    :param admin_date: date and time the items were administered
+    :param offset: milliseconds from the admin date to a response
+    :return: date and time of the response
+    """
+    # (seconds and microseconds are much quicker to make a timedelta of than milliseconds)
+    seconds, milliseconds = divmod(offset, 1000)
+    return admin_date + timedelta(0, seconds, milliseconds * 1000)
@@ -6,8 +6,20 @@ from datagen.model.studentgroup import StudentGroup
 
 class Student:
     """A student
+
+    The attributes are slots; a district's cohort can hold hundreds of thousands of students and an
+    instance dictionary for each of them takes more memory than the values.
     """
 
+    __slots__ = ('guid', 'school', 'grade', 'gender', 'first_name', 'middle_name', 'last_name', 'dob', 'email',
+                 'address_line_1', 'address_line_2', 'address_city', 'address_zip', 'eth_white', 'eth_black',
+                 'eth_hispanic', 'eth_asian', 'eth_filipino', 'eth_pacific', 'eth_amer_ind', 'eth_multi', 'eth_none',
+                 'prg_iep', 'prg_sec504', 'prg_lep', 'prg_econ_disad', 'held_back', 'transfer', 'id', 'external_ssid',
+                 'rec_id', 'state', 'district', 'reg_sys', 'school_entry_date', 'prg_migrant', 'prg_idea',
+                 'lang_code', 'lang_prof_level', 'lang_title_3_prg', 'prg_lep_entry_date', 'prg_lep_exit_date',
+                 'elas', 'elas_start_date', 'prg_primary_disability', 'military_connected', 'derived_demographic',
+                 'groups', 'capability')
+
     def __init__(self):
         self.guid = None
         self.school = None
@@ -60,6 +72,14 @@ class Student:
         self.groups = []
         self.capability = {}        # map of subject_code -> capability, 0.0 <= value < 4.0
 
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        # cohorts saved before the slots have the instance dictionary of the student, which is the same
+        for name, value in state.items():
+            setattr(self, name, value)
+
     @property
     def name(self):
         """The full name of student.
@@ -0,0 +1,258 @@
+"""
+An output worker writing flat CSV files that can be bulk loaded into a database (COPY / LOAD DATA).
+
+The schools, with their districts, are written to hierarchy.csv (as by the XML worker). Each district and year
+has its own set of files in the district's directory, STATE/DISTRICT:
+ * students.<year>.csv - the students first seen in the year, with their demographics
+ * registrations.<year>.csv - the students registered in the year, with their school and grade
+ * outcomes.<year>.csv - the assessment outcomes
+ * scores.<year>.csv - the scores of the outcomes (overall, alt, claim, trait and target)
+ * item_responses.<year>.csv - the item responses of the outcomes
+
+The rows are keyed by record ids: students by student_rec_id (which is assigned again every year, so the
+students file also has student_guid, the same every year), outcomes by outcome_rec_id. Like the XML, only
+the outcomes that are still active are written and summative outcomes don't include item response values.
+
+A district and year is written by a single process, and its files are created the first time they are
+written in a run, so a resumed run that regenerates the year replaces them. Booleans are written as 1/0,
+missing values as empty fields. The district files can be compressed (hierarchy.csv, read by datagen.merge,
+is not).
+
+"""
+
+import csv
+import os
+
+from datagen.model.assessmentoutcome import AssessmentOutcome
+from datagen.model.institutionhierarchy import InstitutionHierarchy
+from datagen.model.itemdata import response_date
+from datagen.model.student import Student
+from datagen.outputworkers.worker import Worker
+from datagen.util.hierarchy import write_hierarchy
+from datagen.writers.compressed_writer import Compressor
+
+STUDENT_FIELDS = (
+    'student_rec_id', 'student_guid', 'ssid', 'external_ssid', 'state_code', 'district_id', 'school_id', 'grade',
+    'first_name', 'middle_name', 'last_name', 'gender', 'dob', 'eth_hispanic', 'eth_amer_ind', 'eth_asian',
+    'eth_filipino', 'eth_black', 'eth_white', 'eth_pacific', 'eth_multi', 'prg_iep', 'prg_lep', 'prg_lep_entry_date',
+    'prg_lep_exit_date', 'prg_sec504', 'prg_econ_disad', 'prg_migrant', 'lang_code', 'lang_prof_level', 'elas',
+    'elas_start_date', 'military_connected')
+
+REGISTRATION_FIELDS = ('reg_sys_guid', 'academic_year', 'student_rec_id', 'student_guid', 'ssid', 'state_code',
+                       'district_id', 'school_id', 'grade', 'held_back', 'transfer')
+
+OUTCOME_FIELDS = (
+    'outcome_rec_id', 'outcome_guid', 'student_rec_id', 'asmt_guid', 'asmt_id', 'asmt_type', 'subject', 'asmt_grade',
+    'academic_year', 'state_code', 'district_id', 'school_id', 'student_grade', 'date_taken', 'start_date',
+    'status_date', 'submit_date', 'session_id', 'admin_condition', 'completeness', 'score', 'score_stderr',
+    'score_perf_lvl', 'item_count')
+
+SCORE_FIELDS = ('outcome_rec_id', 'score_type', 'code', 'score', 'stderr', 'perf_lvl', 'condition_code',
+                'student_residual', 'standard_met_residual')
+
+ITEM_RESPONSE_FIELDS = (
+    'outcome_rec_id', 'bank_key', 'item_key', 'position', 'segment_id', 'format', 'operational', 'is_selected',
+    'admin_date', 'number_visits', 'page_number', 'page_visits', 'page_time', 'dropped', 'score', 'score_status',
+    'sub_scores', 'response_date', 'response_value')
+
+# file name (without the year) -> header
+FILES = {
+    'students': STUDENT_FIELDS,
+    'registrations': REGISTRATION_FIELDS,
+    'outcomes': OUTCOME_FIELDS,
+    'scores': SCORE_FIELDS,
+    'item_responses': ITEM_RESPONSE_FIELDS,
+}
+
+# an item response row, after the outcome_rec_id and item columns; ends with the csv writer's line terminator
+ITEM_RESPONSE_ROW = '{},{},{},{},{},{},{},{},{},{},{},{},{},{}\r\n'
+
+BUFFER_SIZE = 1024 * 1024
+
+
+class CsvWorker(Worker):
+    def __init__(self, out_path_root, compress=None, compress_level=None):
+        """
+        :param out_path_root: output directory
+        :param compress: None, or one of COMPRESSIONS to compress the district files (on a separate thread)
+        :param compress_level: compression level, None for the default of the compression
+        """
+        self.out_path_root = out_path_root
+        self._compressor = Compressor(compress, compress_level) if compress else None
+
+        # the open files of the current district, (name, year) -> (file, csv writer), and the files
+        # (path) already created in this run, which are appended to if written again
+        self._district = None
+        self._files = {}
+        self._created = set()
+
+        # the item columns of an item response row (bank_key to operational), by item
+        self._item_columns = {}
+
+    def cleanup(self):
+        self.flush()
+        if self._compressor:
+            self._compressor.close()
+
+    def flush(self):
+        for file, _ in self._files.values():
+            file.close()
+        self._files = {}
+        self._district = None
+        if self._compressor:
+            self._compressor.wait()
+
+    def write_hierarchies(self, hierarchies: [InstitutionHierarchy]):
+        write_hierarchy(os.path.join(self.out_path_root, 'hierarchy.csv'), [ih.school for ih in hierarchies])
+
+    def write_students_dim(self, students: [Student]):
+        for student in students:
+            self._writer(student.school.district, 'students', student.reg_sys.academic_year).writerow((
+                student.rec_id, student.guid, student.id, student.external_ssid, student.state.code,
+                student.school.district.id, student.school.id, student.grade, student.first_name,
+                student.middle_name, student.last_name, student.gender, _date(student.dob),
+                _flag(student.eth_hispanic), _flag(student.eth_amer_ind), _flag(student.eth_asian),
+                _flag(student.eth_filipino), _flag(student.eth_black), _flag(student.eth_white),
+                _flag(student.eth_pacific), _flag(student.eth_multi), _flag(student.prg_iep), _flag(student.prg_lep),
+                _date(student.prg_lep_entry_date), _date(student.prg_lep_exit_date), _flag(student.prg_sec504),
+                _flag(student.prg_econ_disad), _flag(student.prg_migrant), student.lang_code,
+                student.lang_prof_level, student.elas, _date(student.elas_start_date), student.military_connected))
+
+    def write_students_reg(self, students: [Student], rs_guid, asmt_year):
+        for student in students:
+            self._writer(student.school.district, 'registrations', asmt_year).writerow((
+                rs_guid, asmt_year, student.rec_id, student.guid, student.id, student.state.code,
+                student.school.district.id, student.school.id, student.grade, _flag(student.held_back),
+                _flag(student.transfer)))
+
+    def write_iab_outcome(self, results: [AssessmentOutcome], assessment_guid):
+        for result in results:
+            self.write_outcome(result)
+
+    def write_assessment_outcome(self, results: [AssessmentOutcome], assessment_guid, state_code, district_id):
+        for result in results:
+            self.write_outcome(result)
+
+    def write_outcome(self, outcome: AssessmentOutcome):
+        # skip inactive or deleted outcomes
+        if outcome.result_status != 'C':
+            return
+
+        asmt = outcome.assessment
+        district = outcome.school.district
+        overall = outcome.overall
+        self._writer(district, 'outcomes', asmt.year).writerow((
+            outcome.rec_id, outcome.guid, outcome.student.rec_id, asmt.guid, asmt.id, asmt.type, asmt.subject.code,
+            asmt.grade, asmt.year, district.state.code, district.id, outcome.school.id, outcome.student.grade,
+            _date(outcome.date_taken), _date(outcome.start_date), _date(outcome.status_date),
+            _date(outcome.submit_date), outcome.session, outcome.admin_condition, outcome.completeness,
+            overall.score, overall.stderr, overall.perf_lvl, len(outcome.item_data)))
+
+        scores = self._writer(district, 'scores', asmt.year)
+        rows = [(outcome.rec_id, 'overall', overall.code, overall.score, overall.stderr, overall.perf_lvl,
+                 overall.condition_code, None, None)]
+        # alt and claim scores are in the XML only for summative and ICA outcomes
+        if not asmt.is_iab():
+            for score_type, score_list in (('alt', outcome.alt_scores), ('claim', outcome.claim_scores)):
+                rows.extend((outcome.rec_id, score_type, score.code, score.score, score.stderr, score.perf_lvl,
+                             score.condition_code, None, None) for score in score_list or ())
+        rows.extend((outcome.rec_id, 'trait', score.code, score.score, None, None, score.condition_code, None, None)
+                    for score in outcome.trait_scores or ())
+        rows.extend((outcome.rec_id, 'target', score.id, None, None, None, None, score.student_residual,
+                     score.standard_met_residual) for score in outcome.target_scores or ())
+        scores.writerows(rows)
+
+        if outcome.item_data:
+            # the item responses are most of the data, so their rows are formatted here rather than by the csv
+            # writer (which is slow to check long response values for quoting), with the item columns cached
+            # summative results should not have item response included (business policy)
+            response = not asmt.is_summative()
+            item_columns = self._item_columns
+            responses = outcome.item_data
+            admin_date = responses.admin_date.isoformat()
+            dropped, score_status = _text(responses.dropped), _text(responses.score_status)
+            lines = []
+            for item, selected, page_time, score, response_value, sub_scores, offset in responses.rows():
+                columns = item_columns.get(item)
+                if columns is None:
+                    columns = item_columns[item] = ','.join(_text(value) for value in (
+                        item.bank_key, item.item_key, str(item.position), item.segment_id, item.type, item.operational))
+                lines.append(ITEM_RESPONSE_ROW.format(
+                    outcome.rec_id, columns, '1' if selected else '0', admin_date,
+                    responses.number_visits, responses.page_number, responses.page_visits, page_time,
+                    dropped, score, score_status,
+                    ';'.join(map(str, sub_scores)) if sub_scores else '',
+                    response_date(responses.admin_date, offset).isoformat() if response else '',
+                    _text(response_value) if response else ''))
+            self._file(district, 'item_responses', asmt.year).write(''.join(lines))
+
+    def _writer(self, district, name: str, year: int):
+        """
+        Get the CSV writer of a file of a district and year, see _open.
+
+        :return: CSV writer
+        """
+        return self._open(district, name, year)[1]
+
+    def _file(self, district, name: str, year: int):
+        """
+        Get a file of a district and year, see _open.
+
+        :return: file
+        """
+        return self._open(district, name, year)[0]
+
+    def _open(self, district, name: str, year: int):
+        """
+        Get a file of a district and year, and its CSV writer, opening the file the first time.
+        The files of the previous district are closed when a new district is written.
+
+        :param district: district
+        :param name: file name, one of FILES
+        :param year: academic year
+        :return: tuple of (file, CSV writer)
+        """
+        if district is not self._district:
+            self.flush()
+            self._district = district
+        entry = self._files.get((name, year))
+        if entry is None:
+            path = os.path.join(self.out_path_root, district.state.code, district.id, '{}.{}.csv'.format(name, year))
+            if path in self._created:
+                file = self.__open_file(path, 'a')
+                writer = csv.writer(file)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                file = self.__open_file(path, 'w')
+                writer = csv.writer(file)
+                writer.writerow(FILES[name])
+                self._created.add(path)
+            entry = self._files[(name, year)] = (file, writer)
+        return entry
+
+    def __open_file(self, path, mode):
+        if self._compressor:
+            return self._compressor.open(path, mode, newline='')
+        return open(path, mode, newline='', buffering=BUFFER_SIZE)
+
+
+def _flag(value):
+    return None if value is None else int(bool(value))
+
+
+def _date(value):
+    return None if value is None else value.isoformat()
+
+
+def _text(value):
+    """
+    Format a text column as the csv writer would: quoted if it contains a delimiter, quote or line break.
+
+    :param value: text, or None
+    :return: column
+    """
+    if value is None:
+        return ''
+    if ',' in value or '"' in value or '\n' in value or '\r' in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
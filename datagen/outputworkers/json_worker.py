@@ -0,0 +1,257 @@
+"""
+An output worker writing the assessment outcomes as JSON, one document per line (NDJSON).
+
+Each school and year has a file in the district's directory, STATE/DISTRICT/<school id>.<year>.ndjson, with a
+line for each outcome. A document has the content of the TRT XML of the outcome, with the same names:
+ * test - the Test attributes
+ * examinee - the Examinee key and contextDate, and its attributes and relationships by name
+ * opportunity - the Opportunity attributes, with its segment, accommodations, scores and items; an item
+   has its response and, for a WER item, its scoreInfo (with subScores)
+
+Numbers (keys, counts, scores, positions, ...) are written as numbers, missing values as null. Like the XML,
+only the outcomes that are still active are written, empty examinee values are left out and summative outcomes
+don't include item responses.
+
+The documents are serialized by orjson if it is installed, by json otherwise (the same documents, orjson is
+several times faster). The files of a district are kept open, with large buffers, until the district is done.
+A district and year is written by a single process, and its files are created the first time they are written
+in a run, so a resumed run that regenerates the year replaces them. The files can be compressed.
+
+"""
+
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from datagen.model.assessmentoutcome import AssessmentOutcome
+from datagen.model.itemdata import response_date
+from datagen.outputworkers import trt_template as trt
+from datagen.outputworkers.worker import Worker
+from datagen.writers.compressed_writer import Compressor
+
+BUFFER_SIZE = 1024 * 1024
+
+SUB_SCORE_DIMENSIONS = ('Organization/Purpose', 'Evidence/Elaboration', 'Conventions')
+
+
+class JsonWorker(Worker):
+    def __init__(self, out_path_root, compress=None, compress_level=None):
+        """
+        :param out_path_root: output directory
+        :param compress: None, or one of COMPRESSIONS to compress the files (on a separate thread)
+        :param compress_level: compression level, None for the default of the compression
+        """
+        self.out_path_root = out_path_root
+        self._compressor = Compressor(compress, compress_level) if compress else None
+        self._dumps = orjson.dumps if orjson else _json_dumps
+
+        # the open files of the current district, (school id, year) -> file, and the files (path) already
+        # created in this run, which are appended to if written again
+        self._district = None
+        self._files = {}
+        self._created = set()
+
+    def cleanup(self):
+        self.flush()
+        if self._compressor:
+            self._compressor.close()
+
+    def flush(self):
+        for file in self._files.values():
+            file.close()
+        self._files = {}
+        self._district = None
+        if self._compressor:
+            self._compressor.wait()
+
+    def write_iab_outcome(self, results: [AssessmentOutcome], assessment_guid):
+        for result in results:
+            self.write_outcome(result)
+
+    def write_assessment_outcome(self, results: [AssessmentOutcome], assessment_guid, state_code, district_id):
+        for result in results:
+            self.write_outcome(result)
+
+    def write_outcome(self, outcome: AssessmentOutcome):
+        # skip inactive or deleted outcomes
+        if outcome.result_status != 'C':
+            return
+
+        self._file(outcome.school, outcome.assessment.year).write(self._dumps(outcome_document(outcome)) + b'\n')
+
+    def _file(self, school, year: int):
+        """
+        Get the file of a school and year, opening it the first time.
+        The files of the previous district are closed when a new district is written.
+
+        :param school: school
+        :param year: academic year
+        :return: binary file
+        """
+        if school.district is not self._district:
+            self.flush()
+            self._district = school.district
+        file = self._files.get((school.id, year))
+        if file is None:
+            path = os.path.join(self.out_path_root, school.district.state.code, school.district.id,
+                                '{}.{}.ndjson'.format(school.id, year))
+            if path in self._created:
+                file = self.__open_file(path, 'ab')
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                file = self.__open_file(path, 'wb')
+                self._created.add(path)
+            self._files[(school.id, year)] = file
+        return file
+
+    def __open_file(self, path, mode):
+        if self._compressor:
+            return self._compressor.open(path, mode)
+        return open(path, mode, buffering=BUFFER_SIZE)
+
+
+def outcome_document(outcome: AssessmentOutcome) -> dict:
+    """
+    Build the JSON document of an outcome, with the content of its TRT XML.
+
+    :param outcome: outcome
+    :return: document, of JSON types only
+    """
+    asmt = outcome.assessment
+    context_date = outcome.status_date.isoformat()
+    attributes, relationships = trt.examinee_values(outcome)
+
+    opportunity = {
+        'server': outcome.server,
+        'database': outcome.database,
+        'clientName': outcome.client_name,
+        'status': outcome.status,
+        'completeness': outcome.completeness,
+        'completeStatus': outcome.completeness,
+        'key': outcome.rec_id,
+        'oppId': outcome.rec_id,
+        'opportunity': 5,
+        'startDate': outcome.start_date.isoformat(),
+        'statusDate': outcome.status_date.isoformat(),
+        'dateCompleted': outcome.submit_date.isoformat(),
+        'itemCount': len(outcome.item_data),
+        'ftCount': 0,
+        'pauseCount': 0,
+        'abnormalStarts': 0,
+        'gracePeriodRestarts': 0,
+        'sessionId': outcome.session,
+        'windowId': 'WINDOW_ID',
+        'administrationCondition': outcome.admin_condition,
+        'assessmentParticipantSessionPlatformUserAgent': '',
+        'effectiveDate': asmt.effective_date.isoformat(),
+        'segment': {
+            'id': asmt.segment.id,
+            'position': asmt.segment.position,
+            'algorithm': asmt.segment.algorithm,
+            'algorithmVersion': asmt.segment.algorithm_version
+        } if asmt.segment else None,
+        'accommodations': [{'type': type, 'code': code, 'value': value, 'segment': 0}
+                           for (type, code, value) in outcome.accommodations],
+        'scores': _scores(outcome),
+        'items': _items(outcome)
+    }
+
+    # in TRT, the testId is the name and the name is the id
+    return {
+        'test': {
+            'testId': asmt.name,
+            'name': asmt.id,
+            'subject': asmt.subject.code,
+            'grade': trt.map_grade(asmt.grade),
+            'assessmentType': trt.map_asmt_type(asmt.type),
+            'academicYear': asmt.year,
+            'assessmentVersion': asmt.version,
+            'contract': asmt.contract,
+            'mode': asmt.mode
+        },
+        'examinee': {
+            'key': outcome.student.rec_id,
+            'contextDate': context_date,
+            'attributes': {name: str(value) for name, value in attributes if value},
+            'relationships': {name: str(value) for name, value in relationships if value}
+        },
+        'opportunity': opportunity
+    }
+
+
+def _scores(outcome: AssessmentOutcome) -> [dict]:
+    asmt = outcome.assessment
+    scores = []
+    scale_scores = [outcome.overall]
+    if not asmt.is_iab():
+        scale_scores += (outcome.alt_scores or []) + (outcome.claim_scores or [])
+    for i, score in enumerate(scale_scores):
+        measure = 'Overall' if i == 0 else score.code
+        if score.score:
+            scores.append(_score(measure, 'ScaleScore', score.score, score.stderr or None))
+        if score.perf_lvl:
+            scores.append(_score(measure, 'PerformanceLevel', score.perf_lvl, None))
+    for target_score in outcome.target_scores or []:
+        scores.append(_score(target_score.id, 'StudentRelativeResidualScore', target_score.student_residual, 0.0))
+        scores.append(_score(target_score.id, 'StandardMetRelativeResidualScore',
+                             target_score.standard_met_residual, 0.0))
+    for trait_score in outcome.trait_scores or []:
+        score = _score(trait_score.code, 'RawScore', trait_score.score, None)
+        score['conditionCode'] = trait_score.condition_code
+        scores.append(score)
+    return scores
+
+
+def _score(measure, label, value, stderr) -> dict:
+    return {'measureOf': measure, 'measureLabel': label, 'value': value, 'standardError': stderr}
+
+
+def _items(outcome: AssessmentOutcome) -> [dict]:
+    responses = outcome.item_data
+    if not responses:
+        return []
+    # summative results should not have item response included (business policy)
+    response = not outcome.assessment.is_summative()
+    admin_date = responses.admin_date.isoformat()
+    items = []
+    for item, selected, page_time, score, response_value, sub_scores, offset in responses.rows():
+        items.append({
+            'bankKey': item.bank_key,
+            'key': item.item_key,
+            'position': item.position,
+            'segmentId': item.segment_id,
+            'format': item.type,
+            'operational': item.operational,
+            'isSelected': '1' if selected else '0',
+            'adminDate': admin_date,
+            'numberVisits': responses.number_visits,
+            'pageNumber': responses.page_number,
+            'pageVisits': responses.page_visits,
+            'pageTime': page_time,
+            'responseDuration': page_time / 1000.0,
+            'dropped': responses.dropped,
+            'score': score,
+            'scoreStatus': responses.score_status,
+            'mimeType': 'text/plain',
+            'response': {
+                'date': response_date(responses.admin_date, offset).isoformat(),
+                'type': 'value',
+                'value': response_value
+            } if response else None,
+            'scoreInfo': {
+                'scoreDimension': 'Overall',
+                'scorePoint': score,
+                'subScores': [{'scoreDimension': dimension, 'scorePoint': points}
+                              for dimension, points in zip(SUB_SCORE_DIMENSIONS, sub_scores)]
+            } if sub_scores else None
+        })
+    return items
+
+
+def _json_dumps(document: dict) -> bytes:
+    # compact, like orjson
+    return json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
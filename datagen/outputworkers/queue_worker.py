@@ -0,0 +1,115 @@
+import queue
+import threading
+
+from datagen.model.assessment import Assessment
+from datagen.model.assessmentoutcome import AssessmentOutcome
+from datagen.model.institutionhierarchy import InstitutionHierarchy
+from datagen.model.registrationsystem import RegistrationSystem
+from datagen.model.student import Student
+from datagen.outputworkers.worker import Worker
+
+
+class QueueWorker(Worker):
+    """
+    A worker that passes everything to other workers on a writer thread, so data can be generated
+    while the previous data is being written. Calls are put on a bounded queue: when the writer falls
+    behind the generator blocks, which keeps the amount of data waiting to be written bounded.
+
+    Because the writing happens later, objects passed to this worker must not be modified until
+    flush (or cleanup) has been called.
+    """
+
+    def __init__(self, workers: [Worker], queue_size=16):
+        """
+        :param workers: the workers that do the writing
+        :param queue_size: maximum number of calls waiting to be written
+        """
+        self.workers = workers
+        self._queue = queue.Queue(queue_size)
+        self._thread = None
+        self._error = None
+
+    def prepare(self):
+        for worker in self.workers:
+            worker.prepare()
+        self._thread = threading.Thread(target=self._write, name='writer', daemon=True)
+        self._thread.start()
+
+    def cleanup(self):
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self.__check()
+        for worker in self.workers:
+            worker.cleanup()
+
+    def flush(self):
+        self._queue.join()
+        self.__check()
+        for worker in self.workers:
+            worker.flush()
+
+    def stats(self):
+        stats = {}
+        for worker in self.workers:
+            for name, count in worker.stats().items():
+                stats[name] = stats.get(name, 0) + count
+        return stats
+
+    def _write(self):
+        """ Writer thread: make the queued calls on the workers until the end marker (None).
+        After an error the remaining calls are discarded; the error is raised in the generating thread.
+        """
+        while True:
+            call = self._queue.get()
+            try:
+                if call is None:
+                    return
+                if self._error is None:
+                    name, args = call
+                    for worker in self.workers:
+                        getattr(worker, name)(*args)
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def __check(self):
+        if self._error is not None:
+            raise RuntimeError('Writing output failed') from self._error
+
+    def __put(self, name, *args):
+        self.__check()
+        if self._thread:
+            self._queue.put((name, args))
+        else:
+            for worker in self.workers:
+                getattr(worker, name)(*args)
+
+    def write_student_registration_config(self, year: int, rs: RegistrationSystem):
+        self.__put('write_student_registration_config', year, rs)
+
+    def write_iab(self, asmt: Assessment):
+        self.__put('write_iab', asmt)
+
+    def write_assessment(self, asmt: Assessment):
+        self.__put('write_assessment', asmt)
+
+    def write_assessments(self, asmts: [Assessment]):
+        self.__put('write_assessments', asmts)
+
+    def write_hierarchies(self, hierarchies: [InstitutionHierarchy]):
+        self.__put('write_hierarchies', hierarchies)
+
+    def write_students_dim(self, students: [Student]):
+        self.__put('write_students_dim', students)
+
+    def write_students_reg(self, students: [Student], rs_guid, asmt_year):
+        self.__put('write_students_reg', students, rs_guid, asmt_year)
+
+    def write_iab_outcome(self, results: [AssessmentOutcome], assessment_guid):
+        self.__put('write_iab_outcome', results, assessment_guid)
+
+    def write_assessment_outcome(self, results: [AssessmentOutcome], assessment_guid, state_code, district_id):
+        self.__put('write_assessment_outcome', results, assessment_guid, state_code, district_id)
@@ -0,0 +1,332 @@
+"""
+An output worker writing all the data into a single SQLite database, datagen.db in the output directory.
+
+The schema is normalized: the hierarchy (districts, schools), the assessments and their items, the students
+and their registrations, and the outcomes with their scores and item data. Rows are keyed by record ids
+(students by rec_id, which is assigned again every year, so a student also has a guid; outcomes by rec_id).
+Like the XML, only the outcomes that are still active are written, without item response values for
+summative outcomes.
+
+Rows are collected and inserted with executemany in large transactions: when BATCH_ROWS are waiting and
+when the worker is flushed. The database is in WAL mode, so district processes (--processes) can insert
+into it in turn, and the indexes are only built, by the main process, once all the rows are inserted.
+
+"""
+
+import os
+import sqlite3
+
+from datagen.model.assessment import Assessment
+from datagen.model.assessmentoutcome import AssessmentOutcome
+from datagen.model.institutionhierarchy import InstitutionHierarchy
+from datagen.model.itemdata import response_date
+from datagen.model.student import Student
+from datagen.outputworkers.worker import Worker
+
+DB_FILE = 'datagen.db'
+
+# table -> columns, with their types
+TABLES = {
+    'districts': ('id TEXT PRIMARY KEY', 'name TEXT', 'state_code TEXT', 'state_name TEXT'),
+    'schools': ('id TEXT PRIMARY KEY', 'name TEXT', 'district_id TEXT', 'type TEXT'),
+    'assessments': ('id TEXT PRIMARY KEY', 'guid TEXT', 'name TEXT', 'type TEXT', 'subject TEXT', 'grade INTEGER',
+                    'academic_year INTEGER', 'version TEXT'),
+    'items': ('asmt_id TEXT', 'bank_key TEXT', 'item_key TEXT', 'position INTEGER', 'segment_id TEXT',
+              'format TEXT', 'operational TEXT', 'max_score INTEGER'),
+    'students': ('rec_id INTEGER PRIMARY KEY', 'guid TEXT', 'academic_year INTEGER', 'ssid TEXT',
+                 'external_ssid TEXT', 'school_id TEXT', 'grade INTEGER', 'first_name TEXT', 'middle_name TEXT',
+                 'last_name TEXT', 'gender TEXT', 'dob TEXT', 'eth_hispanic INTEGER', 'eth_amer_ind INTEGER',
+                 'eth_asian INTEGER', 'eth_filipino INTEGER', 'eth_black INTEGER', 'eth_white INTEGER',
+                 'eth_pacific INTEGER', 'eth_multi INTEGER', 'prg_iep INTEGER', 'prg_lep INTEGER',
+                 'prg_lep_entry_date TEXT', 'prg_lep_exit_date TEXT', 'prg_sec504 INTEGER', 'prg_econ_disad INTEGER',
+                 'prg_migrant INTEGER', 'lang_code TEXT', 'lang_prof_level TEXT', 'elas TEXT', 'elas_start_date TEXT',
+                 'military_connected TEXT'),
+    'registrations': ('student_rec_id INTEGER PRIMARY KEY', 'reg_sys_guid TEXT', 'academic_year INTEGER',
+                      'student_guid TEXT', 'school_id TEXT', 'grade INTEGER', 'held_back INTEGER', 'transfer INTEGER'),
+    'outcomes': ('rec_id INTEGER PRIMARY KEY', 'guid TEXT', 'student_rec_id INTEGER', 'asmt_id TEXT',
+                 'school_id TEXT', 'student_grade INTEGER', 'date_taken TEXT', 'start_date TEXT', 'status_date TEXT',
+                 'submit_date TEXT', 'session_id TEXT', 'admin_condition TEXT', 'completeness TEXT', 'score INTEGER',
+                 'score_stderr INTEGER', 'score_perf_lvl INTEGER'),
+    'scores': ('outcome_rec_id INTEGER', 'score_type TEXT', 'code TEXT', 'score INTEGER', 'stderr INTEGER',
+               'perf_lvl INTEGER', 'condition_code TEXT', 'student_residual REAL', 'standard_met_residual REAL'),
+    'item_data': ('outcome_rec_id INTEGER', 'bank_key TEXT', 'item_key TEXT', 'is_selected TEXT', 'admin_date TEXT',
+                  'number_visits INTEGER', 'page_number INTEGER', 'page_visits INTEGER', 'page_time INTEGER',
+                  'dropped TEXT', 'score INTEGER', 'score_status TEXT', 'sub_scores TEXT', 'response_date TEXT',
+                  'response_value TEXT'),
+}
+
+# keys of tables without a single column primary key
+KEYS = {
+    'items': 'PRIMARY KEY (asmt_id, bank_key, item_key)',
+}
+
+# built once all the rows are inserted
+INDEXES = {
+    'schools_district': 'schools (district_id)',
+    'items_asmt': 'items (asmt_id)',
+    'students_guid': 'students (guid)',
+    'registrations_school': 'registrations (school_id)',
+    'outcomes_student': 'outcomes (student_rec_id)',
+    'outcomes_asmt': 'outcomes (asmt_id)',
+    'outcomes_school': 'outcomes (school_id)',
+    'scores_outcome': 'scores (outcome_rec_id)',
+    'item_data_outcome': 'item_data (outcome_rec_id)',
+}
+
+# the hierarchy and assessments may be written again (by every district process, or a resumed run),
+# replacing the rows
+REPLACED_TABLES = ('districts', 'schools', 'assessments', 'items')
+
+# number of rows collected before they are inserted
+BATCH_ROWS = 100000
+
+
+class SqliteWorker(Worker):
+    def __init__(self, out_path_root, resume=False, district_process=False):
+        """
+        :param out_path_root: output directory
+        :param resume: True if the run is resumed, in which case the database is kept and the rows of each
+                       district and year are deleted before it is generated again; otherwise the database
+                       is replaced
+        :param district_process: True for the worker of a district process, which inserts into the
+                                 database of the main process (and doesn't build the indexes)
+        """
+        self.path = os.path.join(out_path_root, DB_FILE)
+        self.resume = resume
+        self.district_process = district_process
+
+        self._connection = None
+        # rows waiting to be inserted, table -> list of rows, and their number
+        self._rows = {table: [] for table in TABLES}
+        self._row_count = 0
+        # assessments (with their items) already written
+        self._assessments = set()
+        # (district, year) of the rows to delete before the next insert, and those already deleted (if resuming)
+        self._clear = []
+        self._cleared = set()
+
+    def prepare(self):
+        if not self.district_process and not self.resume:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.isfile(self.path + suffix):
+                    os.remove(self.path + suffix)
+        connection = self._connect()
+        with connection:
+            _create_tables(connection)
+        self._close()
+
+    def cleanup(self):
+        self.flush()
+        if not self.district_process:
+            connection = self._connect()
+            for name, columns in INDEXES.items():
+                connection.execute('CREATE INDEX IF NOT EXISTS {} ON {}'.format(name, columns))
+            connection.commit()
+            self._close()
+
+    def flush(self):
+        # the connection is closed too, so it isn't inherited by district processes
+        self._insert()
+        self._close()
+
+    def write_hierarchies(self, hierarchies: [InstitutionHierarchy]):
+        districts = {}
+        for hierarchy in hierarchies:
+            districts[hierarchy.district.id] = (hierarchy.district.id, hierarchy.district.name,
+                                                hierarchy.state.code, hierarchy.state.name)
+            self._add('schools', (hierarchy.school.id, hierarchy.school.name, hierarchy.district.id,
+                                  hierarchy.school.type_str))
+        for row in districts.values():
+            self._add('districts', row)
+        self.flush()
+
+    def write_students_dim(self, students: [Student]):
+        for student in students:
+            year = student.reg_sys.academic_year
+            self._clear_district_year(student.school.district, year)
+            self._add('students', (
+                student.rec_id, student.guid, year, student.id, student.external_ssid, student.school.id,
+                student.grade, student.first_name, student.middle_name, student.last_name, student.gender,
+                _date(student.dob), _flag(student.eth_hispanic), _flag(student.eth_amer_ind),
+                _flag(student.eth_asian), _flag(student.eth_filipino), _flag(student.eth_black),
+                _flag(student.eth_white), _flag(student.eth_pacific), _flag(student.eth_multi),
+                _flag(student.prg_iep), _flag(student.prg_lep), _date(student.prg_lep_entry_date),
+                _date(student.prg_lep_exit_date), _flag(student.prg_sec504), _flag(student.prg_econ_disad),
+                _flag(student.prg_migrant), student.lang_code, student.lang_prof_level, student.elas,
+                _date(student.elas_start_date), student.military_connected))
+
+    def write_students_reg(self, students: [Student], rs_guid, asmt_year):
+        for student in students:
+            self._clear_district_year(student.school.district, asmt_year)
+            self._add('registrations', (student.rec_id, rs_guid, asmt_year, student.guid, student.school.id,
+                                        student.grade, _flag(student.held_back), _flag(student.transfer)))
+
+    def write_iab_outcome(self, results: [AssessmentOutcome], assessment_guid):
+        for result in results:
+            self.write_outcome(result)
+
+    def write_assessment_outcome(self, results: [AssessmentOutcome], assessment_guid, state_code, district_id):
+        for result in results:
+            self.write_outcome(result)
+
+    def write_outcome(self, outcome: AssessmentOutcome):
+        # skip inactive or deleted outcomes
+        if outcome.result_status != 'C':
+            return
+
+        asmt = outcome.assessment
+        if asmt.id not in self._assessments:
+            self._add_assessment(asmt)
+        self._clear_district_year(outcome.school.district, asmt.year)
+
+        overall = outcome.overall
+        self._add('outcomes', (
+            outcome.rec_id, outcome.guid, outcome.student.rec_id, asmt.id, outcome.school.id, outcome.student.grade,
+            _date(outcome.date_taken), _date(outcome.start_date), _date(outcome.status_date),
+            _date(outcome.submit_date), outcome.session, outcome.admin_condition, outcome.completeness,
+            overall.score, overall.stderr, overall.perf_lvl))
+
+        scores = [(outcome.rec_id, 'overall', overall.code, overall.score, overall.stderr, overall.perf_lvl,
+                   overall.condition_code, None, None)]
+        # alt and claim scores are in the XML only for summative and ICA outcomes
+        if not asmt.is_iab():
+            for score_type, score_list in (('alt', outcome.alt_scores), ('claim', outcome.claim_scores)):
+                scores.extend((outcome.rec_id, score_type, score.code, score.score, score.stderr, score.perf_lvl,
+                               score.condition_code, None, None) for score in score_list or ())
+        scores.extend((outcome.rec_id, 'trait', score.code, score.score, None, None, score.condition_code, None, None)
+                      for score in outcome.trait_scores or ())
+        scores.extend((outcome.rec_id, 'target', score.id, None, None, None, None, score.student_residual,
+                       score.standard_met_residual) for score in outcome.target_scores or ())
+        self._add_all('scores', scores)
+
+        # summative results should not have item response included (business policy)
+        response = not asmt.is_summative()
+        responses = outcome.item_data
+        if not responses:
+            return
+        admin_date = responses.admin_date.isoformat()
+        self._add_all('item_data', [
+            (outcome.rec_id, item.bank_key, item.item_key, '1' if selected else '0', admin_date,
+             responses.number_visits, responses.page_number, responses.page_visits, page_time, responses.dropped,
+             score, responses.score_status,
+             ';'.join(map(str, sub_scores)) if sub_scores else None,
+             response_date(responses.admin_date, offset).isoformat() if response else None,
+             response_value if response else None)
+            for item, selected, page_time, score, response_value, sub_scores, offset in responses.rows()])
+
+    def _add_assessment(self, asmt: Assessment):
+        self._assessments.add(asmt.id)
+        self._add('assessments', (asmt.id, asmt.guid, asmt.name, asmt.type, asmt.subject.code, asmt.grade,
+                                  asmt.year, asmt.version))
+        if asmt.item_bank:
+            self._add_all('items', [(asmt.id, item.bank_key, item.item_key, item.position, item.segment_id,
+                                     item.type, item.operational, item.max_score) for item in asmt.item_bank])
+
+    def _clear_district_year(self, district, year):
+        """
+        If resuming, delete (before the next insert) the rows of a district and year from the previous run,
+        the first time the district and year is written.
+        """
+        if self.resume and (district.id, year) not in self._cleared:
+            self._cleared.add((district.id, year))
+            self._clear.append((district.id, year))
+
+    def _add(self, table, row):
+        self._rows[table].append(row)
+        self._row_count += 1
+        if self._row_count >= BATCH_ROWS:
+            self._insert()
+
+    def _add_all(self, table, rows):
+        self._rows[table].extend(rows)
+        self._row_count += len(rows)
+        if self._row_count >= BATCH_ROWS:
+            self._insert()
+
+    def _insert(self):
+        """
+        Insert the rows waiting to be inserted, in a single transaction.
+        """
+        if not self._row_count and not self._clear:
+            return
+        connection = self._connect()
+        with connection:
+            for district_id, year in self._clear:
+                _delete_district_year(connection, district_id, year)
+            self._clear = []
+            for table, rows in self._rows.items():
+                if rows:
+                    verb = 'INSERT OR REPLACE' if table in REPLACED_TABLES else 'INSERT'
+                    connection.executemany('{} INTO {} VALUES ({})'.format(
+                        verb, table, ', '.join('?' * len(TABLES[table]))), rows)
+                    self._rows[table] = []
+        self._row_count = 0
+
+    def _connect(self):
+        if self._connection is None:
+            # district processes wait for each other's transactions; the worker may be used by a writer thread
+            self._connection = sqlite3.connect(self.path, timeout=600, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+        return self._connection
+
+    def _close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def _delete_district_year(connection, district_id, year):
+    """
+    Delete the students, registrations and outcomes (with their scores and item data) of a district and year.
+    """
+    schools = 'SELECT id FROM schools WHERE district_id = ?'
+    outcomes = ('SELECT rec_id FROM outcomes WHERE school_id IN ({}) AND asmt_id IN '
+                '(SELECT id FROM assessments WHERE academic_year = ?)'.format(schools))
+    for table in ('scores', 'item_data'):
+        connection.execute('DELETE FROM {} WHERE outcome_rec_id IN ({})'.format(table, outcomes), (district_id, year))
+    connection.execute('DELETE FROM outcomes WHERE rec_id IN ({})'.format(outcomes), (district_id, year))
+    for table in ('students', 'registrations'):
+        connection.execute('DELETE FROM {} WHERE academic_year = ? AND school_id IN ({})'.format(table, schools),
+                           (year, district_id))
+
+
+def merge_databases(files: [str], out_file: str):
+    """
+    Combine the databases of sharded runs. The districts of the shards don't overlap, so the rows are
+    simply added up (the hierarchy and assessments, and their items, are only added once).
+
+    :param files: databases to combine
+    :param out_file: combined database, may be one of the files
+    """
+    files = [file for file in files if os.path.abspath(file) != os.path.abspath(out_file)]
+    connection = sqlite3.connect(out_file)
+    with connection:
+        _create_tables(connection)
+    for file in files:
+        connection.execute('ATTACH DATABASE ? AS shard', (file,))
+        with connection:
+            for table in TABLES:
+                if table in REPLACED_TABLES:
+                    connection.execute('INSERT OR IGNORE INTO {0} SELECT * FROM shard.{0}'.format(table))
+                else:
+                    connection.execute('INSERT INTO {0} SELECT * FROM shard.{0}'.format(table))
+        connection.execute('DETACH DATABASE shard')
+    for name, columns in INDEXES.items():
+        connection.execute('CREATE INDEX IF NOT EXISTS {} ON {}'.format(name, columns))
+    connection.commit()
+    connection.close()
+
+
+def _create_tables(connection):
+    for table, columns in TABLES.items():
+        connection.execute('CREATE TABLE IF NOT EXISTS {} ({})'.format(
+            table, ', '.join(columns + ((KEYS[table],) if table in KEYS else ()))))
+
+
+def _flag(value):
+    return None if value is None else int(bool(value))
+
+
+def _date(value):
+    return None if value is None else value.isoformat()
@@ -0,0 +1,259 @@
+"""
+String templates for the TRT (TDSReport) XML document.
+
+The layout of every element is compiled once into a format string, with the constant attributes already
+in place and a placeholder for each dynamic attribute. Serializing an outcome then only has to escape and
+fill in the dynamic values. The escaping and the element rendering match ElementTree's tostring (the
+XmlWorker's etree serializer) exactly, so both produce the same document.
+
+Parts that don't change from one outcome to the next (the Test element, the examinee attributes, the
+static attributes of an item) have their own templates so they can be rendered once and reused.
+
+TrtXMLGenerator streams elements (SAX events) to a file in the same format, for serializing without a tree.
+
+The examinee values and the mapping of model values to TRT values are shared by the serializers of the XML
+and JSON workers.
+
+"""
+
+from xml.sax.saxutils import XMLGenerator
+
+from datagen.model.assessmentoutcome import AssessmentOutcome
+
+
+def escape_attrib(value: str) -> str:
+    """
+    Escape an attribute value the way ElementTree does.
+
+    :param value: attribute value
+    :return: escaped value
+    """
+    if '&' in value:
+        value = value.replace('&', '&amp;')
+    if '<' in value:
+        value = value.replace('<', '&lt;')
+    if '>' in value:
+        value = value.replace('>', '&gt;')
+    if '"' in value:
+        value = value.replace('"', '&quot;')
+    if '\r' in value:
+        value = value.replace('\r', '&#13;')
+    if '\n' in value:
+        value = value.replace('\n', '&#10;')
+    if '\t' in value:
+        value = value.replace('\t', '&#09;')
+    return value
+
+
+def escape_text(value: str) -> str:
+    """
+    Escape element text the way ElementTree does.
+
+    :param value: text
+    :return: escaped text
+    """
+    if '&' in value:
+        value = value.replace('&', '&amp;')
+    if '<' in value:
+        value = value.replace('<', '&lt;')
+    if '>' in value:
+        value = value.replace('>', '&gt;')
+    return value
+
+
+def compile_attributes(attributes: [(str, str)]) -> str:
+    """
+    Compile attributes into a format string.
+
+    :param attributes: list of (name, value) in document order; a value of None is a placeholder for a
+                       dynamic (already escaped) value, any other value is a constant
+    :return: format string
+    """
+    parts = []
+    for name, value in attributes:
+        value = '{}' if value is None else escape_attrib(value).replace('{', '{{').replace('}', '}}')
+        parts.append(' {}="{}"'.format(name, value))
+    return ''.join(parts)
+
+
+def compile_start_tag(tag: str, attributes: [(str, str)]) -> str:
+    """
+    Compile the start tag of an element into a format string, without the closing '>' or ' />'.
+
+    :param tag: element tag
+    :param attributes: list of (name, value), see compile_attributes
+    :return: format string
+    """
+    return '<' + tag + compile_attributes(attributes)
+
+
+class TrtXMLGenerator(XMLGenerator):
+    """
+    An XMLGenerator formatting elements like ElementTree's tostring: attributes escaped by escape_attrib and
+    empty elements closed with ' />'. Each start tag is written to the output in one piece.
+    """
+
+    def __init__(self, out):
+        super().__init__(out, short_empty_elements=True)
+
+    def startElement(self, name, attrs):
+        self._finish_pending_start_element()
+        self._write('<' + name + ''.join([' {}="{}"'.format(key, escape_attrib(value))
+                                          for key, value in attrs.items()]))
+        self._pending_start_element = True
+
+    def endElement(self, name):
+        if self._pending_start_element:
+            self._write(' />')
+            self._pending_start_element = False
+        else:
+            self._write('</' + name + '>')
+
+
+TEST = compile_start_tag('Test', [('testId', None), ('name', None), ('subject', None), ('grade', None),
+                                  ('assessmentType', None), ('academicYear', None), ('assessmentVersion', None),
+                                  ('contract', None), ('mode', None)]) + ' />'
+
+EXAMINEE = compile_start_tag('Examinee', [('key', None)])
+
+# the examinee attributes are the same for every outcome of a student except for the context date (the
+# outcome's status date), so these stop where the context date goes and CONTEXT_DATE_END follows it
+EXAMINEE_ATTRIBUTE = compile_start_tag('ExamineeAttribute', [('context', 'FINAL'), ('name', None),
+                                                             ('value', None)]) + ' contextDate="'
+
+EXAMINEE_RELATIONSHIP = compile_start_tag('ExamineeRelationship', [('context', 'FINAL'), ('name', None),
+                                                                   ('value', None)]) + ' contextDate="'
+
+CONTEXT_DATE_END = '" />'
+
+OPPORTUNITY = compile_start_tag('Opportunity', [
+    ('server', None), ('database', None), ('clientName', None), ('status', None), ('completeness', None),
+    ('completeStatus', None), ('key', None), ('oppId', None), ('opportunity', '5'), ('startDate', None),
+    ('statusDate', None), ('dateCompleted', None), ('itemCount', None), ('ftCount', '0'), ('pauseCount', '0'),
+    ('abnormalStarts', '0'), ('gracePeriodRestarts', '0'), ('sessionId', None), ('windowId', 'WINDOW_ID'),
+    ('administrationCondition', None), ('assessmentParticipantSessionPlatformUserAgent', ''),
+    ('effectiveDate', None)])
+
+SEGMENT = compile_start_tag('Segment', [('id', None), ('position', None), ('algorithm', None),
+                                        ('algorithmVersion', None)]) + ' />'
+
+ACCOMMODATION = compile_start_tag('Accommodation', [('type', None), ('code', None), ('value', None),
+                                                    ('segment', '0')]) + ' />'
+
+SCORE = compile_start_tag('Score', [('measureOf', None), ('measureLabel', None), ('value', None),
+                                    ('standardError', None)]) + ' />'
+
+TRAIT_SCORE = compile_start_tag('Score', [('measureOf', None), ('measureLabel', 'RawScore'), ('value', None),
+                                          ('standardError', ''), ('conditionCode', None)]) + ' />'
+
+# the attributes of the assessment item, followed by the attributes of the student's response to it
+ITEM = compile_start_tag('Item', [('bankKey', None), ('key', None), ('position', None), ('segmentId', None),
+                                  ('format', None), ('operational', None)])
+
+ITEM_DATA = compile_attributes([
+    ('isSelected', None), ('adminDate', None), ('numberVisits', None), ('pageNumber', None), ('pageVisits', None),
+    ('pageTime', None), ('responseDuration', None), ('dropped', None), ('score', None), ('scoreStatus', None),
+    ('mimeType', 'text/plain')])
+
+RESPONSE = compile_start_tag('Response', [('date', None), ('type', 'value')])
+
+SCORE_INFO = compile_start_tag('ScoreInfo', [('maxScore', '0'), ('scoreDimension', None), ('scorePoint', None),
+                                             ('scoreStatus', 'Scored')])
+
+SUB_SCORE_INFO = SCORE_INFO + ' />'
+
+WER_SCORE_INFO = (SCORE_INFO.format('Overall', '{}') + '><SubScoreList>' +
+                  SUB_SCORE_INFO.format('Organization/Purpose', '{}') +
+                  SUB_SCORE_INFO.format('Evidence/Elaboration', '{}') +
+                  SUB_SCORE_INFO.format('Conventions', '{}') +
+                  '</SubScoreList></ScoreInfo>')
+
+
+def examinee_values(outcome: AssessmentOutcome):
+    """
+    Get the examinee attributes and relationships of an outcome, in document order.
+    Empty values are included; they are left out when serialized.
+
+    :param outcome: outcome
+    :return: tuple of lists of (name, value) for the attributes and for the relationships
+    """
+    asmt = outcome.assessment
+    student = outcome.student
+    school = outcome.school
+    attributes = [
+        ('StudentIdentifier', student.id),
+        ('AlternateSSID', student.external_ssid),
+        ('Birthdate', student.dob),
+        ('FirstName', student.first_name),
+        ('MiddleName', student.middle_name),
+        ('LastOrSurname', student.last_name),
+        ('Sex', map_gender(student.gender)),
+        ('GradeLevelWhenAssessed', map_grade(student.grade)),
+        ('HispanicOrLatinoEthnicity', map_yes_no(student.eth_hispanic)),
+        ('AmericanIndianOrAlaskaNative', map_yes_no(student.eth_amer_ind)),
+        ('Asian', map_yes_no(student.eth_asian)),
+        ('Filipino', map_yes_no(student.eth_filipino)),
+        ('BlackOrAfricanAmerican', map_yes_no(student.eth_black)),
+        ('White', map_yes_no(student.eth_white)),
+        ('NativeHawaiianOrOtherPacificIslander', map_yes_no(student.eth_pacific)),
+        ('DemographicRaceTwoOrMoreRaces', map_yes_no(student.eth_multi)),
+        ('IDEAIndicator', map_yes_no(student.prg_iep)),
+        ('LEPStatus', map_yes_no(student.prg_lep)),
+        ('LimitedEnglishProficiencyEntryDate', student.prg_lep_entry_date),
+        ('LEPExitDate', student.prg_lep_exit_date),
+        ('Section504Status', map_yes_no(student.prg_sec504)),
+        ('EconomicDisadvantageStatus', map_yes_no(student.prg_econ_disad)),
+        ('LanguageCode', student.lang_code),
+        ('EnglishLanguageProficiencyLevel', student.lang_prof_level),
+        ('EnglishLanguageAcquisitionStatus', student.elas),
+        ('EnglishLanguageAcquisitionStatusStartDate', student.elas_start_date),
+        ('MigrantStatus', map_yes_no(student.prg_migrant)),
+        ('MilitaryConnectedStudentIndicator', student.military_connected),
+        # The generated groups aren't really that useful so let's not emit them
+        # ('StudentGroupName', student.group_1_text),
+        # ('StudentGroupName', student.group_2_text),
+        # ('StudentGroupName', student.group_3_text),
+        # ('StudentGroupName', student.group_4_text),
+        # ('StudentGroupName', student.group_5_text),
+        # ('StudentGroupName', student.group_6_text),
+        # ('StudentGroupName', student.group_7_text),
+        # ('StudentGroupName', student.group_8_text),
+        # ('StudentGroupName', student.group_9_text),
+        # ('StudentGroupName', student.group_10_text),
+        ('Advancement', map_advancement(student)),
+        ('Capability', student.capability.get(asmt.subject.code, 0.0))
+    ]
+    relationships = [
+        ('StateAbbreviation', school.district.state.code),
+        ('StateName', school.district.state.name),
+        ('DistrictId', school.district.id),
+        ('DistrictName', school.district.name),
+        ('SchoolId', school.id),
+        ('SchoolName', school.name)
+    ]
+    return attributes, relationships
+
+
+def map_asmt_type(value):
+    return 'Summative' if 'sum' in value.lower() else 'Interim'
+
+
+def map_gender(value):
+    if 'female' == value.lower(): return 'Female'
+    if 'male' == value.lower(): return 'Male'
+    if 'non_binary' == value.lower(): return 'NonBinary'
+    return None
+
+
+def map_yes_no(value):
+    return 'Yes' if value else 'No'
+
+
+def map_advancement(student):
+    if student.held_back: return 'HeldBack'
+    if student.transfer: return 'Transfer'
+    return 'Normal'
+
+
+def map_grade(value):
+    return 'KG' if value == 0 else '{:02}'.format(value)
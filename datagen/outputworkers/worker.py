@@ -20,6 +20,17 @@ class Worker:
         """
         pass
 
+    def flush(self):
+        """ Make sure everything passed to the worker so far has been written.
+        The objects passed to a worker may be modified once this returns.
+        """
+        pass
+
+    def stats(self) -> {str: int}:
+        """ Counters of the work done by the worker, e.g. file system calls avoided
+        """
+        return {}
+
     def write_student_registration_config(self, year: int, rs: RegistrationSystem):
         """ write student registration configuration
         """
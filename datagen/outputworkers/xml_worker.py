@@ -1,69 +1,112 @@
-import json
+import io
 import os
-from collections import OrderedDict
 from xml.etree.ElementTree import Element, SubElement, tostring
 
 from datagen.model.assessment import Assessment
 from datagen.model.assessmentoutcome import AssessmentOutcome
 from datagen.model.institutionhierarchy import InstitutionHierarchy
+from datagen.model.itemdata import response_date
+from datagen.outputworkers import trt_template as trt
+from datagen.outputworkers.trt_template import TrtXMLGenerator, escape_attrib, escape_text
 from datagen.outputworkers.worker import Worker
 from datagen.util.hierarchy import write_hierarchy
 from datagen.writers import tabulator_writer
+from datagen.writers.archive_writer import ARCHIVE_FORMATS, ArchiveWriter
+from datagen.writers.compressed_writer import Compressor
+from datagen.writers.organizations_writer import OrganizationsWriter
+
+
+# ways of serializing an outcome to TRT XML: string templates (fast), an ElementTree (the reference), or
+# streaming the elements straight to the file (no tree); all write the same XML
+SERIALIZERS = ('template', 'etree', 'stream')
+
+# file system metadata calls made by os.makedirs(exist_ok=True) for a directory that exists:
+# stat of the parent, mkdir, stat of the directory
+MAKEDIRS_FS_CALLS = 3
 
 
 class XmlWorker(Worker):
-    def __init__(self, out_path_root):
+    def __init__(self, out_path_root, serializer='template', archive=None, compress=None, compress_level=None):
+        """
+        :param out_path_root: output directory
+        :param serializer: 'template', 'etree' or 'stream', see SERIALIZERS; all write the same XML
+        :param archive: None to write a file per outcome, or one of ARCHIVE_FORMATS to write the outcomes of
+                        each school and year into an archive
+        :param compress: None, or one of COMPRESSIONS to compress the outcome files and assessments.csv
+                         (on a separate thread); archives are written as they are
+        :param compress_level: compression level, None for the default of the compression
+        """
+        if serializer not in SERIALIZERS:
+            raise ValueError("XML serializer '{}' is not one of {}".format(serializer, ', '.join(SERIALIZERS)))
+        if archive is not None and archive not in ARCHIVE_FORMATS:
+            raise ValueError("Archive format '{}' is not one of {}".format(archive, ', '.join(ARCHIVE_FORMATS)))
         self.out_path_root = out_path_root
+        self.serializer = serializer
+        self.archive = archive
+        self._compressor = Compressor(compress, compress_level) if compress else None
+        self._to_xml = {'template': self._template_xml, 'etree': self._etree_xml,
+                        'stream': self._stream_xml_string}[serializer]
+
+        # fragments rendered by the template serializer, for reuse by later outcomes:
+        # the Test element by assessment and the item attributes by item (both bounded by the packages),
+        # the Examinee element by student and subject, kept only for the current school and year
+        self._test_fragments = {}
+        self._item_fragments = {}
+        self._examinee_fragments = {}
+        self._examinee_scope = None
+
+        # the output directory of each school (or district), created once, and the number of times that
+        # saved calling os.makedirs
+        self._dirs = {}
+        self._makedirs_avoided = 0
+
+        # the archive being written, for the school and year of its outcomes, and those already written
+        self._archive_writer = None
+        self._archive_key = None
+        self._archived = set()
+
+        # the organizations of the hierarchies, written to organizations.json when the worker is cleaned up
+        self._organizations = None
 
     def prepare(self):
         pass
 
     def cleanup(self):
-        pass
+        self.flush()
+        if self._organizations:
+            self._organizations.write(os.path.join(self.out_path_root, 'organizations.json'))
+            self._organizations = None
+        if self._compressor:
+            self._compressor.close()
+
+    def stats(self):
+        return {'dirs_created': len(self._dirs),
+                'makedirs_avoided': self._makedirs_avoided,
+                'fs_calls_avoided': self._makedirs_avoided * MAKEDIRS_FS_CALLS}
+
+    def flush(self):
+        # the outcomes of a school and year are all written before the worker is flushed
+        if self._archive_writer:
+            self._archive_writer.close()
+            self._archive_writer = None
+            self._archive_key = None
+        if self._compressor:
+            self._compressor.wait()
 
     def write_hierarchies(self, hierarchies: [InstitutionHierarchy]):
-        self._write_hierarchies_to_json(hierarchies)
-        write_hierarchy(os.path.join(self.out_path_root, 'hierarchy.csv'), [ih.school for ih in hierarchies])
-
-    def _write_hierarchies_to_json(self, hierarchies: [InstitutionHierarchy]):
-        districts = {}
-        schools = {}
-
-        # because each district is generated individually, we need to read the file to
-        # get previous districts, merge the new ones, then rewrite the file ...
-        file = os.path.join(self.out_path_root, 'organizations.json')
-        if os.path.isfile(file):
-            with open(file, "r") as f:
-                org = json.load(f)
-                if 'districts' in org:
-                    districts = {d['entityId']: d for d in org['districts']}
-                if 'institutions' in org:
-                    schools = {s['entityId']: s for s in org['institutions']}
-
+        if self._organizations is None:
+            # the organizations are added to those of an existing file
+            self._organizations = OrganizationsWriter()
+            file = os.path.join(self.out_path_root, 'organizations.json')
+            if os.path.isfile(file):
+                self._organizations.load(file)
         for hierarchy in hierarchies:
-            if hierarchy.district.id not in districts:
-                districts[hierarchy.district.id] = {
-                    'entityId': hierarchy.district.id,
-                    'entityName': hierarchy.district.name,
-                    'entityType': 'DISTRICT',
-                    'parentEntityType': 'STATE',
-                    'parentEntityId': hierarchy.state.code
-                }
-            if hierarchy.school.id not in schools:
-                schools[hierarchy.school.id] = {
-                    'entityId': hierarchy.school.id,
-                    'entityName': hierarchy.school.name,
-                    'entityType': 'INSTITUTION',
-                    'parentEntityType': 'DISTRICT',
-                    'parentEntityId': hierarchy.district.id
-                }
-
-        with open(file, "w") as f:
-            # force output order to be same as org hierarchy
-            json.dump(OrderedDict([('districts', list(districts.values())), ('institutions', list(schools.values()))]), f, indent=2)
+            self._organizations.add_hierarchy(hierarchy)
+        write_hierarchy(os.path.join(self.out_path_root, 'hierarchy.csv'), [ih.school for ih in hierarchies])
 
     def write_assessments(self, asmts: [Assessment]):
-        tabulator_writer.write_assessments(os.path.join(self.out_path_root, 'assessments.csv'), asmts, )
+        tabulator_writer.write_assessments(os.path.join(self.out_path_root, 'assessments.csv'), asmts,
+                                           self._compressor)
 
     def write_iab_outcome(self, results: [AssessmentOutcome], assessment_guid):
         for result in results:
@@ -78,6 +121,29 @@ class XmlWorker(Worker):
         if outcome.result_status != 'C':
             return
 
+        if self._compressor and not self.archive:
+            self._compressor.write_file(self.file_path_for_outcome(outcome), self._to_xml(outcome))
+            return
+
+        if self.serializer == 'stream' and not self.archive:
+            with open(self.file_path_for_outcome(outcome), "w") as f:
+                self._stream_xml(outcome, f)
+            return
+
+        xml = self._to_xml(outcome)
+        if self.archive:
+            self._archive_for_outcome(outcome).add(self.member_name_for_outcome(outcome), xml, outcome.status_date)
+            return
+        with open(self.file_path_for_outcome(outcome), "w") as f:
+            f.write(xml)
+
+    def _etree_xml(self, outcome: AssessmentOutcome):
+        """
+        Serialize an outcome by building an ElementTree.
+
+        :param outcome: outcome
+        :return: TRT XML
+        """
         root = Element('TDSReport')
 
         # write Test
@@ -87,8 +153,8 @@ class XmlWorker(Worker):
         test.set('testId', asmt.name)
         test.set('name', asmt.id)
         test.set('subject', asmt.subject.code)
-        test.set('grade', self._map_grade(asmt.grade))
-        test.set('assessmentType', self._map_asmt_type(asmt.type))
+        test.set('grade', trt.map_grade(asmt.grade))
+        test.set('assessmentType', trt.map_asmt_type(asmt.type))
         test.set('academicYear', str(asmt.year))
         test.set('assessmentVersion', asmt.version)
         test.set('contract', asmt.contract)
@@ -100,55 +166,11 @@ class XmlWorker(Worker):
         examinee.set('key', str(student.rec_id))
 
         contextDateStr = outcome.status_date.isoformat()
-        self._add_examinee_attribute(examinee, 'StudentIdentifier', student.id, contextDateStr)
-        self._add_examinee_attribute(examinee, 'AlternateSSID', student.external_ssid, contextDateStr)
-        self._add_examinee_attribute(examinee, 'Birthdate', student.dob, contextDateStr)
-        self._add_examinee_attribute(examinee, 'FirstName', student.first_name, contextDateStr)
-        self._add_examinee_attribute(examinee, 'MiddleName', student.middle_name, contextDateStr)
-        self._add_examinee_attribute(examinee, 'LastOrSurname', student.last_name, contextDateStr)
-        self._add_examinee_attribute(examinee, 'Sex', self._map_gender(student.gender), contextDateStr)
-        self._add_examinee_attribute(examinee, 'GradeLevelWhenAssessed', self._map_grade(student.grade), contextDateStr)
-        self._add_examinee_attribute(examinee, 'HispanicOrLatinoEthnicity', self._map_yes_no(student.eth_hispanic), contextDateStr)
-        self._add_examinee_attribute(examinee, 'AmericanIndianOrAlaskaNative', self._map_yes_no(student.eth_amer_ind), contextDateStr)
-        self._add_examinee_attribute(examinee, 'Asian', self._map_yes_no(student.eth_asian), contextDateStr)
-        self._add_examinee_attribute(examinee, 'Filipino', self._map_yes_no(student.eth_filipino), contextDateStr)
-        self._add_examinee_attribute(examinee, 'BlackOrAfricanAmerican', self._map_yes_no(student.eth_black), contextDateStr)
-        self._add_examinee_attribute(examinee, 'White', self._map_yes_no(student.eth_white), contextDateStr)
-        self._add_examinee_attribute(examinee, 'NativeHawaiianOrOtherPacificIslander', self._map_yes_no(student.eth_pacific), contextDateStr)
-        self._add_examinee_attribute(examinee, 'DemographicRaceTwoOrMoreRaces', self._map_yes_no(student.eth_multi), contextDateStr)
-        self._add_examinee_attribute(examinee, 'IDEAIndicator', self._map_yes_no(student.prg_iep), contextDateStr)
-        self._add_examinee_attribute(examinee, 'LEPStatus', self._map_yes_no(student.prg_lep), contextDateStr)
-        self._add_examinee_attribute(examinee, 'LimitedEnglishProficiencyEntryDate', student.prg_lep_entry_date, contextDateStr)
-        self._add_examinee_attribute(examinee, 'LEPExitDate', student.prg_lep_exit_date, contextDateStr)
-        self._add_examinee_attribute(examinee, 'Section504Status', self._map_yes_no(student.prg_sec504), contextDateStr)
-        self._add_examinee_attribute(examinee, 'EconomicDisadvantageStatus', self._map_yes_no(student.prg_econ_disad), contextDateStr)
-        self._add_examinee_attribute(examinee, 'LanguageCode', student.lang_code, contextDateStr)
-        self._add_examinee_attribute(examinee, 'EnglishLanguageProficiencyLevel', student.lang_prof_level, contextDateStr)
-        self._add_examinee_attribute(examinee, 'EnglishLanguageAcquisitionStatus', student.elas, contextDateStr)
-        self._add_examinee_attribute(examinee, 'EnglishLanguageAcquisitionStatusStartDate', student.elas_start_date, contextDateStr)
-        self._add_examinee_attribute(examinee, 'MigrantStatus', self._map_yes_no(student.prg_migrant), contextDateStr)
-        self._add_examinee_attribute(examinee, 'MilitaryConnectedStudentIndicator', student.military_connected, contextDateStr)
-        # The generated groups aren't really that useful so let's not emit them
-        # self._add_examinee_attribute(examinee, 'StudentGroupName', student.group_1_text, contextDateStr)
-        # self._add_examinee_attribute(examinee, 'StudentGroupName', student.group_2_text, contextDateStr)
-        # self._add_examinee_attribute(examinee, 'StudentGroupName', student.group_3_text, contextDateStr)
-        # self._add_examinee_attribute(examinee, 'StudentGroupName', student.group_4_text, contextDateStr)
-        # self._add_examinee_attribute(examinee, 'StudentGroupName', student.group_5_text, contextDateStr)
-        # self._add_examinee_attribute(examinee, 'StudentGroupName', student.group_6_text, contextDateStr)
-        # self._add_examinee_attribute(examinee, 'StudentGroupName', student.group_7_text, contextDateStr)
-        # self._add_examinee_attribute(examinee, 'StudentGroupName', student.group_8_text, contextDateStr)
-        # self._add_examinee_attribute(examinee, 'StudentGroupName', student.group_9_text, contextDateStr)
-        # self._add_examinee_attribute(examinee, 'StudentGroupName', student.group_10_text, contextDateStr)
-        self._add_examinee_attribute(examinee, 'Advancement', self._map_advancement(student), contextDateStr)
-        self._add_examinee_attribute(examinee, 'Capability', student.capability.get(asmt.subject.code, 0.0), contextDateStr)
-
-        school = outcome.school
-        self._add_examinee_relationship(examinee, 'StateAbbreviation', school.district.state.code, contextDateStr)
-        self._add_examinee_relationship(examinee, 'StateName', school.district.state.name, contextDateStr)
-        self._add_examinee_relationship(examinee, 'DistrictId', school.district.id, contextDateStr)
-        self._add_examinee_relationship(examinee, 'DistrictName', school.district.name, contextDateStr)
-        self._add_examinee_relationship(examinee, 'SchoolId', school.id, contextDateStr)
-        self._add_examinee_relationship(examinee, 'SchoolName', school.name, contextDateStr)
+        attributes, relationships = trt.examinee_values(outcome)
+        for name, value in attributes:
+            self._add_examinee_attribute(examinee, name, value, contextDateStr)
+        for name, value in relationships:
+            self._add_examinee_relationship(examinee, name, value, contextDateStr)
 
         # write Opportunity
         opportunity = SubElement(root, 'Opportunity')
@@ -207,43 +229,288 @@ class XmlWorker(Worker):
             for trait_score in outcome.trait_scores:
                 self._add_trait_score(opportunity, trait_score.code, trait_score.score, trait_score.condition_code)
 
-        for item_data in outcome.item_data:
-            item = SubElement(opportunity, 'Item')
-            item.set('bankKey', item_data.item.bank_key)
-            item.set('key', item_data.item.item_key)
-            item.set('position', str(item_data.item.position))
-            item.set('segmentId', item_data.item.segment_id)
-            item.set('format', item_data.item.type)
-            item.set('operational', item_data.item.operational)
-            item.set('isSelected', item_data.is_selected)
-            item.set('adminDate', item_data.admin_date.isoformat())
-            item.set('numberVisits', str(item_data.number_visits))
-            item.set('pageNumber', str(item_data.page_number))
-            item.set('pageVisits', str(item_data.page_visits))
-            item.set('pageTime', str(item_data.page_time))
-            item.set('responseDuration', str(item_data.page_time / 1000.0))
-            item.set('dropped', item_data.dropped)
-            item.set('score', str(item_data.score))
-            item.set('scoreStatus', item_data.score_status)
-            item.set('mimeType', 'text/plain')      # TODO
-
-            # summative results should not have item response included (business policy)
-            if not asmt.is_summative():
-                response = SubElement(item, 'Response')
-                response.set('date', item_data.response_date.isoformat())
-                response.set('type', 'value')
-                response.text = item_data.response_value
-
-            if item_data.sub_scores:
-                scoreInfo = self._add_score_info(item, 'Overall', item_data.score)
-                subScoreList = SubElement(scoreInfo, 'SubScoreList')
-                self._add_score_info(subScoreList, 'Organization/Purpose', item_data.sub_scores[0])
-                self._add_score_info(subScoreList, 'Evidence/Elaboration', item_data.sub_scores[1])
-                self._add_score_info(subScoreList, 'Conventions', item_data.sub_scores[2])
-
-        xml = tostring(root, 'unicode')
-        with open(self.file_path_for_outcome(outcome), "w") as f:
-            f.write(xml)
+        responses = outcome.item_data
+        if responses:
+            admin_date = responses.admin_date.isoformat()
+            for asmt_item, selected, page_time, score, response_value, sub_scores, offset in responses.rows():
+                item = SubElement(opportunity, 'Item')
+                item.set('bankKey', asmt_item.bank_key)
+                item.set('key', asmt_item.item_key)
+                item.set('position', str(asmt_item.position))
+                item.set('segmentId', asmt_item.segment_id)
+                item.set('format', asmt_item.type)
+                item.set('operational', asmt_item.operational)
+                item.set('isSelected', '1' if selected else '0')
+                item.set('adminDate', admin_date)
+                item.set('numberVisits', str(responses.number_visits))
+                item.set('pageNumber', str(responses.page_number))
+                item.set('pageVisits', str(responses.page_visits))
+                item.set('pageTime', str(page_time))
+                item.set('responseDuration', str(page_time / 1000.0))
+                item.set('dropped', responses.dropped)
+                item.set('score', str(score))
+                item.set('scoreStatus', responses.score_status)
+                item.set('mimeType', 'text/plain')      # TODO
+
+                # summative results should not have item response included (business policy)
+                if not asmt.is_summative():
+                    response = SubElement(item, 'Response')
+                    response.set('date', response_date(responses.admin_date, offset).isoformat())
+                    response.set('type', 'value')
+                    response.text = response_value
+
+                if sub_scores:
+                    scoreInfo = self._add_score_info(item, 'Overall', score)
+                    subScoreList = SubElement(scoreInfo, 'SubScoreList')
+                    self._add_score_info(subScoreList, 'Organization/Purpose', sub_scores[0])
+                    self._add_score_info(subScoreList, 'Evidence/Elaboration', sub_scores[1])
+                    self._add_score_info(subScoreList, 'Conventions', sub_scores[2])
+
+        return tostring(root, 'unicode')
+
+    def _stream_xml(self, outcome: AssessmentOutcome, out):
+        """
+        Serialize an outcome by streaming the elements to a file, without building a tree.
+        The document is the same as _etree_xml's.
+
+        :param outcome: outcome
+        :param out: text file to write to
+        """
+        xml = TrtXMLGenerator(out)
+        xml.startElement('TDSReport', {})
+
+        asmt = outcome.assessment
+        # in TRT, the testId is the name and the name is the id
+        _stream_element(xml, 'Test', {
+            'testId': asmt.name, 'name': asmt.id, 'subject': asmt.subject.code, 'grade': trt.map_grade(asmt.grade),
+            'assessmentType': trt.map_asmt_type(asmt.type), 'academicYear': str(asmt.year),
+            'assessmentVersion': asmt.version, 'contract': asmt.contract, 'mode': asmt.mode})
+
+        xml.startElement('Examinee', {'key': str(outcome.student.rec_id)})
+        context_date = outcome.status_date.isoformat()
+        attributes, relationships = trt.examinee_values(outcome)
+        for tag, values in (('ExamineeAttribute', attributes), ('ExamineeRelationship', relationships)):
+            for name, value in values:
+                if value:
+                    _stream_element(xml, tag, {'context': 'FINAL', 'name': name, 'value': str(value),
+                                               'contextDate': context_date})
+        xml.endElement('Examinee')
+
+        xml.startElement('Opportunity', {
+            'server': outcome.server, 'database': outcome.database, 'clientName': outcome.client_name,
+            'status': outcome.status, 'completeness': outcome.completeness, 'completeStatus': outcome.completeness,
+            'key': str(outcome.rec_id), 'oppId': str(outcome.rec_id), 'opportunity': '5',
+            'startDate': outcome.start_date.isoformat(), 'statusDate': outcome.status_date.isoformat(),
+            'dateCompleted': outcome.submit_date.isoformat(), 'itemCount': str(len(outcome.item_data)),
+            'ftCount': '0', 'pauseCount': '0', 'abnormalStarts': '0', 'gracePeriodRestarts': '0',
+            'sessionId': outcome.session, 'windowId': 'WINDOW_ID', 'administrationCondition': outcome.admin_condition,
+            'assessmentParticipantSessionPlatformUserAgent': '', 'effectiveDate': asmt.effective_date.isoformat()})
+
+        if asmt.segment:
+            _stream_element(xml, 'Segment', {
+                'id': asmt.segment.id, 'position': str(asmt.segment.position), 'algorithm': asmt.segment.algorithm,
+                'algorithmVersion': asmt.segment.algorithm_version})
+
+        for (type, code, value) in outcome.accommodations:
+            _stream_element(xml, 'Accommodation', {'type': type, 'code': code, 'value': value, 'segment': '0'})
+
+        self._stream_scale_score(xml, 'Overall', outcome.overall.score, outcome.overall.stderr,
+                                 outcome.overall.perf_lvl)
+        if not asmt.is_iab():
+            for score in (outcome.alt_scores or []) + (outcome.claim_scores or []):
+                self._stream_scale_score(xml, score.code, score.score, score.stderr, score.perf_lvl)
+        for target_score in outcome.target_scores or []:
+            _stream_score(xml, target_score.id, 'StudentRelativeResidualScore', target_score.student_residual, 0.0)
+            _stream_score(xml, target_score.id, 'StandardMetRelativeResidualScore',
+                          target_score.standard_met_residual, 0.0)
+        for trait_score in outcome.trait_scores or []:
+            _stream_score(xml, trait_score.code, 'RawScore', trait_score.score, None, trait_score.condition_code)
+
+        # summative results should not have item response included (business policy)
+        response = not asmt.is_summative()
+        responses = outcome.item_data
+        if responses:
+            admin_date = responses.admin_date.isoformat()
+            for item, selected, page_time, score, response_value, sub_scores, offset in responses.rows():
+                xml.startElement('Item', {
+                    'bankKey': item.bank_key, 'key': item.item_key, 'position': str(item.position),
+                    'segmentId': item.segment_id, 'format': item.type, 'operational': item.operational,
+                    'isSelected': '1' if selected else '0', 'adminDate': admin_date,
+                    'numberVisits': str(responses.number_visits), 'pageNumber': str(responses.page_number),
+                    'pageVisits': str(responses.page_visits), 'pageTime': str(page_time),
+                    'responseDuration': str(page_time / 1000.0), 'dropped': responses.dropped,
+                    'score': str(score), 'scoreStatus': responses.score_status, 'mimeType': 'text/plain'})
+                if response:
+                    xml.startElement('Response', {'date': response_date(responses.admin_date, offset).isoformat(),
+                                                  'type': 'value'})
+                    if response_value:
+                        xml.characters(response_value)
+                    xml.endElement('Response')
+                if sub_scores:
+                    xml.startElement('ScoreInfo', _score_info('Overall', score))
+                    xml.startElement('SubScoreList', {})
+                    for dimension, points in zip(('Organization/Purpose', 'Evidence/Elaboration', 'Conventions'),
+                                                 sub_scores):
+                        _stream_element(xml, 'ScoreInfo', _score_info(dimension, points))
+                    xml.endElement('SubScoreList')
+                    xml.endElement('ScoreInfo')
+                xml.endElement('Item')
+
+        xml.endElement('Opportunity')
+        xml.endElement('TDSReport')
+
+    def _stream_xml_string(self, outcome: AssessmentOutcome):
+        out = io.StringIO()
+        self._stream_xml(outcome, out)
+        return out.getvalue()
+
+    def _stream_scale_score(self, xml: TrtXMLGenerator, measure, scale_score, scale_score_stderr, perf_lvl):
+        if scale_score:
+            _stream_score(xml, measure, 'ScaleScore', scale_score, scale_score_stderr)
+        if perf_lvl:
+            _stream_score(xml, measure, 'PerformanceLevel', perf_lvl, '')
+
+    def _template_xml(self, outcome: AssessmentOutcome):
+        """
+        Serialize an outcome by filling in the TRT templates. The document is the same as _etree_xml's.
+
+        :param outcome: outcome
+        :return: TRT XML
+        """
+        asmt = outcome.assessment
+        test = self._test_fragments.get(asmt)
+        if test is None:
+            # in TRT, the testId is the name and the name is the id
+            test = self._test_fragments[asmt] = trt.TEST.format(
+                escape_attrib(asmt.name), escape_attrib(asmt.id), escape_attrib(asmt.subject.code),
+                trt.map_grade(asmt.grade), trt.map_asmt_type(asmt.type), asmt.year, escape_attrib(asmt.version),
+                escape_attrib(asmt.contract), escape_attrib(asmt.mode))
+        parts = ['<TDSReport>', test, outcome.status_date.isoformat().join(self._examinee_fragment(outcome))]
+
+        parts.append(trt.OPPORTUNITY.format(
+            escape_attrib(outcome.server), escape_attrib(outcome.database), escape_attrib(outcome.client_name),
+            escape_attrib(outcome.status), escape_attrib(outcome.completeness), escape_attrib(outcome.completeness),
+            outcome.rec_id, outcome.rec_id, outcome.start_date.isoformat(), outcome.status_date.isoformat(),
+            outcome.submit_date.isoformat(), len(outcome.item_data), escape_attrib(outcome.session),
+            escape_attrib(outcome.admin_condition), asmt.effective_date.isoformat()))
+        opportunity = []
+
+        if asmt.segment:
+            segment = asmt.segment
+            opportunity.append(trt.SEGMENT.format(escape_attrib(segment.id), segment.position,
+                                                  escape_attrib(segment.algorithm),
+                                                  escape_attrib(segment.algorithm_version)))
+
+        for (type, code, value) in outcome.accommodations:
+            opportunity.append(trt.ACCOMMODATION.format(escape_attrib(type), escape_attrib(code), escape_attrib(value)))
+
+        # add scores
+        self._template_scale_score(opportunity, 'Overall', outcome.overall.score, outcome.overall.stderr,
+                                   outcome.overall.perf_lvl)
+        if not asmt.is_iab() and outcome.alt_scores:
+            for score in outcome.alt_scores:
+                self._template_scale_score(opportunity, score.code, score.score, score.stderr, score.perf_lvl)
+        if not asmt.is_iab() and outcome.claim_scores:
+            for score in outcome.claim_scores:
+                self._template_scale_score(opportunity, score.code, score.score, score.stderr, score.perf_lvl)
+        if outcome.target_scores:
+            for target_score in outcome.target_scores:
+                measure = escape_attrib(target_score.id)
+                opportunity.append(trt.SCORE.format(measure, 'StudentRelativeResidualScore',
+                                                    target_score.student_residual, ''))
+                opportunity.append(trt.SCORE.format(measure, 'StandardMetRelativeResidualScore',
+                                                    target_score.standard_met_residual, ''))
+        if outcome.trait_scores:
+            for trait_score in outcome.trait_scores:
+                opportunity.append(trt.TRAIT_SCORE.format(escape_attrib(trait_score.code), trait_score.score,
+                                                          escape_attrib(trait_score.condition_code)))
+
+        # summative results should not have item response included (business policy)
+        with_response = not asmt.is_summative()
+        item_fragments = self._item_fragments
+        responses = outcome.item_data
+        if responses:
+            # the item data attributes after isSelected and before pageTime are the same for every item
+            admin_date = responses.admin_date.isoformat()
+            dropped, score_status = escape_attrib(responses.dropped), escape_attrib(responses.score_status)
+            for item, selected, page_time, score, response_value, sub_scores, offset in responses.rows():
+                fragment = item_fragments.get(item)
+                if fragment is None:
+                    fragment = item_fragments[item] = trt.ITEM.format(
+                        escape_attrib(item.bank_key), escape_attrib(item.item_key), item.position,
+                        escape_attrib(item.segment_id), escape_attrib(item.type), escape_attrib(item.operational))
+                opportunity.append(fragment)
+                opportunity.append(trt.ITEM_DATA.format(
+                    '1' if selected else '0', admin_date, responses.number_visits, responses.page_number,
+                    responses.page_visits, page_time, page_time / 1000.0, dropped, score, score_status))
+
+                if not with_response and not sub_scores:
+                    opportunity.append(' />')
+                    continue
+                opportunity.append('>')
+                if with_response:
+                    opportunity.append(trt.RESPONSE.format(response_date(responses.admin_date, offset).isoformat()))
+                    if response_value:
+                        opportunity.append('>')
+                        opportunity.append(escape_text(response_value))
+                        opportunity.append('</Response>')
+                    else:
+                        opportunity.append(' />')
+                if sub_scores:
+                    opportunity.append(trt.WER_SCORE_INFO.format(score, *sub_scores[:3]))
+                opportunity.append('</Item>')
+
+        if opportunity:
+            parts.append('>')
+            parts.extend(opportunity)
+            parts.append('</Opportunity>')
+        else:
+            parts.append(' />')
+
+        parts.append('</TDSReport>')
+        return ''.join(parts)
+
+    def _examinee_fragment(self, outcome: AssessmentOutcome):
+        """
+        Get the Examinee element of an outcome, rendered once per student and subject (the capability is
+        per subject). Students only change between years, and the relationships are to the outcome's school,
+        so the fragments are kept for the current school and year and dropped when that changes.
+
+        :param outcome: outcome
+        :return: list of the parts of the element between context dates
+        """
+        asmt = outcome.assessment
+        scope = (outcome.school, asmt.year)
+        if scope != self._examinee_scope:
+            self._examinee_fragments.clear()
+            self._examinee_scope = scope
+
+        student = outcome.student
+        key = (student, asmt.subject.code)
+        fragment = self._examinee_fragments.get(key)
+        if fragment is not None:
+            return fragment
+
+        fragment = []
+        current = trt.EXAMINEE.format(student.rec_id)
+        attributes, relationships = trt.examinee_values(outcome)
+        for template, values in ((trt.EXAMINEE_ATTRIBUTE, attributes), (trt.EXAMINEE_RELATIONSHIP, relationships)):
+            for name, value in values:
+                if value:
+                    fragment.append(current + ('>' if not fragment else '') +
+                                    template.format(name, escape_attrib(str(value))))
+                    current = trt.CONTEXT_DATE_END
+        fragment.append(current + ('</Examinee>' if fragment else ' />'))
+
+        self._examinee_fragments[key] = fragment
+        return fragment
+
+    def _template_scale_score(self, parts, measure, scale_score, scale_score_stderr, perf_lvl):
+        if scale_score:
+            parts.append(trt.SCORE.format(escape_attrib(measure), 'ScaleScore', scale_score,
+                                          scale_score_stderr if scale_score_stderr else ''))
+        if perf_lvl:
+            parts.append(trt.SCORE.format(escape_attrib(measure), 'PerformanceLevel', perf_lvl, ''))
 
     def file_path_for_outcome(self, outcome: AssessmentOutcome):
         """
@@ -253,12 +520,74 @@ class XmlWorker(Worker):
         :param outcome:
         :return:
         """
-        path = os.path.join(self.out_path_root,
-                            outcome.school.district.state.code,
-                            outcome.school.district.id,
-                            outcome.school.id)
+        return os.path.join(self._school_dir(outcome.school), str(outcome.rec_id)) + '.xml'
+
+    def _school_dir(self, school):
+        """
+        Get the output directory of a school, state/district/school. The directory is created the first time,
+        after that it's known to exist (this worker is the only one writing the school's outcomes).
+
+        :param school: school
+        :return: directory
+        """
+        path = self._dirs.get(school)
+        if path is not None:
+            self._makedirs_avoided += 1
+            return path
+        path = os.path.join(self.out_path_root, school.district.state.code, school.district.id, school.id)
+        os.makedirs(path, exist_ok=True)
+        self._dirs[school] = path
+        return path
+
+    def _district_dir(self, district):
+        """
+        Get the output directory of a district, state/district, creating it the first time.
+
+        :param district: district
+        :return: directory
+        """
+        path = self._dirs.get(district)
+        if path is not None:
+            self._makedirs_avoided += 1
+            return path
+        path = os.path.join(self.out_path_root, district.state.code, district.id)
         os.makedirs(path, exist_ok=True)
-        return os.path.join(path, str(outcome.rec_id)) + '.xml'
+        self._dirs[district] = path
+        return path
+
+    def member_name_for_outcome(self, outcome: AssessmentOutcome):
+        """
+        Build the archive member name for this outcome, the same as its file path relative to the output directory.
+
+        :param outcome:
+        :return:
+        """
+        return '/'.join((outcome.school.district.state.code, outcome.school.district.id, outcome.school.id,
+                         str(outcome.rec_id) + '.xml'))
+
+    def _archive_for_outcome(self, outcome: AssessmentOutcome):
+        """
+        Get the archive for the school and year of this outcome, e.g. CA/0600001/060000100001.2019.tar.gz,
+        finishing the previous archive if it's for another school or year.
+        Make sure parent folders exist.
+
+        :param outcome:
+        :return: archive writer
+        """
+        key = (outcome.school, outcome.assessment.year)
+        if key == self._archive_key:
+            return self._archive_writer
+
+        self.flush()
+        if key in self._archived:
+            raise RuntimeError('The outcomes of school {} for {} were already archived'.format(outcome.school.id, key[1]))
+        self._archived.add(key)
+
+        path = self._district_dir(outcome.school.district)
+        self._archive_writer = ArchiveWriter(
+            os.path.join(path, '{}.{}.{}'.format(outcome.school.id, key[1], self.archive)), self.archive)
+        self._archive_key = key
+        return self._archive_writer
 
     def _add_examinee_attribute(self, parent, name, value, contextDateStr):
         if value:
@@ -305,22 +634,19 @@ class XmlWorker(Worker):
         scoreInfo.set('scoreStatus', 'Scored')
         return scoreInfo
 
-    def _map_asmt_type(self, value):
-        return 'Summative' if 'sum' in value.lower() else 'Interim'
 
-    def _map_gender(self, value):
-        if 'female' == value.lower(): return 'Female'
-        if 'male' == value.lower(): return 'Male'
-        if 'non_binary' == value.lower(): return 'NonBinary'
-        return None
+def _stream_element(xml: TrtXMLGenerator, tag: str, attributes: {str: str}):
+    xml.startElement(tag, attributes)
+    xml.endElement(tag)
+
 
-    def _map_yes_no(self, value):
-        return 'Yes' if value else 'No'
+def _stream_score(xml: TrtXMLGenerator, measure, label, value, stderr, condition_code=None):
+    attributes = {'measureOf': measure, 'measureLabel': label, 'value': str(value),
+                  'standardError': str(stderr) if stderr else ''}
+    if condition_code is not None:
+        attributes['conditionCode'] = condition_code
+    _stream_element(xml, 'Score', attributes)
 
-    def _map_advancement(self, student):
-        if student.held_back: return 'HeldBack'
-        if student.transfer: return 'Transfer'
-        return 'Normal'
 
-    def _map_grade(self, value):
-        return 'KG' if value == 0 else '{:02}'.format(value)
+def _score_info(dimension, points):
+    return {'maxScore': '0', 'scoreDimension': dimension, 'scorePoint': str(points), 'scoreStatus': 'Scored'}
@@ -16,9 +16,11 @@ from datagen.model.scorable import Scorable
 from datagen.model.segment import AssessmentSegment
 from datagen.model.subject import Subject
 from datagen.util.id_gen import IDGen
+from datagen.util.rng import derive_rng
 
 
-def load_assessments(glob_pattern, subjects: [Subject], load_sum, load_ica, load_iab, load_items) -> [Assessment]:
+def load_assessments(glob_pattern, subjects: [Subject], load_sum, load_ica, load_iab, load_items,
+                     seed=None) -> [Assessment]:
     """
     Load assessments from any csv file in the given directory
 
@@ -28,15 +30,17 @@ def load_assessments(glob_pattern, subjects: [Subject], load_sum, load_ica, load
     :param load_ica: True to load ICAs
     :param load_iab: True to load IABs
     :param load_items: True to load items, False to ignore item data
+    :param seed: (optional) seed the generated ids of each assessment are derived from
     :return: loaded assessments
     """
     assessments = []
-    for file in (glob.glob(glob_pattern)):
-        assessments.extend(load_assessments_file(file, subjects, load_sum, load_ica, load_iab, load_items))
+    for file in sorted(glob.glob(glob_pattern)):
+        assessments.extend(load_assessments_file(file, subjects, load_sum, load_ica, load_iab, load_items, seed))
     return assessments
 
 
-def load_assessments_file(file, subjects: [Subject], load_sum, load_ica, load_iab, load_items) -> [Assessment]:
+def load_assessments_file(file, subjects: [Subject], load_sum, load_ica, load_iab, load_items,
+                          seed=None) -> [Assessment]:
     """
     Load assessments from a single tabulator csv file
 
@@ -46,6 +50,7 @@ def load_assessments_file(file, subjects: [Subject], load_sum, load_ica, load_ia
     :param load_ica: True to load ICAs
     :param load_iab: True to load IABs
     :param load_items: True to load items, False to ignore item data
+    :param seed: (optional) seed the generated ids of each assessment are derived from
     :return: loaded assessments
     """
     assessments = []
@@ -87,12 +92,12 @@ def load_assessments_file(file, subjects: [Subject], load_sum, load_ica, load_ia
                 assessments.append(asmt)
                 parse_asmt = True
 
-            __load_row(row, asmt, parse_asmt, parse_item)
+            __load_row(row, asmt, parse_asmt, parse_item, seed)
 
     return assessments
 
 
-def __load_row(row, asmt: Assessment, parse_asmt, parse_item):
+def __load_row(row, asmt: Assessment, parse_asmt, parse_item, seed=None):
     if parse_asmt:
         asmt.id = row['AssessmentId']
         asmt.name = row['AssessmentName']
@@ -122,7 +127,8 @@ def __load_row(row, asmt: Assessment, parse_asmt, parse_item):
         # if items are being parsed, create segment and list
         if parse_item:
             asmt.segment = AssessmentSegment()
-            asmt.segment.id = IDGen.get_uuid()
+            # derived from the assessment (not the order it's loaded in) so it doesn't depend on the other packages
+            asmt.segment.id = IDGen.get_uuid(derive_rng(seed, 'assessments', asmt.id) if seed is not None else None)
             asmt.item_bank = []
             asmt.item_total_score = 0
 
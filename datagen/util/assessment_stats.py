@@ -5,7 +5,7 @@ from functools import partial, reduce
 from operator import mul
 
 from datagen.util.stats import normalize
-from datagen.util.weighted_choice import weighted_choice
+from datagen.util.weighted_choice import AliasSampler
 
 product = partial(reduce, mul)
 
@@ -73,6 +73,10 @@ class RandomLevelByDemographics:
 
     This allows us to construct an approximate distribution, which we can use to choose a random level. In
     practice, this approximation seems to conform to the demographic distributions within a couple of percent.
+
+    The demographics take a handful of values each, so the distribution of each combination of values is
+    computed once and kept, with its cumulative table and alias tables, so a random capability or level is drawn
+    with a lookup.
     """
 
     def __init__(self,
@@ -80,6 +84,8 @@ class RandomLevelByDemographics:
                  level_breakdowns: GradeLevels):
         self.demographics = demographics
         self.level_breakdowns = level_breakdowns
+        # (distribution, cumulative table, AliasSampler) by the entity's (demographic name, value) pairs, see _compiled
+        self._distributions = {}
 
     def _p_demo_is_val_given_level(self,
                                    demo_name: str,
@@ -110,6 +116,24 @@ class RandomLevelByDemographics:
 
         @returns a list of floats, which sums to 1.
         """
+        return self._compiled(entity)[0]
+
+    def _compiled(self, entity: dict) -> ([float], [float], AliasSampler):
+        """
+        Get the distribution for a student, its cumulative table (0 followed by the running sums of the
+        distribution) and a sampler of its levels (None if all the probabilities are 0), computing them the
+        first time.
+        """
+        key = tuple(entity.items())
+        compiled = self._distributions.get(key)
+        if compiled is None:
+            # kept as tuples, so they can't be changed by a caller
+            distribution = tuple(self._distribution(entity))
+            sampler = AliasSampler(dict(enumerate(distribution))) if any(distribution) else None
+            compiled = self._distributions[key] = (distribution, _cumulative(distribution), sampler)
+        return compiled
+
+    def _distribution(self, entity: dict) -> [float]:
         probs = [(self._p_score_is_level(level) *
                   product(self._p_demo_is_val_given_level(demo_name, demo_val, level)
                           for demo_name, demo_val in entity.items()))
@@ -125,31 +149,56 @@ class RandomLevelByDemographics:
         """
         Given a student, return a random level chosen according to their demographic values
         """
-        probs = {i: prob for i, prob in enumerate(self.distribution(entity))}
+        if seed is not None:
+            rng.seed(seed)
 
-        if all(prob == 0.0 for prob in probs.values()):
+        distribution, _, sampler = self._compiled(entity)
+        if sampler is None:
             # the demographics say this student doesn't exist...
-            return rng.choice(list(probs.keys()))
+            return rng.choice(range(len(distribution)))
 
-        return weighted_choice(probs, rng=rng, seed=seed)
+        return sampler.choose(rng)
 
+    def random_capability(self, entity: dict, adj: float = 0.0, rng=random) -> float:
+        """
+        Given a student, return a random fractional level according to their demographic values, as
+        random_capability does for their distribution.
+        """
+        return _capability(self._compiled(entity)[1], adj, rng)
 
-def random_capability(distribution: [float], adj: float = 0.0) -> float:
+
+def random_capability(distribution: [float], adj: float = 0.0, rng=random) -> float:
     """
     Given a distribution, e.g. [0.04,0.32,0.57,0.07] this will return the fractional level of a
     random value. The return will be 0-N where N is the number of values in the distribution.
 
     :param distribution: normalized distribution (i.e. adds up to 1)
     :param adj: optional capability adjustment (-1, +1) (gamma correction so negative reduces capability)
+    :param rng: random number generator
     :return: fractional value 0-N
     """
+    return _capability(_cumulative(distribution), adj, rng)
+
+
+def _cumulative(distribution: [float]) -> (float,):
+    """
+    :param distribution: distribution
+    :return: cumulative table of the distribution, a leading 0 followed by the running sums
+    """
+    return (0.0,) + tuple(itertools.accumulate(distribution))
+
+
+def _capability(values: [float], adj: float, rng) -> float:
+    """
+    Draw a random capability, see random_capability.
+
+    :param values: cumulative table of the distribution, see _cumulative
+    """
     # in theory this can be any size distribution but we know it is for performance levels so should be 4
-    n = len(distribution)
+    n = len(values) - 1
     assert n == 4
 
-    # accumulate values and stick a leading 0 in there
-    values = [0.0] + list(itertools.accumulate(distribution))
-    value = random.uniform(0, values[-1])
+    value = rng.uniform(0, values[-1])
     for i in range(0, n):
         if value < values[i + 1]:
             return adjust_capability(i + ((value - values[i]) / (values[i + 1] - values[i])), adj)
@@ -173,7 +222,7 @@ def inverse_adjustment(adj: float) -> float:
     return -adj / (1.0 - adj)
 
 
-def score_given_capability(capability: float, cuts: [int]) -> (int, int):
+def score_given_capability(capability: float, cuts: [int], rng=random) -> (int, int):
     """
     Generate a score given a student capability. Because the capability is decimal it gives
     us what we need to interpolate between cut point levels. Randomness is added using a
@@ -181,12 +230,13 @@ def score_given_capability(capability: float, cuts: [int]) -> (int, int):
 
     :param capability: float value [0.0, 4.0)
     :param cuts: the cut points for the levels, inc. min and max
+    :param rng: random number generator
     :return: score between min-max from cuts and level based on cuts
     """
     mu = int(cuts[0] + capability * (cuts[-1] - cuts[0]) / 4.0)
     level = performance_level(mu, cuts)
     sigma = (cuts[level] - cuts[level - 1]) / 8.0
-    score = min(cuts[-1] - 1, max(cuts[0], int(random.gauss(mu, sigma))))
+    score = min(cuts[-1] - 1, max(cuts[0], int(rng.gauss(mu, sigma))))
     level = performance_level(score, cuts)
     return score, level
 
@@ -210,7 +260,7 @@ def performance_level(score: float, cuts: [int]) -> int:
     return len(cuts) - 2
 
 
-def random_subscores(score: int, weights: [float], score_min: int, score_max: int) -> [int]:
+def random_subscores(score: int, weights: [float], score_min: int, score_max: int, rng=random) -> [int]:
     """
     generate random sub scores such that score == sum(weight[i] * subscore[i] for i in NUMBER_OF_CLAIMS)
     """
@@ -220,7 +270,7 @@ def random_subscores(score: int, weights: [float], score_min: int, score_max: in
     # note: I don't think this actually produces a uniform distribution, but at least it doesn't
     # treat subscores with the same weight differently depending on their order
     ordered = list(enumerate(weights))
-    random.shuffle(ordered)
+    rng.shuffle(ordered)
     order, weights = zip(*ordered)
 
     subscores = []
@@ -239,7 +289,7 @@ def random_subscores(score: int, weights: [float], score_min: int, score_max: in
         assert min_ <= max_, '{} {}'.format(min_, max_)
 
         # try to lean towards the score for each claim
-        claim = int(random.triangular(min_, max_, score)) if min_ < score < max_ else random.randint(min_, max_)
+        claim = int(rng.triangular(min_, max_, score)) if min_ < score < max_ else rng.randint(min_, max_)
 
         subscores.append(claim)
 
@@ -251,16 +301,17 @@ def random_subscores(score: int, weights: [float], score_min: int, score_max: in
     return tuple(subscores[order.index(i)] for i in range(len(weights)))
 
 
-def random_stderr(claim_score: int, claim_min: int, claim_max: int):
+def random_stderr(claim_score: int, claim_min: int, claim_max: int, rng=random):
     """Generate a std error for a claim score.
     Not sure if it is valid but this will give a larger error, the lower the score.
 
     :param claim_score: score
     :param claim_min: min possible score
     :param claim_max: max possible score
+    :param rng: random number generator
     :return: std error
     """
-    return 25 + random.randint(0, 60 + round(120 * (claim_max - claim_score) / (claim_max - claim_min)))
+    return 25 + rng.randint(0, 60 + round(120 * (claim_max - claim_score) / (claim_max - claim_min)))
 
 
 def claim_perf_lvl(claim_score: int, claim_error: int, perf_cut_point: int):
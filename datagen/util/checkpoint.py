@@ -0,0 +1,108 @@
+"""
+Checkpoint of a data generation run, so a run that dies can be resumed.
+
+Because the random streams are derived from the seed and the district/year/school, and the ids from
+the district's lanes (see IDGen.partition), a district generates exactly the same data whenever it is
+generated. So the checkpoint only needs to record the seed, the finished districts and enough to make
+sure the resumed run is the same run. Districts may also save their cohort after each year (see
+datagen.util.cohort) to resume part way through the district.
+
+"""
+
+import json
+import os
+
+
+class Checkpoint:
+    def __init__(self, out_dir: str):
+        """
+        :param out_dir: output directory of the run
+        """
+        self.file = os.path.join(out_dir, 'checkpoint.json')
+        self.cohort_dir = os.path.join(out_dir, 'checkpoint')
+        self.seed = None
+        self.shard = None
+        self.ids = None
+        self.districts = {}
+
+    def load(self) -> bool:
+        """
+        Load the checkpoint file, if there is one.
+
+        :return: True if a checkpoint was loaded
+        """
+        if not os.path.isfile(self.file):
+            return False
+        with open(self.file) as f:
+            state = json.load(f)
+        self.seed = state['seed']
+        self.shard = state['shard']
+        self.ids = state['ids']
+        self.districts = {district_id: tuple(counts) for district_id, counts in state['districts'].items()}
+        return True
+
+    def start(self, seed, shard, ids: dict):
+        """
+        Start a new run: forget any finished districts and saved cohorts.
+
+        :param seed: seed of the run
+        :param shard: shard of the run (or None)
+        :param ids: state of the id generator once the hierarchy is built
+        """
+        self.seed = seed
+        self.shard = shard
+        self.ids = ids
+        self.districts = {}
+        if os.path.isdir(self.cohort_dir):
+            for name in os.listdir(self.cohort_dir):
+                os.remove(os.path.join(self.cohort_dir, name))
+        self.save()
+
+    def validate(self, seed, shard, ids: dict):
+        """
+        Make sure a resumed run matches the checkpoint.
+
+        :raises ValueError: if the run doesn't match
+        """
+        if (seed, shard) != (self.seed, self.shard):
+            raise ValueError('Run (seed {}, shard {}) does not match the checkpoint (seed {}, shard {})'
+                             .format(seed, shard, self.seed, self.shard))
+        if ids != self.ids:
+            raise ValueError('The hierarchy does not match the checkpoint')
+
+    def save(self):
+        """
+        Save the checkpoint file. The file is replaced atomically.
+        """
+        tmp = self.file + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'seed': self.seed, 'shard': self.shard, 'ids': self.ids,
+                       'districts': {district_id: list(counts) for district_id, counts in self.districts.items()}},
+                      f, indent=2)
+        os.replace(tmp, self.file)
+
+    def is_finished(self, district_id) -> bool:
+        return district_id in self.districts
+
+    def finish_district(self, district_id, avg_year, unique):
+        """
+        Record a finished district and save the checkpoint.
+
+        :param district_id: district id
+        :param avg_year: average students/year of the district
+        :param unique: unique students of the district
+        """
+        self.districts[district_id] = (avg_year, unique)
+        self.save()
+        cohort_file = self.cohort_file(district_id)
+        if os.path.isfile(cohort_file):
+            os.remove(cohort_file)
+
+    def cohort_file(self, district_id) -> str:
+        """
+        Get the file a district's cohort is saved to after each year.
+
+        :param district_id: district id
+        :return: cohort file name
+        """
+        return os.path.join(self.cohort_dir, '{}.pickle'.format(district_id))
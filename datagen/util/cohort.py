@@ -0,0 +1,146 @@
+"""
+Save and load the cohort of a district part way through its generation, i.e. the students being carried
+from one year to the next and the district's id generator.
+
+The students refer to the schools (and through them the district and state) of the hierarchy. Those
+aren't saved with the cohort; they are stored by id and resolved against the hierarchy when the cohort
+is loaded, so the loaded students refer to the same objects as the rest of the run.
+
+At the end of a run the final cohort of every district is kept in a CohortStore, so a later run can
+continue with the next year(s) instead of regenerating every year.
+
+"""
+
+import json
+import os
+import pickle
+
+from datagen.model.district import District
+from datagen.model.school import School
+from datagen.model.state import State
+
+
+class _CohortPickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        if isinstance(obj, School):
+            return 'school', obj.id
+        if isinstance(obj, District):
+            return 'district', obj.id
+        if isinstance(obj, State):
+            return 'state', obj.code
+        return None
+
+
+class _CohortUnpickler(pickle.Unpickler):
+    def __init__(self, file, schools: [School]):
+        super().__init__(file)
+        self._objects = {}
+        for school in schools:
+            self._objects[('school', school.id)] = school
+            self._objects[('district', school.district.id)] = school.district
+            self._objects[('state', school.district.state.code)] = school.district.state
+
+    def persistent_load(self, pid):
+        if pid not in self._objects:
+            raise pickle.UnpicklingError('Cohort refers to {} {} which is not in the hierarchy'.format(*pid))
+        return self._objects[pid]
+
+
+def save_cohort(file: str, cohort: dict):
+    """
+    Save a cohort. The file is replaced atomically, so an interrupted save leaves the previous cohort.
+
+    :param file: file to save to
+    :param cohort: dictionary of cohort values, e.g. students, id generator, last completed year
+    """
+    tmp = file + '.tmp'
+    with open(tmp, 'wb') as f:
+        _CohortPickler(f, pickle.HIGHEST_PROTOCOL).dump(cohort)
+    os.replace(tmp, file)
+
+
+def load_cohort(file: str, schools: [School]) -> dict:
+    """
+    Load a cohort saved by save_cohort.
+
+    :param file: file to load from
+    :param schools: schools of the hierarchy (with their districts and state) the cohort refers to
+    :return: dictionary of cohort values
+    """
+    with open(file, 'rb') as f:
+        return _CohortUnpickler(f, schools).load()
+
+
+class CohortStore:
+    def __init__(self, out_dir: str):
+        """
+        :param out_dir: output directory of the run
+        """
+        self.dir = os.path.join(out_dir, 'cohorts')
+        self.file = os.path.join(self.dir, 'cohorts.json')
+        self.seed = None
+        self.shard = None
+        self.ids = None
+        self.year = None
+
+    def load(self) -> bool:
+        """
+        Load the store description, if there is one.
+
+        :return: True if a store was loaded
+        """
+        if not os.path.isfile(self.file):
+            return False
+        with open(self.file) as f:
+            state = json.load(f)
+        self.seed = state['seed']
+        self.shard = state['shard']
+        self.ids = state['ids']
+        self.year = state['year']
+        return True
+
+    def start(self, seed, shard, ids: dict, year: int):
+        """
+        Start a new store: forget any saved cohorts.
+
+        :param seed: seed of the run
+        :param shard: shard of the run (or None)
+        :param ids: state of the id generator once the hierarchy is built
+        :param year: last year of the run, i.e. the year the cohorts finish
+        """
+        self.seed = seed
+        self.shard = shard
+        self.ids = ids
+        self.year = year
+        os.makedirs(self.dir, exist_ok=True)
+        for name in os.listdir(self.dir):
+            os.remove(os.path.join(self.dir, name))
+        tmp = self.file + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'seed': seed, 'shard': shard, 'ids': ids, 'year': year}, f, indent=2)
+        os.replace(tmp, self.file)
+
+    def validate(self, seed, shard, ids: dict, first_year: int):
+        """
+        Make sure a run can continue from the stored cohorts.
+
+        :param first_year: first year of the continuing run
+        :raises ValueError: if the run doesn't match the store
+        """
+        if (seed, shard) != (self.seed, self.shard):
+            raise ValueError('Run (seed {}, shard {}) does not match the stored cohorts (seed {}, shard {})'
+                             .format(seed, shard, self.seed, self.shard))
+        if ids != self.ids:
+            raise ValueError('The hierarchy does not match the stored cohorts')
+        if first_year <= self.year:
+            raise ValueError('The stored cohorts finish in {}, the assessment packages must be for later years'
+                             .format(self.year))
+
+    def cohort_file(self, district_id) -> str:
+        """
+        Get the file a district's final cohort is saved to.
+
+        :param district_id: district id
+        :return: cohort file name
+        """
+        return os.path.join(self.dir, '{}.pickle'.format(district_id))
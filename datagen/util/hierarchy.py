@@ -13,6 +13,7 @@ from datagen.model.district import District
 from datagen.model.school import School
 from datagen.model.state import State
 from datagen.util.id_gen import IDGen
+from datagen.util.rng import derive_rng
 
 CsvFieldNames = [
     'state_id', 'state_code', 'state_name', 'state_type',
@@ -39,20 +40,20 @@ def convert_config_school_count_to_ratios(config):
         config['school_types_and_ratios'][st] = count / ratio_count
 
 
-def generate_hierarchy(type, name, code, id_gen: IDGen):
-    state = hier_gen.generate_state(type, name, code, id_gen)
+def generate_hierarchy(type, name, code, id_gen: IDGen, rng=random):
+    state = hier_gen.generate_state(type, name, code, id_gen, rng=rng)
     districts = []
     schools = []
     for district_type, dist_type_count in state.config['district_types_and_counts']:
         for _ in range(dist_type_count):
-            district = hier_gen.generate_district(district_type, state, id_gen)
+            district = hier_gen.generate_district(district_type, state, id_gen, rng=rng)
             districts.append(district)
 
             # Create the schools for the district
             if district.config['school_counts']['min'] < district.config['school_counts']['avg']:
-                school_count = random.triangular(district.config['school_counts']['min'],
-                                                 district.config['school_counts']['max'],
-                                                 district.config['school_counts']['avg'])
+                school_count = rng.triangular(district.config['school_counts']['min'],
+                                              district.config['school_counts']['max'],
+                                              district.config['school_counts']['avg'])
             else:
                 school_count = district.config['school_counts']['min']
 
@@ -60,12 +61,62 @@ def generate_hierarchy(type, name, code, id_gen: IDGen):
             for school_type, school_type_ratio in district.config['school_types_and_ratios'].items():
                 school_type_count = max(int(school_count * school_type_ratio), 1)  # Make sure at least 1
                 for _ in range(school_type_count):
-                    school = hier_gen.generate_school(school_type, district, id_gen)
+                    school = hier_gen.generate_school(school_type, district, id_gen, rng=rng)
                     schools.append(school)
 
     return state, districts, schools
 
 
+def parse_shard(value: str) -> (int, int):
+    """Parse a shard specification of the form i/N, e.g. 0/4 for the first of four shards.
+
+    :param value: shard specification
+    :return: tuple of shard index and number of shards
+    """
+    try:
+        shard, shards = (int(v) for v in value.split('/'))
+    except ValueError:
+        raise ValueError("Invalid shard '{}', expected i/N, e.g. 0/4".format(value))
+    if not 0 <= shard < shards:
+        raise ValueError("Invalid shard '{}', expected 0 <= i < N".format(value))
+    return shard, shards
+
+
+def shard_hierarchy(districts: [District], schools: [School], shard: int, shards: int) -> ([District], [School]):
+    """Select the districts (and their schools) that make up one shard of a hierarchy.
+
+    The districts are split, in order, into contiguous slices with roughly equal numbers of schools,
+    so concatenating the shards in order gives back the whole hierarchy. A shard may be empty if
+    there are more shards than districts.
+
+    :param districts: all the districts
+    :param schools: all the schools
+    :param shard: index of the shard to select, 0 <= shard < shards
+    :param shards: number of shards
+    :return: tuple of the shard's districts and schools
+    """
+    if not 0 <= shard < shards:
+        raise ValueError('Invalid shard {} of {}'.format(shard, shards))
+
+    school_counts = {}
+    for school in schools:
+        school_counts[school.district] = school_counts.get(school.district, 0) + 1
+    total = sum(max(1, school_counts.get(district, 0)) for district in districts)
+
+    # place each district in the shard containing the midpoint of its schools
+    shard_districts = []
+    before = 0
+    for district in districts:
+        count = max(1, school_counts.get(district, 0))
+        if int(shards * (before + count / 2) / total) == shard:
+            shard_districts.append(district)
+        before += count
+
+    selected = set(shard_districts)
+    shard_schools = [school for school in schools if school.district in selected]
+    return shard_districts, shard_schools
+
+
 def write_hierarchy(file: str, schools: [School]):
     with open(file, "w") as f:
         writer = csv.DictWriter(f, CsvFieldNames)
@@ -74,7 +125,15 @@ def write_hierarchy(file: str, schools: [School]):
             writer.writerow(_school_to_row(school))
 
 
-def read_hierarchy(file: str) -> (State, [District], [School]):
+def read_hierarchy(file: str, seed=None) -> (State, [District], [School]):
+    """
+    Read a hierarchy CSV file.
+
+    :param file: hierarchy CSV file
+    :param seed: (optional) run seed; if given the guids of the state, districts and schools are derived from it
+                 (and their ids) so they are the same in every run
+    :return: tuple of (state, districts, schools)
+    """
     state = None
     districts = []
     schools = []
@@ -88,15 +147,15 @@ def read_hierarchy(file: str) -> (State, [District], [School]):
 
         for row in reader:
             old_state = state
-            state, new_state = _extract_state(row, state)
+            state, new_state = _extract_state(row, state, seed)
             if old_state and new_state:
                 raise ValueError("State mismatch, it must be the same for all rows")
 
-            district, new_district = _extract_district(row, district, state)
+            district, new_district = _extract_district(row, district, state, seed)
             if new_district:
                 districts.append(district)
 
-            school, new_school = _extract_school(row, school, district)
+            school, new_school = _extract_school(row, school, district, seed)
             if new_school:
                 schools.append(school)
 
@@ -122,7 +181,7 @@ def _school_to_row(school: School) -> dict:
     }
 
 
-def _extract_state(row: dict, cur: State) -> (State, bool):
+def _extract_state(row: dict, cur: State, seed=None) -> (State, bool):
     s = State()
     s.type_str = row['state_type']
     s.id = row['state_id']
@@ -137,12 +196,12 @@ def _extract_state(row: dict, cur: State) -> (State, bool):
 
     s.config = state_config.STATE_TYPES[s.type_str]
     s.demo_config = pop_config.DEMOGRAPHICS[s.config['demographics']]
-    s.guid = IDGen.get_uuid()
+    s.guid = _uuid(seed, 'state', s.id)
 
     return s, True
 
 
-def _extract_district(row: dict, cur: District, state: State) -> (District, bool):
+def _extract_district(row: dict, cur: District, state: State, seed=None) -> (District, bool):
     d = District()
     d.type_str = row['district_type']
     d.id = row['district_id']
@@ -157,12 +216,12 @@ def _extract_district(row: dict, cur: District, state: State) -> (District, bool
     d.config = hier_config.DISTRICT_TYPES[d.type_str]
     d.demo_config = state.demo_config
     d.state = state
-    d.guid = IDGen.get_uuid()
+    d.guid = _uuid(seed, 'district', d.id)
 
     return d, True
 
 
-def _extract_school(row: dict, cur: School, district: District) -> (School, bool):
+def _extract_school(row: dict, cur: School, district: District, seed=None) -> (School, bool):
     s = School()
     s.type_str = row['school_type']
     s.id = row['school_id']
@@ -177,7 +236,11 @@ def _extract_school(row: dict, cur: School, district: District) -> (School, bool
     s.config = hier_config.SCHOOL_TYPES[s.type_str]
     s.demo_config = district.demo_config
     s.district = district
-    s.guid = IDGen.get_uuid()
+    s.guid = _uuid(seed, 'school', s.id)
     s.takes_interim_asmts = str(row['school_interims']).lower() in ['1', 't', 'y', 'true', 'yes']
 
     return s, True
+
+
+def _uuid(seed, *keys) -> str:
+    return IDGen.get_uuid(derive_rng(seed, 'hierarchy', *keys) if seed is not None else None)
@@ -3,33 +3,110 @@ Generate IDs that conform to student registration (SBAC) requirements.
 
 """
 
-import multiprocessing
+import random
 
-from random import randrange
-from uuid import uuid4
+from uuid import UUID, uuid4
+
+DEFAULT_BLOCK_SIZE = 1000
+
+# the SSID sequence has only 8 digits, which the lanes of a partitioned generator share equally; it is leased
+# in small blocks so the share of a lane is only rounded down to a multiple of 10 (with blocks of 1000 the share
+# would be nothing beyond 100,000 lanes). The run checks up front that the shares are big enough.
+SSID_BLOCK_SIZE = 10
+SSID_MAX = 99999999
 
 
 class IDGen():
-    def __init__(self, lock=multiprocessing.Lock()):
-        self._rec_id_lock = lock
-        self._rec_id_dict = {}
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE, first_lane=0, lane_count=1, total_lanes=1, bases=None):
+        """
+        Ids are handed out of contiguous blocks leased per type string; there is no locking or shared state.
+
+        To keep ids unique across processes (and separate runs) without sharing a counter, the id space is
+        striped into lanes: each round of leases consists of one block per lane. A generator owns a range
+        of lanes and leases its blocks round-robin across them, so generators owning disjoint lanes never
+        hand out the same id, no matter how many blocks each one uses. A default generator owns the only
+        lane, so its ids are simply sequential.
+
+        :param block_size: number of ids in a leased block
+        :param first_lane: first lane owned by this generator
+        :param lane_count: number of lanes owned by this generator
+        :param total_lanes: total number of lanes the id space is striped into
+        :param bases: (optional) dict of type string -> first id of the striped id space, for types that
+                      were already allocated from elsewhere (see partition)
+        """
+        if lane_count < 1 or first_lane < 0 or first_lane + lane_count > total_lanes:
+            raise ValueError('Invalid lanes {}+{} of {}'.format(first_lane, lane_count, total_lanes))
+        self._block_size = block_size
+        self._first_lane = first_lane
+        self._lane_count = lane_count
+        self._total_lanes = total_lanes
+        self._bases = dict(bases) if bases else {}
+        self._next = {}     # type string -> next id in the current block
+        self._limit = {}    # type string -> end of the current block
+        self._blocks = {}   # type string -> number of blocks leased
+        self._high = {}     # type string -> end of the highest block leased
 
     def __get_next_rec_id(self, type_str, init=1000000000, inc=1):
         """
-        Safely get the next id.
+        Get the next id from the current block, leasing a new block if it is used up.
 
         :param type_str: label for id, e.g. 'student'
         :param init: initial value for id
         :param inc: id increment
         :return: next id
         """
-        with self._rec_id_lock:
-            if type_str not in self._rec_id_dict:
-                self._rec_id_dict[type_str] = init
-            nid = self._rec_id_dict[type_str]
-            self._rec_id_dict[type_str] += inc
+        nid = self._next.get(type_str)
+        if nid is None or nid >= self._limit[type_str]:
+            nid = self.__lease_block(type_str, init, inc)
+        self._next[type_str] = nid + inc
         return nid
 
+    def __lease_block(self, type_str, init, inc):
+        """
+        Lease the next block for the given type. Block j is taken from lane (j mod lane_count) of
+        round (j div lane_count), so the position of every block is known up front. SSIDs are leased in
+        blocks of (at most) SSID_BLOCK_SIZE.
+
+        :param type_str: label for id, e.g. 'student'
+        :param init: initial value for id
+        :param inc: id increment
+        :return: first id of the block
+        """
+        block = self._blocks.get(type_str, 0)
+        self._blocks[type_str] = block + 1
+
+        block_size = min(self._block_size, SSID_BLOCK_SIZE) if type_str == 'ssid' else self._block_size
+        lane = self._first_lane + block % self._lane_count
+        stripe = block // self._lane_count * self._total_lanes + lane
+        start = self._bases.get(type_str, init) + stripe * block_size * inc
+        self._limit[type_str] = start + block_size * inc
+        self._high[type_str] = max(self._high.get(type_str, start), self._limit[type_str])
+        return start
+
+    def get_rec_id_state(self):
+        """
+        Get the high-water mark of the ids leased by this generator: for each type string, the end of
+        the highest block leased. No id at or above it has been handed out.
+
+        :return: dict of type string -> end of highest leased block
+        """
+        return dict(self._high)
+
+    def partition(self, first_lane, lane_count, total_lanes):
+        """
+        Create a generator for a subset of the work, e.g. a district, owning the given lanes of an id
+        space that starts above the ids already leased by this generator. Generators partitioned from the
+        same state with disjoint lanes hand out disjoint ids, whichever process they live in.
+
+        This generator shouldn't lease more ids of the same types once it has been partitioned.
+
+        :param first_lane: first lane owned by the new generator
+        :param lane_count: number of lanes owned by the new generator
+        :param total_lanes: total number of lanes
+        :return: new id generator
+        """
+        return IDGen(self._block_size, first_lane, lane_count, total_lanes, self.get_rec_id_state())
+
     def get_rec_id(self, type_str):
         """
         Get the next integer record ID within the system for the given type string.
@@ -77,22 +154,32 @@ class IDGen():
         else:
             return "{d}{s:05}".format(d=district_id, s=school_id)
 
-    def get_student_id(self):
+    def get_student_id(self, rng=random):
         """
         Generate an SSID-like id for a student. Because each state has their own scheme
         (for CA it is a 10-digit number, for OH it is a 9 character string (2 alpha + 7 digits), etc.)
         know that this method will generate a CA-style string.
 
+        :param rng: random number generator
         :return: next SSID-like id
+        :raises RuntimeError: if the 8-digit sequence (of the lanes of this generator) is used up, which the
+                              check of a run (for the expected number of students) should prevent
         """
         # to make it more random looking, we'll use an 8-digit sequence and wrap it with random values
-        return "{a}{d:08}{b}".format(a=randrange(1, 10), d=self.__get_next_rec_id('ssid', init=0), b=randrange(0, 10))
+        sequence = self.__get_next_rec_id('ssid', init=0)
+        if sequence > SSID_MAX:
+            raise RuntimeError('No more 8-digit SSID sequence values for lanes {}+{} of {}'
+                               .format(self._first_lane, self._lane_count, self._total_lanes))
+        return "{a}{d:08}{b}".format(a=rng.randrange(1, 10), d=sequence, b=rng.randrange(0, 10))
 
     @staticmethod
-    def get_uuid():
+    def get_uuid(rng=None):
         """
         Get a UUID.
 
+        @param rng: (optional) random number generator; if given the UUID is drawn from it so it is reproducible
         @returns: New UUID
         """
-        return str(uuid4())
+        if rng is None:
+            return str(uuid4())
+        return str(UUID(int=rng.getrandbits(128), version=4))
@@ -0,0 +1,64 @@
+"""
+Memory usage of the process.
+
+"""
+
+import os
+import resource
+import sys
+
+
+def rss_mb() -> float:
+    """
+    Get the current resident set size (RSS) of this process.
+    Falls back to the peak RSS where the current value isn't available (no /proc).
+
+    :return: RSS in MB
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """
+    Get the peak resident set size (RSS) of this process.
+
+    :return: peak RSS in MB
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, KB elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class MemoryGuard:
+    """
+    Keep track of the peak memory use of a unit of work (e.g. a school), sampled with check(),
+    and fail if it goes over a ceiling. Without a ceiling nothing is sampled.
+    """
+
+    def __init__(self, max_mb=None):
+        """
+        :param max_mb: ceiling in MB, None for no ceiling
+        """
+        self.max_mb = max_mb
+        self.peak_mb = 0.0
+
+    def reset(self):
+        self.peak_mb = 0.0
+
+    def check(self, what=''):
+        """
+        Sample the memory use.
+
+        :param what: description of the current work, used in the error
+        :raises MemoryError: if the memory use is over the ceiling
+        """
+        if not self.max_mb:
+            return
+        mb = rss_mb()
+        self.peak_mb = max(self.peak_mb, mb)
+        if self.max_mb and mb > self.max_mb:
+            raise MemoryError('Memory use {:.0f} MB is over the maximum of {} MB ({})'.format(mb, self.max_mb, what))
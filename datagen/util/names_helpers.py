@@ -6,6 +6,7 @@ Define a couple helper classes for name generation.
 import random
 
 FREQUENCY_OFFSET = 0.01
+POOL_SEED = 0       # the name pools are filled using a fixed seed so they are the same in every run
 
 
 class PeopleNames():
@@ -93,29 +94,31 @@ def _generate_all_names(male_list, female_list, last_name_list, pool_size=100000
     """
 
     male_first_names, female_first_names, last_names = None, None, None
+    rng = random.Random(POOL_SEED)
 
     if male_list:
         scale = male_list[-1].cum_freq * FREQUENCY_OFFSET
-        male_first_names = _generate_names(pool_size, male_list, scale)
+        male_first_names = _generate_names(pool_size, male_list, scale, rng)
 
     if female_list:
         scale = female_list[-1].cum_freq * FREQUENCY_OFFSET
-        female_first_names = _generate_names(pool_size, female_list, scale)
+        female_first_names = _generate_names(pool_size, female_list, scale, rng)
 
     if last_name_list:
         scale = last_name_list[-1].cum_freq * FREQUENCY_OFFSET
-        last_names = _generate_names(pool_size, last_name_list, scale)
+        last_names = _generate_names(pool_size, last_name_list, scale, rng)
 
     return male_first_names, female_first_names, last_names
 
 
-def _generate_names(total_num, all_names, scale):
+def _generate_names(total_num, all_names, scale, rng=random):
     """Generate names by type
 
     :param total_num: Total number of names to generate
     :param all_names: The names collection, contains NameInfo objects
     :param scale: Scale to transform frequency values: can be derived from the greatest cumulative frequency in the
                   names collections
+    :param rng: random number generator
     :returns: A dictionary of names mapped to frequencies for the given type of name
     """
 
@@ -139,8 +142,8 @@ def _generate_names(total_num, all_names, scale):
     # Fill in remaining open spaces in the array with random names already added
     if remaining_slots >= 0:
         for i in range(remaining_slots):
-            rnd_key = ks[random.randint(0, ks_size - 1)] if ks_size > 0 else all_names[
-                random.randint(0, len(all_names) - 1)].name
+            rnd_key = ks[rng.randint(0, ks_size - 1)] if ks_size > 0 else all_names[
+                rng.randint(0, len(all_names) - 1)].name
 
             if rnd_key in generated_names:
                 generated_names[rnd_key] += 1
@@ -0,0 +1,37 @@
+"""
+Deterministic random number generator streams.
+
+Rather than sharing the module-level random generator, each independent unit of work (the hierarchy,
+a district's year, a school's year, etc.) draws from its own random.Random derived from the run seed
+and the keys identifying that work. The values drawn therefore don't depend on the order in which
+the work is done, or on which process does it, so a run can be reproduced (in whole or in part)
+from its seed.
+
+"""
+
+import random
+
+SEED_MAX = 2 ** 32
+
+
+def new_seed() -> int:
+    """
+    Pick a random seed for a run that wasn't given one.
+
+    :return: seed
+    """
+    return random.SystemRandom().randrange(SEED_MAX)
+
+
+def derive_rng(seed, *keys) -> random.Random:
+    """
+    Derive an independent random number generator for a unit of work.
+
+    The generator is seeded with a string built from the seed and keys; string seeds are hashed
+    (sha512) by random.Random so the result is the same in every process and every run.
+
+    :param seed: run seed
+    :param keys: keys identifying the unit of work, e.g. district id, year, school id
+    :return: random number generator
+    """
+    return random.Random('/'.join(str(v) for v in (seed,) + keys))
@@ -1,7 +1,9 @@
 """
 Method for choosing an object randomly, given weights.
 
-If many choices are to be made using the same weights, WeightedChooser might be more efficient.
+If many choices are to be made using the same weights, use an AliasSampler (or WeightedChooser, which holds
+its own random number generator): the weights are compiled once into alias tables (Walker's alias method,
+built as described by Vose), after which each choice takes a single random number and constant time.
 
 """
 import bisect
@@ -32,19 +34,61 @@ def weighted_choice(counter: {object: float},
     return elements[i]
 
 
+class AliasSampler:
+    """
+    Choose objects randomly with fixed weights, in constant time.
+
+    The weights are scaled so they average 1; each object gets a slot holding its own (scaled) weight, up to 1,
+    and the object making up the rest of the slot (its alias). A choice picks a slot, and the slot's object
+    or its alias, with one random number.
+    """
+
+    def __init__(self, weights_by_object: {object: float}):
+        """
+        :param weights_by_object: a mapping from objects to their respective weights
+        """
+        elements, weights = zip(*weights_by_object.items())
+        total = sum(weights)
+        if not all(weight >= 0 for weight in weights) or total <= 0:
+            raise ValueError('Weights must not be negative, and not all 0: {}'.format(weights_by_object))
+
+        n = len(weights)
+        scaled = [weight * n / total for weight in weights]
+        probs = [1.0] * n
+        aliases = list(range(n))
+        small = [i for i, weight in enumerate(scaled) if weight < 1.0]
+        large = [i for i, weight in enumerate(scaled) if weight >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probs[less] = scaled[less]
+            aliases[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # what is left is (within rounding) a full slot, probability 1
+
+        self.elements = elements
+        self._n = n
+        self._slots = tuple((elements[i], probs[i], elements[aliases[i]]) for i in range(n))
+
+    def choose(self, rng: random.Random = random) -> object:
+        """
+        :param rng: random number generator
+        :return: a randomly chosen object
+        """
+        value = rng.random() * self._n
+        element, prob, alias = self._slots[int(value)]
+        return element if value - int(value) < prob else alias
+
+
 class WeightedChooser:
     def __init__(self,
                  weights_by_object: {object: float},
                  rng: random.Random = random.Random()):
-        self.elements, weights = zip(*weights_by_object.items())
-        self.breaks = tuple(itertools.accumulate(weights))
+        self.sampler = AliasSampler(weights_by_object)
         self.rng = rng
 
     def choose(self, seed=None):
         if seed is not None:
             self.rng.seed(seed)
 
-        value = self.rng.uniform(0, self.breaks[-1])  # a random float between 0 and the sum of the weights
-        i = bisect.bisect(self.breaks, value)  # the index
-
-        return self.elements[i]
+        return self.sampler.choose(self.rng)
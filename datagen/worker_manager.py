@@ -1,7 +1,7 @@
 import copy
 import datetime
+import multiprocessing
 import os
-import random
 import sys
 
 import pyprind
@@ -12,17 +12,26 @@ import datagen.generators.iab_assessment as iab_asmt_gen
 import datagen.generators.population as pop_gen
 import datagen.generators.summative_or_ica_assessment as asmt_gen
 import datagen.util.hierarchy as hier_util
+from datagen.calculate_state_size import calculate_state_size
 from datagen.generators.subject import generate_default_subjects
 from datagen.model.assessment import Assessment
 from datagen.model.district import District
 from datagen.model.registrationsystem import RegistrationSystem
 from datagen.model.school import School
 from datagen.model.state import State
+from datagen.outputworkers.csv_worker import CsvWorker
+from datagen.outputworkers.json_worker import JsonWorker
+from datagen.outputworkers.queue_worker import QueueWorker
+from datagen.outputworkers.sqlite_worker import SqliteWorker
 from datagen.outputworkers.worker import Worker
 from datagen.outputworkers.xml_worker import XmlWorker
 from datagen.readers.subject_reader import load_subjects
 from datagen.readers.tabulator_reader import load_assessments
-from datagen.util.id_gen import IDGen
+from datagen.util.checkpoint import Checkpoint
+from datagen.util.cohort import CohortStore, load_cohort, save_cohort
+from datagen.util.id_gen import IDGen, SSID_MAX
+from datagen.util.memory import MemoryGuard
+from datagen.util.rng import derive_rng, new_seed
 
 
 class WorkerManager(Worker):
@@ -35,10 +44,6 @@ class WorkerManager(Worker):
         self.state_cfg = {'name': args.state_name, 'code': args.state_code, 'type': args.state_type}
         self.hier_source = args.hier_source
 
-        self.workers = []
-        if args.xml_out:
-            self.workers.append(XmlWorker(self.out_path_root))
-
         self.subject_source = args.subject_source
 
         # assessment package settings
@@ -47,9 +52,72 @@ class WorkerManager(Worker):
         self.gen_ica = args.gen_ica
         self.gen_iab = args.gen_iab
         self.gen_item = args.gen_item
+        self.lazy_item = args.lazy_item
+
+        # parallel generation settings
+        self.processes = max(1, args.processes)
+        # counters of the output workers of the district processes
+        self._child_stats = {}
+
+        # generate only a slice of the districts if this run is one shard of the state
+        self.shard, self.shards = hier_util.parse_shard(args.shard) if args.shard else (0, 1)
+
+        # finished districts are recorded so an interrupted run can be resumed (with the same seed)
+        self.checkpoint = Checkpoint(self.out_path_root)
+        self.checkpoint_years = args.checkpoint_years
+        self.resume = args.resume and self.checkpoint.load()
+        if args.resume and not self.resume:
+            print('No checkpoint found in {}, starting from the beginning'.format(self.out_path_root))
+        if self.resume and args.seed is None:
+            args.seed = self.checkpoint.seed
+
+        # the final cohort of every district is stored so a later run can continue with the next year(s)
+        self.cohorts = CohortStore(self.out_path_root)
+        self.continue_from = None
+        if args.continue_from:
+            self.continue_from = CohortStore(args.continue_from)
+            if os.path.abspath(self.continue_from.dir) == os.path.abspath(self.cohorts.dir):
+                raise ValueError('A continued run must be written to a different output directory')
+            if not self.continue_from.load():
+                raise ValueError('No stored cohorts found in {}'.format(args.continue_from))
+            if args.seed is None:
+                args.seed = self.continue_from.seed
+
+        # every random stream is derived from the seed; record it in the args so the run can be reproduced
+        if args.seed is None:
+            args.seed = new_seed()
+        self.seed = args.seed
 
         self.id_gen = IDGen()
 
+        # memory use is sampled as the outcomes are generated; the run fails if it goes over the maximum
+        self.max_memory_mb = args.max_memory_mb
+        self.memory = MemoryGuard(args.max_memory_mb)
+
+        self.workers = self.__create_workers()
+
+    def __create_workers(self, district_process=False):
+        """
+        Create the output workers requested by the arguments.
+
+        :param district_process: True if the workers are for a district process
+        :return: list of workers
+        """
+        workers = []
+        if self._args.xml_out:
+            workers.append(XmlWorker(self.out_path_root, self._args.xml_serializer, self._args.xml_archive,
+                                     self._args.compress, self._args.compress_level))
+        if self._args.csv_out:
+            workers.append(CsvWorker(self.out_path_root, self._args.compress, self._args.compress_level))
+        if self._args.json_out:
+            workers.append(JsonWorker(self.out_path_root, self._args.compress, self._args.compress_level))
+        if self._args.sqlite_out:
+            workers.append(SqliteWorker(self.out_path_root, self.resume, district_process))
+        if self._args.write_queue > 0:
+            # write on a separate thread while the generation continues
+            workers = [QueueWorker(workers, self._args.write_queue)]
+        return workers
+
     def cleanup(self):
         for worker in self.workers:
             worker.cleanup()
@@ -58,6 +126,10 @@ class WorkerManager(Worker):
         for worker in self.workers:
             worker.prepare()
 
+    def flush(self):
+        for worker in self.workers:
+            worker.flush()
+
     def run(self):
         state, districts, schools = self.__hierarchy()
 
@@ -69,38 +141,81 @@ class WorkerManager(Worker):
             print('No subject definitions found')
             return
 
-        assessments = load_assessments(self.pkg_source, subjects, self.gen_sum, self.gen_ica, self.gen_iab, self.gen_item)
+        assessments = load_assessments(self.pkg_source, subjects, self.gen_sum, self.gen_ica, self.gen_iab, self.gen_item,
+                                       self.seed)
         if len(assessments) == 0:
             print('No assessment packages found')
             return
 
+        # fail now rather than part way through the run
+        self.__check_ssid_capacity(state, districts, schools, self.__years(assessments))
+
         # generate and emit inferred command line from args
         cl = ' '.join([('--' + k + ' ' + str(v)) for (k, v) in vars(self._args).items()])
         print(cl)
         with open(os.path.join(self.out_path_root, 'args.txt'), "a") as f:
-            f.write(cl)
+            f.write(cl + '\n')
+
+        self.__write_hierarchy(districts, schools)
 
         # Process the state
         self.__generate_state_data(state, districts, schools, assessments)
 
     def __hierarchy(self):
         """
-        Generate or load the hierarchy of state, districts, schools
+        Generate or load the hierarchy of state, districts, schools.
+        The whole hierarchy is returned, even for a shard, so every shard partitions the ids the same way.
 
-        :return:
+        :return: tuple of (state, districts, schools)
         """
         if self.hier_source == 'generate':
-            state, districts, schools = hier_util.generate_hierarchy(self.state_cfg['type'], self.state_cfg['name'], self.state_cfg['code'], self.id_gen)
+            state, districts, schools = hier_util.generate_hierarchy(self.state_cfg['type'], self.state_cfg['name'], self.state_cfg['code'], self.id_gen,
+                                                                     derive_rng(self.seed, 'hierarchy'))
         else:
-            state, districts, schools = hier_util.read_hierarchy(self.hier_source)
+            state, districts, schools = hier_util.read_hierarchy(self.hier_source, self.seed)
+        return state, districts, schools
 
+    def __write_hierarchy(self, districts: [District], schools: [School]):
+        """
+        Write the institution hierarchies of this run's shard.
+        The ids of the institution hierarchies are allocated for the whole hierarchy, so every shard allocates
+        the same ones.
+        """
         # call hook for workers to write hierarchies
-        hierarchies = [hier_gen.generate_institution_hierarchy(school.district.state, school.district, school, self.id_gen) for school in schools]
+        hierarchies = [hier_gen.generate_institution_hierarchy(school.district.state, school.district, school, self.id_gen,
+                                                               derive_rng(self.seed, 'institution_hierarchy', school.id))
+                       for school in schools]
+        shard_schools = set(self.__shard_hierarchy(districts, schools)[1])
+        hierarchies = [ih for ih in hierarchies if ih.school in shard_schools]
         for worker in self.workers:
             worker.write_hierarchies(hierarchies)
         del hierarchies
 
-        return state, districts, schools
+    def __check_ssid_capacity(self, state: State, districts: [District], schools: [School], years):
+        """
+        Make sure the SSID sequence is big enough for the run. Every lane of the id space (see __district_id_gens)
+        gets an equal share of the sequence, so the lanes times the students expected in a lane, the students of
+        an average school of the state type in every year (as if they all were new each year), must fit in it.
+
+        @param years: the years of the run
+        @raises ValueError: if the SSIDs could run out
+        """
+        _, school_count, students_by_grade = calculate_state_size(state.config)
+        lanes = sum(_lane_counts(districts, schools))
+        students = lanes * sum(students_by_grade.values()) / max(1, school_count) * len(years)
+        if students > SSID_MAX:
+            raise ValueError('The SSID sequence ({} values) is too small for about {:.0f} students in {} schools and '
+                             '{} year(s)'.format(SSID_MAX + 1, students, lanes, len(years)))
+
+    def __shard_hierarchy(self, districts: [District], schools: [School]):
+        """
+        Select the districts and schools for this run's shard.
+
+        :return: tuple of districts and schools
+        """
+        if self.shards == 1:
+            return districts, schools
+        return hier_util.shard_hierarchy(districts, schools, self.shard, self.shards)
 
     def __years(self, assessments: [Assessment]):
         """
@@ -137,27 +252,189 @@ class WorkerManager(Worker):
         # build registration system by years
         rs_by_year = self.__build_registration_system(self.__years(assessments))
 
+        # each district allocates ids from its own lanes of the id space
+        id_gens = dict(zip(districts, self.__district_id_gens(districts, schools)))
+
+        # only generate this shard's districts
+        districts, schools = self.__shard_hierarchy(districts, schools)
+        if self.shards > 1:
+            print('Shard {}/{}: {} of the districts'.format(self.shard, self.shards, len(districts)))
+        id_gens = [id_gens[district] for district in districts]
+
+        # the ids allocated so far (by the hierarchy) identify the hierarchy of the run
+        ids = self.id_gen.get_rec_id_state()
+        years = self.__years(assessments)
+        if self.continue_from:
+            self.continue_from.validate(self.seed, self._args.shard, ids, years[0])
+            print('Continuing the students from {} into {}'.format(self.continue_from.year, years))
+        if self.resume:
+            self.checkpoint.validate(self.seed, self._args.shard, ids)
+            print('Resuming: {} of the districts are finished'
+                  .format(sum(1 for district in districts if self.checkpoint.is_finished(district.id))))
+        else:
+            self.checkpoint.start(self.seed, self._args.shard, ids)
+            self.cohorts.start(self.seed, self._args.shard, ids, years[-1])
+
         # Build the districts
+        if self.processes > 1:
+            student_avg_count, student_unique_count = \
+                self.__generate_districts_parallel(districts, schools, id_gens, rs_by_year, assessments)
+        else:
+            student_avg_count, student_unique_count = \
+                self.__generate_districts_serial(districts, schools, id_gens, rs_by_year, assessments)
+
+        # Print completion of state
+        print('State results created with average of {} students/year and {} total unique'
+              .format(student_avg_count, student_unique_count))
+        stats = self.__output_stats()
+        if stats:
+            print('Output: {}'.format(', '.join('{} {}'.format(name.replace('_', ' '), count)
+                                                for name, count in stats.items())))
+
+    def __district_id_gens(self, districts: [District], schools: [School]):
+        """
+        Partition the id generator between the districts. Each district gets a number of lanes equal to its
+        number of schools (so ids are spread in proportion to the expected volume). The partition depends
+        only on the hierarchy, so the ids are the same whichever process generates a district.
+
+        :return: list of id generators, one per district
+        """
+        lane_counts = _lane_counts(districts, schools)
+        total_lanes = sum(lane_counts)
+        id_gens = []
+        first_lane = 0
+        for lane_count in lane_counts:
+            id_gens.append(self.id_gen.partition(first_lane, lane_count, total_lanes))
+            first_lane += lane_count
+        return id_gens
+
+    def __generate_districts_serial(self, districts: [District], schools: [School], id_gens: [IDGen], rs_by_year,
+                                    assessments: [Assessment]):
+        """
+        Generate the data for all districts, one after another, in this process.
+
+        :return: tuple of (total average students/year, total unique students)
+        """
         student_avg_count = 0
         student_unique_count = 0
-        for district in districts:
+        for district, id_gen in zip(districts, id_gens):
+            if self.checkpoint.is_finished(district.id):
+                avg_year, unique = self.checkpoint.districts[district.id]
+                print('\nSkipping finished district {} ({} District)'.format(district.name, district.type_str))
+                student_avg_count += avg_year
+                student_unique_count += unique
+                continue
+
             print('\nCreating results for district {} ({} District)'.format(district.name, district.type_str))
 
             # collect schools for the district
             district_schools = [s for s in schools if s.district == district]
 
             # Generate the district data set
-            avg_year, unique = self.__generate_district_data(district_schools, rs_by_year, assessments)
+            avg_year, unique, school_peaks = self.__generate_district_data(district, district_schools, id_gen,
+                                                                           rs_by_year, assessments)
+
+            self.checkpoint.finish_district(district.id, avg_year, unique)
 
             # Print completion of district
             print('District results created with average of {} students/year and {} total unique'
                   .format(avg_year, unique))
+            self.__print_school_peaks(school_peaks)
             student_avg_count += avg_year
             student_unique_count += unique
 
-        # Print completion of state
-        print('State results created with average of {} students/year and {} total unique'
-              .format(student_avg_count, student_unique_count))
+        return student_avg_count, student_unique_count
+
+    def __generate_districts_parallel(self, districts: [District], schools: [School], id_gens: [IDGen], rs_by_year,
+                                      assessments: [Assessment]):
+        """
+        Generate the data for all districts using a pool of processes, one district per task.
+        District data is self-contained (students never cross districts) so the districts can be
+        generated independently. Each task creates its own output workers and uses the district's own
+        id generator; the counts are reported back to this (parent) process.
+
+        The pool uses the fork start method so the children inherit the hierarchy, assessments, etc.
+        without having to pickle them for every task.
+
+        :return: tuple of (total average students/year, total unique students)
+        """
+        student_avg_count = 0
+        student_unique_count = 0
+        school_peaks = {}
+        self._child_stats = {}
+        remaining = []
+        for index, district in enumerate(districts):
+            if self.checkpoint.is_finished(district.id):
+                avg_year, unique = self.checkpoint.districts[district.id]
+                student_avg_count += avg_year
+                student_unique_count += unique
+            else:
+                remaining.append(index)
+
+        print('\nCreating results for {} districts using {} processes'.format(len(remaining), self.processes))
+
+        # the children mustn't inherit anything that is still being written
+        self.flush()
+        self._parallel_work = (districts, schools, id_gens, rs_by_year, assessments)
+        context = multiprocessing.get_context('fork')
+        bar = pyprind.ProgBar(max(1, len(remaining)), stream=sys.stdout, title='Generating assessments outcome for districts')
+        with context.Pool(self.processes, initializer=_init_district_process, initargs=(self,)) as pool:
+            for index, (avg_year, unique, peaks, stats) in pool.imap_unordered(_generate_district_task, remaining):
+                _add_stats(self._child_stats, stats)
+                school_peaks[index] = peaks
+                self.checkpoint.finish_district(districts[index].id, avg_year, unique)
+                student_avg_count += avg_year
+                student_unique_count += unique
+                bar.update()
+        del self._parallel_work
+
+        # reported once the progress bar is done, in the order of the districts
+        for index in sorted(school_peaks):
+            self.__print_school_peaks(school_peaks[index])
+        return student_avg_count, student_unique_count
+
+    def _generate_district(self, index: int):
+        """
+        Generate the data for a single district in a child process.
+        The output workers inherited from the parent belong to the parent, so the child creates,
+        prepares and cleans up its own.
+
+        :param index: index of district
+        :return: tuple of (average students/year, unique students, peak memory use of the schools,
+                 output worker stats)
+        """
+        districts, schools, id_gens, rs_by_year, assessments = self._parallel_work
+        district = districts[index]
+
+        self.workers = self.__create_workers(district_process=True)
+        self.prepare()
+        district_schools = [s for s in schools if s.district == district]
+        avg_year, unique, school_peaks = self.__generate_district_data(district, district_schools, id_gens[index],
+                                                                       rs_by_year, assessments, verbose=False)
+        self.cleanup()
+
+        return avg_year, unique, school_peaks, self.__output_stats()
+
+    def __print_school_peaks(self, school_peaks):
+        """
+        Report the peak memory use of each school (if memory use is sampled, i.e. there is a maximum).
+
+        :param school_peaks: list of (district name, school name, year, peak MB)
+        """
+        for district_name, school_name, year, peak_mb in school_peaks:
+            print('Peak memory use {:.0f} MB (maximum {} MB) for school {} ({}) {}'
+                  .format(peak_mb, self.max_memory_mb, school_name, district_name, year))
+
+    def __output_stats(self):
+        """
+        Sum the counters of the output workers, and of the workers of the district processes (if any).
+
+        :return: dictionary of counter name -> count
+        """
+        stats = dict(self._child_stats)
+        for worker in self.workers:
+            _add_stats(stats, worker.stats())
+        return stats
 
     def __build_registration_system(self, years):
         """"
@@ -173,8 +450,10 @@ class WorkerManager(Worker):
         # Build the registration systems for every year
         rs_by_year = {}
         start_year = years[0] - 1
-        # Build the original system
-        rs = hier_gen.generate_registration_system(start_year, str(start_year - 1) + '-02-25', self.id_gen)
+        # Build the original system; its guids are drawn from the seed alone (not the years) so every shard,
+        # and a resumed or continued run, uses the same system
+        rs = hier_gen.generate_registration_system(start_year, str(start_year - 1) + '-02-25', self.id_gen,
+                                                   derive_rng(self.seed, 'registration'))
 
         # Update it over every year
         for year in years:
@@ -184,76 +463,138 @@ class WorkerManager(Worker):
             rs_by_year[year] = copy.deepcopy(rs)
 
             for worker in self.workers:
-                worker.write_student_registration_config(year, rs)
+                worker.write_student_registration_config(year, rs_by_year[year])
 
         # Return the generated GUIDs
         return rs_by_year
 
-    def __generate_district_data(self, schools: [School], reg_sys_by_year: {str: RegistrationSystem}, assessments: [Assessment]):
+    def __generate_district_data(self, district: District, schools: [School], id_gen: IDGen,
+                                 reg_sys_by_year: {str: RegistrationSystem}, assessments: [Assessment], verbose=True):
         """
         Generate an entire data set for all schools in a single district.
+        Random values are drawn from streams derived from the seed and the district/year/school so the
+        data for a district is the same regardless of which process generates it, or in which order.
 
+        @param district: the district
         @param schools: schools for the district
+        @param id_gen: id generator for the district
         @param assessments: Dictionary of all assessment objects
+        @param verbose: False to suppress progress output (e.g. when generating districts in parallel)
+        @returns: tuple of (average students/year, unique students, list of (district name, school name, year,
+                  peak MB) of the schools processed, empty if memory use isn't sampled)
         """
         # Sort the schools
         schools_by_grade = hier_gen.sort_schools_by_grade(schools)
 
         # Begin processing the years for data
-        unique_students = {}
         students = {}
         student_count = 0
+        unique_student_count = 0
+
+        # pick up from the last year saved for the district if resuming,
+        # or from the final year of the stored run if continuing one
+        cohort_file = self.checkpoint.cohort_file(district.id)
+        finished_year = None
+        if self.resume and os.path.isfile(cohort_file):
+            cohort = load_cohort(cohort_file, schools)
+            students, student_count = cohort['students'], cohort['student_count']
+            id_gen, finished_year = cohort['id_gen'], cohort['year']
+            unique_student_count = cohort['unique_student_count']
+        elif self.continue_from:
+            cohort = load_cohort(self.continue_from.cohort_file(district.id), schools)
+            students, id_gen = cohort['students'], cohort['id_gen']
+            unique_student_count = cohort['unique_student_count']
 
         # get range of years from assessment packages
         years = self.__years(assessments)
-        print('School years: {}'.format(years))
 
         # start with "standard" SB grades and add any grade found in the assessments
         hierarchy_grades = {3, 4, 5, 6, 7, 8, 11}
         hierarchy_grades.update(self.__grades(assessments))
-        print('Hierarchy grades: {}'.format(hierarchy_grades))
 
         # calculate the progress bar max and start the progress
-        progress_max = len(hier_gen.set_up_schools_with_grades(schools, hierarchy_grades)) * len(years)
-        bar = pyprind.ProgBar(progress_max, stream=sys.stdout, title='Generating assessments outcome for schools')
+        bar = None
+        if verbose:
+            print('School years: {}'.format(years))
+            print('Hierarchy grades: {}'.format(hierarchy_grades))
+            progress_max = len(hier_gen.set_up_schools_with_grades(schools, hierarchy_grades)) * len(years)
+            bar = pyprind.ProgBar(progress_max, stream=sys.stdout, title='Generating assessments outcome for schools')
+
+        school_peaks = []
 
         for year in years:
+            if finished_year is not None and year <= finished_year:
+                if bar:
+                    for _ in hier_gen.set_up_schools_with_grades(schools, hierarchy_grades):
+                        bar.update()
+                continue
+
             # Prepare output file names
             reg_system = reg_sys_by_year[year]
+            rng = derive_rng(self.seed, district.id, year)
 
             # Set up a dictionary of schools and their grades
             schools_with_grades = hier_gen.set_up_schools_with_grades(schools, hierarchy_grades)
 
+            # The students are about to be modified, make sure last year's data has been written
+            self.flush()
+
             # Advance the students forward in the grades
+            dropped = []
             for guid, student in students.items():
                 # Assign the registration system and bump up the record ID
                 student.reg_sys = reg_system
-                student.rec_id = self.id_gen.get_rec_id('student')
+                student.rec_id = id_gen.get_rec_id('student')
 
                 # Move the student forward (false from the advance method means the student disappears)
                 # If the student is now in a grade that isn't a concern (i.e. no assessments) leave them out
-                if pop_gen.advance_student(student, schools_by_grade):
+                if pop_gen.advance_student(student, schools_by_grade, rng=rng):
                     if student.grade in schools_with_grades[student.school]:
                         schools_with_grades[student.school][student.grade].append(student)
+                else:
+                    dropped.append(guid)
+
+            # a student who dropped out or graduated is gone for good, stop carrying them
+            for guid in dropped:
+                del students[guid]
 
             # With the students moved around, we will re-populate empty grades
             # and create assessments with outcomes for the students
             for school, grades in schools_with_grades.items():
-                # Process the whole school
-                student_count += self.__process_school(grades, school, students, unique_students, reg_system, year, assessments)
-                bar.update()
-
-        unique_student_count = len(unique_students)
+                # Process the whole school (students who are new to the district are added to the cohort)
+                cohort_count = len(students)
+                student_count += self.__process_school(grades, school, id_gen, students, reg_system, year, assessments)
+                unique_student_count += len(students) - cohort_count
+                if self.max_memory_mb:
+                    school_peaks.append((district.name, school.name, year, self.memory.peak_mb))
+                if bar:
+                    bar.update()
+
+            # save the cohort so a resumed run can continue with the next year
+            if self.checkpoint_years:
+                self.flush()
+                os.makedirs(self.checkpoint.cohort_dir, exist_ok=True)
+                save_cohort(cohort_file, {'year': year, 'students': students,
+                                          'unique_student_count': unique_student_count,
+                                          'student_count': student_count, 'id_gen': id_gen})
+
+        # everything for the district must be written before it is recorded as finished
+        self.flush()
+
+        # store the final cohort (with the id generator, so a continued run doesn't reuse ids)
+        save_cohort(self.cohorts.cohort_file(district.id),
+                    {'year': years[-1], 'students': students, 'unique_student_count': unique_student_count,
+                     'student_count': student_count, 'id_gen': id_gen})
 
         # Some explicit garbage collection
         del schools_by_grade
         del students
-        del unique_students
 
         # Return the average student count
-        return int(student_count // len(years)), unique_student_count
+        return int(student_count // len(years)), unique_student_count, school_peaks
 
-    def __process_school(self, grades, school, students, unique_students, reg_system: RegistrationSystem, year, assessments: [Assessment]):
+    def __process_school(self, grades, school, id_gen: IDGen, students, reg_system: RegistrationSystem, year,
+                         assessments: [Assessment]):
 
         district = school.district
         state = district.state
@@ -268,75 +609,90 @@ class WorkerManager(Worker):
             if subject_code not in asmt_skip_rates_by_subject:
                 asmt_skip_rates_by_subject[subject_code] = asmt_skip_rates_by_subject['Math']
 
+        # random values for the school and year come from their own stream
+        rng = derive_rng(self.seed, district.id, year, school.id)
+
         # Process the whole school
-        assessment_results = {}
-        iab_results = {}
+        self.memory.reset()
         sr_students = []
         dim_students = []
         student_count = 0
 
         for grade, grade_students in grades.items():
             # Potentially re-populate the student population
-            pop_gen.repopulate_school_grade(school, grade, grade_students, self.id_gen, reg_system, year, subject_codes)
+            pop_gen.repopulate_school_grade(school, grade, grade_students, id_gen, reg_system, year, subject_codes,
+                                            rng=rng)
             student_count += len(grade_students)
 
             # collect any assessments for this year and grade
             asmts = list(filter(lambda asmt: asmt.year == year and asmt.grade == grade, assessments))
 
             # note: only use subjects for the assessments for this year and grade
-            pop_gen.assign_student_groups(school, grade, grade_students, self.id_gen, self.__subject_codes(asmts))
+            pop_gen.assign_student_groups(school, grade, grade_students, id_gen, self.__subject_codes(asmts), rng)
 
             for asmt in asmts:
-                date_taken = self.__date_taken_for_asmt(asmt)
+                # outcomes are written as soon as an assessment is done for the grade, then dropped
+                assessment_results = {}
+                iab_results = {}
+                date_taken = self.__date_taken_for_asmt(asmt, rng)
                 for student in grade_students:
                     if asmt.is_iab():
-                        if school.takes_interim_asmts and random.random() < cfg.IAB_STUDENT_RATE:
-                            iab_asmt_gen.create_iab_outcome_object(date_taken, student, asmt, self.id_gen, iab_results,
-                                                                   gen_item=self.gen_item)
+                        if school.takes_interim_asmts and rng.random() < cfg.IAB_STUDENT_RATE:
+                            iab_asmt_gen.create_iab_outcome_object(date_taken, student, asmt, id_gen, iab_results,
+                                                                   gen_item=self.gen_item, lazy_item=self.lazy_item,
+                                                                   rng=rng)
                     else:
-                        asmt_gen.create_assessment_outcome_object(date_taken, student, asmt, self.id_gen,
+                        asmt_gen.create_assessment_outcome_object(date_taken, student, asmt, id_gen,
                                                                   assessment_results,
                                                                   asmt_skip_rates_by_subject[asmt.subject.code],
-                                                                  gen_item=self.gen_item)
+                                                                  gen_item=self.gen_item, lazy_item=self.lazy_item,
+                                                                  rng=rng)
 
                     # Make sure we have the student for the next run and for metrics
                     # (bit repetitive to do it in the inner loop but probably okay for now)
                     if student.guid not in students:
                         students[student.guid] = student
                         dim_students.append(student)
-                    if student.guid not in unique_students:
-                        unique_students[student.guid] = True
+
+                self.__write_outcomes(assessment_results, iab_results, state.code, district.guid)
+                self.memory.check('school {}, grade {}, assessment {}'.format(school.name, grade, asmt.id))
+                del assessment_results
+                del iab_results
 
             # collect all the students for registration output (randomly missing a few)
-            sr_students.extend([s for s in grade_students if random.random() < cfg.HAS_ASMT_RESULT_IN_SR_FILE_RATE])
+            sr_students.extend([s for s in grade_students if rng.random() < cfg.HAS_ASMT_RESULT_IN_SR_FILE_RATE])
 
         # Write out the school
-        self.__write_school_data(year, reg_system.guid, dim_students, sr_students, assessment_results, iab_results, state.code, district.guid)
+        self.__write_school_data(year, reg_system.guid, dim_students, sr_students)
+        self.memory.check('school {}'.format(school.name))
 
         del dim_students
         del sr_students
-        del assessment_results
-        del iab_results
 
         return student_count
 
-    def __write_school_data(self, year, rs_guid, dim_students, sr_students, assessment_results, iab_results, state_code, district_id):
+    def __write_school_data(self, year, rs_guid, dim_students, sr_students):
         """
-        Write student and assessment data for a school to one or more output formats.
+        Write student data for a school to one or more output formats.
 
         @param year: Current academic year
         @param dim_students: Students to write
         @param sr_students: Students to write
-        @param assessment_results: Assessment outcomes to write
-        @param iab_results: IAB assessment outcomes
-        @param state_code: state code
-        @param district_id: district it
         """
 
         for worker in self.workers:
             worker.write_students_dim(dim_students)
             worker.write_students_reg(sr_students, rs_guid, year)
 
+    def __write_outcomes(self, assessment_results, iab_results, state_code, district_id):
+        """
+        Write assessment outcomes to one or more output formats.
+
+        @param assessment_results: Assessment outcomes to write
+        @param iab_results: IAB assessment outcomes
+        @param state_code: state code
+        @param district_id: district it
+        """
         # Write assessment results if we have them
         for guid, iab_result in iab_results.items():
             for worker in self.workers:
@@ -345,7 +701,7 @@ class WorkerManager(Worker):
             for worker in self.workers:
                 worker.write_assessment_outcome(results, guid, state_code, district_id)
 
-    def __date_taken_for_asmt(self, asmt: Assessment):
+    def __date_taken_for_asmt(self, asmt: Assessment, rng):
         """
         Generates a random date for an assessment.
         IABs can be pretty much any time from mid-Sep to mid-March
@@ -353,27 +709,72 @@ class WorkerManager(Worker):
         Summatives will be early May
 
         :param asmt: assessment
+        :param rng: random number generator
         :return: date taken
         """
         if asmt.is_iab():
-            date_taken = datetime.date(asmt.year - 1, 9, 15) + datetime.timedelta(days=random.randint(0, 180))
+            date_taken = datetime.date(asmt.year - 1, 9, 15) + datetime.timedelta(days=rng.randint(0, 180))
         elif asmt.is_summative():
             date_taken = datetime.date(asmt.year, 5, 10)
         else:
             date_taken = datetime.date(asmt.year, 1, 21)
-        return self.__weekday_near(date_taken)
+        return self.__weekday_near(date_taken, rng)
 
-    def __weekday_near(self, value: datetime.date):
+    def __weekday_near(self, value: datetime.date, rng):
         """
         Generates a random date that is near the given target date and is a weekday.
         For now this is simple: shift date randomly +-3, then make sure it's not a weekend.
 
         :param value: date to be near
+        :param rng: random number generator
         :return: new date
         """
-        value += datetime.timedelta(days=random.randint(-3, 3))
+        value += datetime.timedelta(days=rng.randint(-3, 3))
         if value.weekday() == 5:
             value += datetime.timedelta(days=-1)  # Sat -> Fri
         elif value.weekday() == 6:
             value += datetime.timedelta(days=+1)  # Sun -> Mon
         return value
+
+
+def _init_district_process(manager: WorkerManager):
+    """
+    Initializer for district generation processes: remember the (inherited) manager.
+
+    :param manager: the worker manager
+    """
+    global _district_manager
+    _district_manager = manager
+
+
+def _generate_district_task(index: int):
+    """
+    Pool task: generate the data for a single district.
+
+    :param index: index of district
+    :return: tuple of (index of district, (average students/year, unique students, peak memory use of the
+             schools, output worker stats))
+    """
+    return index, _district_manager._generate_district(index)
+
+
+def _lane_counts(districts: [District], schools: [School]) -> [int]:
+    """
+    Get the number of id lanes of each district, one per school.
+
+    :param districts: districts
+    :param schools: schools
+    :return: list of lane counts, one per district
+    """
+    return [max(1, sum(1 for s in schools if s.district == district)) for district in districts]
+
+
+def _add_stats(total: {str: int}, stats: {str: int}):
+    """
+    Add output worker counters to a total.
+
+    :param total: dictionary of counter name -> count, updated
+    :param stats: dictionary of counter name -> count
+    """
+    for name, count in stats.items():
+        total[name] = total.get(name, 0) + count
@@ -0,0 +1,168 @@
+"""
+A writer streaming output files into an archive (tar, zip or tar.gz) instead of the file system.
+
+Along with a tar or tar.gz archive an index (<archive>.idx) is written, so a single member can be read
+without scanning the archive; a zip archive has its own index (the central directory). A tar.gz archive
+is written as a series of gzip members (which is still a valid gzip file), starting a new one every
+CHUNK_SIZE bytes, so reading a member only decompresses the chunk it is in.
+
+Each line of the index is tab-separated: member name, offset of the (compressed) chunk, offset of the
+member's data within the (uncompressed) chunk, and the size of the data. For a tar archive there is a
+single chunk at offset 0.
+
+Read a member of an archive with:
+```
+python -m datagen.writers.archive_writer out/CA/0600001/060000100001.2019.tar.gz CA/0600001/060000100001/1.xml
+```
+
+"""
+
+import calendar
+import datetime
+import io
+import sys
+import tarfile
+import zipfile
+import zlib
+
+ARCHIVE_FORMATS = ('tar', 'zip', 'tar.gz')
+
+# uncompressed size of a tar.gz chunk
+CHUNK_SIZE = 1024 * 1024
+
+
+class _GzipChunkWriter:
+    """
+    A file-like object compressing what is written to it into a series of gzip members.
+    """
+
+    def __init__(self, raw, level=9):
+        self.raw = raw
+        self.level = level
+        self.pos = 0
+        self.chunk = 0
+        self.chunk_pos = 0
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def write(self, data):
+        self.pos += len(data)
+        self.raw.write(self.compressor.compress(data))
+
+    def tell(self):
+        return self.pos
+
+    def restart(self):
+        """
+        Finish the current gzip member and start a new one.
+        """
+        self.raw.write(self.compressor.flush())
+        self.chunk = self.raw.tell()
+        self.chunk_pos = self.pos
+        self.compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+    def close(self):
+        self.raw.write(self.compressor.flush())
+        self.raw.close()
+
+
+class ArchiveWriter:
+    def __init__(self, path: str, archive_format: str):
+        """
+        Create (or replace) an archive.
+
+        :param path: archive file name
+        :param archive_format: one of ARCHIVE_FORMATS
+        """
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError("Archive format '{}' is not one of {}".format(archive_format, ', '.join(ARCHIVE_FORMATS)))
+        self.path = path
+        self.format = archive_format
+        self._index = []
+        if archive_format == 'zip':
+            self._zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        else:
+            raw = open(path, 'wb')
+            self._out = _GzipChunkWriter(raw) if archive_format == 'tar.gz' else raw
+            self._tar = tarfile.open(fileobj=self._out, mode='w', format=tarfile.PAX_FORMAT)
+
+    def add(self, name: str, data: str, date: datetime.datetime):
+        """
+        Add a member to the archive.
+
+        :param name: member name, e.g. CA/0600001/060000100001/1.xml
+        :param data: member data
+        :param date: member modification date (makes the archive reproducible)
+        """
+        data = data.encode('utf-8')
+        if self.format == 'zip':
+            info = zipfile.ZipInfo(name, date.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            self._zip.writestr(info, data)
+            return
+
+        if self.format == 'tar.gz' and self._out.pos - self._out.chunk_pos >= CHUNK_SIZE:
+            self._out.restart()
+        chunk, chunk_pos = (self._out.chunk, self._out.chunk_pos) if self.format == 'tar.gz' else (0, 0)
+
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = calendar.timegm(date.timetuple())
+        info.mode = 0o644
+        self._tar.addfile(info, io.BytesIO(data))
+        # the data is followed by padding to the next block
+        data_pos = self._tar.offset - -(-len(data) // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+        self._index.append('{}\t{}\t{}\t{}\n'.format(name, chunk, data_pos - chunk_pos, len(data)))
+
+    def close(self):
+        """
+        Finish the archive and write its index.
+        """
+        if self.format == 'zip':
+            self._zip.close()
+            return
+        self._tar.close()
+        self._out.close()
+        with open(self.path + '.idx', 'w') as f:
+            f.writelines(self._index)
+
+
+def read_member(path: str, name: str) -> bytes:
+    """
+    Read a member of an archive written by ArchiveWriter, using the archive's index.
+
+    :param path: archive file name
+    :param name: member name
+    :return: member data
+    :raises KeyError: if there is no such member
+    """
+    if path.endswith('.zip'):
+        with zipfile.ZipFile(path) as z:
+            return z.read(name)
+
+    with open(path + '.idx') as f:
+        entry = next((line.rstrip('\n').split('\t') for line in f if line.startswith(name + '\t')), None)
+    if entry is None:
+        raise KeyError("Member '{}' not found in {}".format(name, path))
+    chunk, offset, size = int(entry[1]), int(entry[2]), int(entry[3])
+
+    with open(path, 'rb') as f:
+        f.seek(chunk)
+        if not path.endswith('.gz'):
+            f.seek(chunk + offset)
+            return f.read(size)
+        decompressor = zlib.decompressobj(31)
+        data = b''
+        while len(data) < offset + size and not decompressor.eof:
+            block = f.read(64 * 1024)
+            if not block:
+                break
+            data += decompressor.decompress(block)
+        return data[offset:offset + size]
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print('Usage: python -m datagen.writers.archive_writer ARCHIVE MEMBER')
+        exit(1)
+    sys.stdout.buffer.write(read_member(sys.argv[1], sys.argv[2]))
@@ -0,0 +1,187 @@
+"""
+Write output files through a streaming compressor (gzip, bz2 or lzma) running on a separate thread.
+
+A Compressor has a thread of its own that compresses and writes the data handed to it, so the generation
+carries on while the data is compressed (zlib, bz2 and lzma release the GIL while they compress). A file is
+opened with Compressor.open, which returns a buffered (text or binary) file; the blocks written to it are
+passed to the thread. A small whole file, like the XML of an outcome, is written with write_file. The work is
+done in the order it is handed over; up to MAX_PENDING blocks are queued, so a compressor that can't keep up
+holds back the generation rather than filling the memory. Errors of the thread are raised by the next call.
+
+A compressed file has the extension of its compression added to its name, e.g. 1.xml.gz. A file opened again
+in append mode gets another stream (gzip member, bz2 or xz stream), which decompressors read as one. The gzip
+header has no timestamp, so the same data gives the same file.
+
+"""
+
+import bz2
+import io
+import lzma
+import queue
+import threading
+import zlib
+
+# compression -> file extension
+COMPRESSIONS = {'gzip': '.gz', 'bz2': '.bz2', 'lzma': '.xz'}
+
+# compression -> (lowest, highest) level
+LEVELS = {'gzip': (1, 9), 'bz2': (1, 9), 'lzma': (0, 9)}
+
+# compression -> level used if none is given, the library defaults
+DEFAULT_LEVELS = {'gzip': 6, 'bz2': 9, 'lzma': 6}
+
+BUFFER_SIZE = 1024 * 1024
+
+MAX_PENDING = 64
+
+
+class Compressor:
+    def __init__(self, compression: str, level: int = None):
+        """
+        :param compression: one of COMPRESSIONS
+        :param level: compression level, within LEVELS of the compression (default=DEFAULT_LEVELS)
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError("Compression '{}' is not one of {}".format(compression, ', '.join(COMPRESSIONS)))
+        if level is None:
+            level = DEFAULT_LEVELS[compression]
+        low, high = LEVELS[compression]
+        if not low <= level <= high:
+            raise ValueError('Compression level {} of {} is not between {} and {}'.format(level, compression, low, high))
+        self.compression = compression
+        self.level = level
+        self.extension = COMPRESSIONS[compression]
+
+        # the thread is started by the first work handed over, so a compressor can be created before a fork
+        self._queue = queue.Queue(MAX_PENDING)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._error = None
+
+    def open(self, path: str, mode: str = 'w', encoding: str = 'utf-8', newline: str = None):
+        """
+        Open a file to write compressed, creating (or replacing) it or appending to it.
+
+        :param path: file name, without the extension of the compression
+        :param mode: 'w', 'a', 'wb' or 'ab'
+        :param encoding: encoding of a text file
+        :param newline: newline translation of a text file, as for open
+        :return: buffered file; closing it hands over the end of the stream
+        """
+        if mode not in ('w', 'a', 'wb', 'ab'):
+            raise ValueError("Mode '{}' is not one of w, a, wb, ab".format(mode))
+        file = io.BufferedWriter(_CompressedStream(self, path + self.extension, mode[0] + 'b'), BUFFER_SIZE)
+        if 'b' in mode:
+            return file
+        return io.TextIOWrapper(file, encoding=encoding, newline=newline)
+
+    def write_file(self, path: str, data):
+        """
+        Write a whole file compressed, creating (or replacing) it.
+
+        :param path: file name, without the extension of the compression
+        :param data: file content, text is encoded as UTF-8
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._submit(self._write_file, path + self.extension, data)
+
+    def wait(self):
+        """
+        Wait until everything handed over so far has been written.
+        """
+        if self._thread:
+            self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        """
+        Wait until everything has been written and stop the thread.
+        """
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._raise_error()
+
+    def compressobj(self):
+        """
+        :return: a new compressor object of the compression and level
+        """
+        if self.compression == 'gzip':
+            return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        if self.compression == 'bz2':
+            return bz2.BZ2Compressor(self.level)
+        return lzma.LZMACompressor(preset=self.level)
+
+    def _write_file(self, path, data):
+        compressobj = self.compressobj()
+        with open(path, 'wb') as f:
+            f.write(compressobj.compress(data))
+            f.write(compressobj.flush())
+
+    def _submit(self, func, *args):
+        self._raise_error()
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='compressor', daemon=True)
+                    self._thread.start()
+        self._queue.put((func, args))
+
+    def _run(self):
+        while True:
+            work = self._queue.get()
+            try:
+                if work is None:
+                    return
+                # once something failed, the rest is dropped; the error is raised to the caller
+                if self._error is None:
+                    func, args = work
+                    func(*args)
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError('Compressing output failed: {}'.format(error)) from error
+
+
+class _CompressedStream(io.RawIOBase):
+    """
+    A raw stream handing the blocks written to it to the thread of a Compressor.
+    The file and its compressor object are only used on that thread.
+    """
+
+    def __init__(self, compressor: Compressor, path: str, mode: str):
+        self._compressor = compressor
+        self._file = None
+        self._compressobj = None
+        compressor._submit(self._open, path, mode)
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        data = bytes(b)
+        self._compressor._submit(self._compress, data)
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._compressor._submit(self._finish)
+        super().close()
+
+    def _open(self, path, mode):
+        self._file = open(path, mode)
+        self._compressobj = self._compressor.compressobj()
+
+    def _compress(self, data):
+        self._file.write(self._compressobj.compress(data))
+
+    def _finish(self):
+        self._file.write(self._compressobj.flush())
+        self._file.close()
@@ -0,0 +1,70 @@
+"""
+Accumulate the districts and institutions of organizations.json and write the file in a single pass.
+
+Organizations are kept in the order they are first added; adding one that is already there (by entity id)
+keeps the first. Loading an existing file adds its organizations, so a file can be extended (or files
+combined) with one read of each and one write.
+
+"""
+
+import json
+from collections import OrderedDict
+
+from datagen.model.institutionhierarchy import InstitutionHierarchy
+
+
+class OrganizationsWriter:
+    def __init__(self):
+        self.districts = OrderedDict()
+        self.schools = OrderedDict()
+
+    def load(self, file: str):
+        """
+        Add the organizations of an organizations.json file.
+
+        :param file: organizations.json file
+        """
+        with open(file) as f:
+            org = json.load(f)
+        for district in org.get('districts', []):
+            self.add_district(district)
+        for school in org.get('institutions', []):
+            self.add_school(school)
+
+    def add_district(self, entity: dict):
+        self.districts.setdefault(entity['entityId'], entity)
+
+    def add_school(self, entity: dict):
+        self.schools.setdefault(entity['entityId'], entity)
+
+    def add_hierarchy(self, hierarchy: InstitutionHierarchy):
+        """
+        Add the district and school of an institution hierarchy.
+
+        :param hierarchy: institution hierarchy
+        """
+        if hierarchy.district.id not in self.districts:
+            self.add_district(district_entity(hierarchy.district.id, hierarchy.district.name, hierarchy.state.code))
+        if hierarchy.school.id not in self.schools:
+            self.add_school(school_entity(hierarchy.school.id, hierarchy.school.name, hierarchy.district.id))
+
+    def write(self, file: str):
+        """
+        Write (or replace) an organizations.json file.
+
+        :param file: organizations.json file
+        """
+        with open(file, 'w') as f:
+            # force output order to be same as org hierarchy
+            json.dump(OrderedDict([('districts', list(self.districts.values())),
+                                   ('institutions', list(self.schools.values()))]), f, indent=2)
+
+
+def district_entity(district_id: str, name: str, state_code: str) -> dict:
+    return OrderedDict([('entityId', district_id), ('entityName', name), ('entityType', 'DISTRICT'),
+                        ('parentEntityType', 'STATE'), ('parentEntityId', state_code)])
+
+
+def school_entity(school_id: str, name: str, district_id: str) -> dict:
+    return OrderedDict([('entityId', school_id), ('entityName', name), ('entityType', 'INSTITUTION'),
+                        ('parentEntityType', 'DISTRICT'), ('parentEntityId', district_id)])
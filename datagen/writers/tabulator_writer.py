@@ -5,6 +5,7 @@ A writer producing output like the assessment package tabulator.
 import csv
 
 from datagen.model.assessment import Assessment
+from datagen.writers.compressed_writer import Compressor
 
 TabulatorFieldNames = [
     'AssessmentId', 'AssessmentName', 'AssessmentSubject', 'AssessmentGrade', 'AssessmentType', 'AssessmentSubtype',
@@ -19,8 +20,15 @@ TabulatorFieldNames = [
 ]
 
 
-def write_assessments(file, asmts):
-    with open(file, "w") as f:
+def write_assessments(file, asmts, compressor: Compressor = None):
+    """
+    Write assessments, with their items, in the tabulator's CSV format.
+
+    :param file: file name
+    :param asmts: assessments
+    :param compressor: None, or a compressor to write the file with (adding its extension to the name)
+    """
+    with (compressor.open(file) if compressor else open(file, "w")) as f:
         writer = csv.DictWriter(f, TabulatorFieldNames)
         writer.writeheader()
         for asmt in asmts:
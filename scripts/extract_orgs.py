@@ -1,79 +1,72 @@
 #!/usr/bin/env python
 
+import argparse
 import fnmatch
-import json
 import os
 import sys
 
 from xml.etree import ElementTree
 
+# the script is run from anywhere, share the organizations code of the generator
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from datagen.writers.organizations_writer import OrganizationsWriter, district_entity, school_entity
+
 if __name__ == '__main__':
     def log(*args):
         sys.stdout.write(' '.join(str(arg) for arg in args) + '\n')
 
-    # TODO - parse sys.argv for options
-    indir = os.path.abspath('.')
-    outfile = 'organizations.json'
+    parser = argparse.ArgumentParser(description='Extract the organizations of TRT XML files into organizations.json. '
+                                                 'Give all the directories at once: the file is read (if it exists), '
+                                                 'merged and written only once.')
+    parser.add_argument('dirs', nargs='*', default=['.'], help='Directories to search for XML files (default=.)')
+    parser.add_argument('-o', '--out', dest='outfile', default='organizations.json', help='Output file (default=organizations.json)')
+    args = parser.parse_args()
+    outfile = args.outfile
 
-    districts = {}
-    schools = {}
+    organizations = OrganizationsWriter()
 
-    # because each district is generated individually, we need to read the file to
-    # get previous districts, merge the new ones, then rewrite the file ...
+    # add to the organizations of an existing file
     if os.path.isfile(outfile):
-        with open(outfile, 'r') as f:
-            org = json.load(f)
-            if 'districts' in org: districts = {d['entityId']: d for d in org['districts']}
-            if 'institutions' in org: schools = {s['entityId']: s for s in org['institutions']}
-        log('Loaded', len(districts), 'districts and', len(schools), 'schools')
+        organizations.load(outfile)
+        log('Loaded', len(organizations.districts), 'districts and', len(organizations.schools), 'schools')
 
     processed = 0
     skipped = 0
     bad = 0
-    for root, subs, files in os.walk(indir):
-        for file in fnmatch.filter(files, '*.xml'):
-            try:
-                with open(os.path.join(root, file), 'r') as f:
-                    state = None
-                    districtId = None
-                    districtName = None
-                    schoolId = None
-                    schoolName = None
-                    tree = ElementTree.parse(f)
-                    for node in tree.findall('.//ExamineeRelationship'):
-                        name = node.attrib.get('name')
-                        value = node.attrib.get('value')
-                        if name == 'StateAbbreviation': state = value
-                        elif name == 'DistrictId': districtId = value
-                        elif name == 'DistrictName': districtName = value
-                        elif name == 'SchoolId': schoolId = value
-                        elif name == 'SchoolName': schoolName = value
+    for indir in args.dirs:
+        for root, subs, files in os.walk(os.path.abspath(indir)):
+            for file in fnmatch.filter(files, '*.xml'):
+                try:
+                    with open(os.path.join(root, file), 'r') as f:
+                        state = None
+                        districtId = None
+                        districtName = None
+                        schoolId = None
+                        schoolName = None
+                        # the organization is in the Examinee element, so stop parsing at the end of it
+                        for event, node in ElementTree.iterparse(f):
+                            if node.tag == 'ExamineeRelationship':
+                                name = node.attrib.get('name')
+                                value = node.attrib.get('value')
+                                if name == 'StateAbbreviation': state = value
+                                elif name == 'DistrictId': districtId = value
+                                elif name == 'DistrictName': districtName = value
+                                elif name == 'SchoolId': schoolId = value
+                                elif name == 'SchoolName': schoolName = value
+                            elif node.tag == 'Examinee':
+                                break
 
-                    if state and districtId and districtName and schoolId and schoolName:
-                        processed += 1
-                        if districtId not in districts:
-                            districts[districtId] = {
-                                'entityId': districtId,
-                                'entityName': districtName,
-                                'entityType': 'DISTRICT',
-                                'parentEntityId': state
-                            }
-                        if schoolId not in schools:
-                            schools[schoolId] = {
-                                'entityId': schoolId,
-                                'entityName': schoolName,
-                                'entityType': 'INSTITUTION',
-                                'parentEntityId': districtId
-                            }
-                    else:
-                        skipped += 1
-                        log('File', f.name, 'contains insufficient organization data')
-            except:
-                bad += 1
-                log('File', os.path.join(root, file), 'is bad')
+                        if state and districtId and districtName and schoolId and schoolName:
+                            processed += 1
+                            organizations.add_district(district_entity(districtId, districtName, state))
+                            organizations.add_school(school_entity(schoolId, schoolName, districtId))
+                        else:
+                            skipped += 1
+                            log('File', f.name, 'contains insufficient organization data')
+                except:
+                    bad += 1
+                    log('File', os.path.join(root, file), 'is bad')
 
     log('Processed', processed, 'files, skipped', skipped, 'files,', bad, 'bad files')
-    log('Writing', len(districts), 'districts and', len(schools), 'schools')
-
-    with open(outfile, 'w') as f:
-        json.dump({'districts': list(districts.values()), 'institutions': list(schools.values())}, f, indent=2)
+    log('Writing', len(organizations.districts), 'districts and', len(organizations.schools), 'schools')
+    organizations.write(outfile)
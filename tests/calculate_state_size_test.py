@@ -0,0 +1,55 @@
+import pytest
+
+import datagen.config.cfg as cfg
+import datagen.config.state_types as state_config
+from datagen.calculate_state_size import calculate_state_size, estimate_outcome_counts, outcome_rates, \
+    sample_outcomes
+from datagen.util.id_gen import IDGen
+from tests.generators.assessment_test import generate_assessment
+
+
+def test_calculate_state_size():
+    district_count, school_count, students_by_grade = calculate_state_size(state_config.STATE_TYPES['tiny'])
+    assert district_count == 2
+    assert school_count == 12
+    assert sorted(students_by_grade.keys()) == list(range(0, 13))
+    assert sum(students_by_grade.values()) == 350
+
+
+def test_outcome_rates():
+    id_gen = IDGen()
+    config = state_config.STATE_TYPES['tiny']
+
+    iab = generate_assessment('IAB', 2017, 'ELA', 3, id_gen, gen_item=False)
+    assert outcome_rates(iab, config) == (cfg.INTERIM_ASMT_RATE * cfg.IAB_STUDENT_RATE,) * 2
+
+    summative = generate_assessment('SUM', 2017, 'Math', 3, id_gen, gen_item=False)
+    generated, written = outcome_rates(summative, config)
+    taken = 1 - config['subject_skip_percentages']['Math']
+    assert generated == pytest.approx(taken * (1 + max(cfg.ASMT_RETAKE_RATE, cfg.ASMT_UPDATE_RATE)))
+    assert taken * (1 - cfg.ASMT_DELETE_RATE) < written < generated
+
+
+def test_estimate_outcome_counts():
+    id_gen = IDGen()
+    config = state_config.STATE_TYPES['tiny']
+    assessments = [generate_assessment('IAB', 2017, 'ELA', 3, id_gen, gen_item=False),
+                   generate_assessment('IAB', 2017, 'Math', 3, id_gen, gen_item=False),
+                   generate_assessment('ICA', 2017, 'Math', 4, id_gen, gen_item=False)]
+
+    generated, written = estimate_outcome_counts(assessments, config, {3: 100, 4: 10})
+    assert written['IAB'] == pytest.approx(2 * 100 * cfg.INTERIM_ASMT_RATE * cfg.IAB_STUDENT_RATE)
+    assert written['ICA'] == pytest.approx(10 * outcome_rates(assessments[2], config)[1])
+    assert generated['SUM'] == written['SUM'] == 0
+
+
+def test_sample_outcomes():
+    id_gen = IDGen()
+    assessments = [generate_assessment('IAB', 2017, 'ELA', 3, id_gen),
+                   generate_assessment('SUM', 2017, 'Math', 11, id_gen)]
+
+    gen_seconds, write_seconds, write_bytes = sample_outcomes('tiny', assessments, True, sample=2)
+    assert sorted(gen_seconds.keys()) == ['IAB', 'SUM']
+    assert write_bytes['xml']['IAB'] > 0
+    assert write_bytes['xml']['SUM'] > 0
+    assert write_seconds['xml']['SUM'] > 0
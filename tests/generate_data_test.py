@@ -0,0 +1,102 @@
+import csv
+import filecmp
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from inspect import getsourcefile
+from os.path import abspath, dirname, join
+
+# technique for getting current directory regardless of how it is being run
+root_dir = abspath(join(dirname(abspath(getsourcefile(lambda: 0))), '..'))
+
+ARGS = ['--hier_source', join(root_dir, 'test_data', 'hierarchy.good.csv'), '--gen_ica',
+        '--pkg_source', join(root_dir, 'in', 'sb-dataset', '2019.demo.MathELA.csv'),
+        '--subject_source', join(root_dir, 'in', 'sb-dataset', '*_subject.xml'), '--seed', '42']
+
+
+def generate_data(out_dir, *args, common_args=ARGS):
+    """
+    Run the data generator (in its own process, as it is run from the command line).
+
+    :param out_dir: output directory
+    :param args: arguments, after the common ones
+    :param common_args: the common arguments
+    """
+    subprocess.run([sys.executable, '-m', 'datagen.generate_data'] + common_args + list(args) +
+                   ['--out_dir', str(out_dir)], cwd=root_dir, check=True, stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL)
+
+
+def output_files(out_dir):
+    """
+    :return: the output files of a run (relative to the output directory), without the args.txt of the run
+    """
+    files = []
+    for root, _, names in os.walk(str(out_dir)):
+        files.extend(os.path.relpath(join(root, name), str(out_dir)) for name in names)
+    return sorted(file for file in files if file != 'args.txt')
+
+
+def registrations(db_file):
+    """
+    :return: the registrations of a sqlite output, in order
+    """
+    connection = sqlite3.connect(str(db_file))
+    try:
+        return connection.execute('SELECT * FROM registrations ORDER BY student_rec_id').fetchall()
+    finally:
+        connection.close()
+
+
+def test_seeded_runs_are_identical(tmp_path):
+    generate_data(tmp_path / 'a', '--csv_out')
+    generate_data(tmp_path / 'b', '--csv_out')
+
+    files = output_files(tmp_path / 'a')
+    assert 'CA/88800120000000/registrations.2019.csv' in files
+    assert files == output_files(tmp_path / 'b')
+    _, mismatch, errors = filecmp.cmpfiles(str(tmp_path / 'a'), str(tmp_path / 'b'), files, shallow=False)
+    assert mismatch == [] and errors == []
+
+
+def test_resumed_run_is_identical(tmp_path):
+    generate_data(tmp_path / 'full', '--csv_out', '--sqlite_out')
+
+    # interrupt a run after its first district: forget the second one was finished, and resume
+    generate_data(tmp_path / 'resumed', '--csv_out', '--sqlite_out')
+    checkpoint_file = str(tmp_path / 'resumed' / 'checkpoint.json')
+    with open(checkpoint_file) as f:
+        checkpoint = json.load(f)
+    del checkpoint['districts']['88800130000000']
+    with open(checkpoint_file, 'w') as f:
+        json.dump(checkpoint, f)
+    generate_data(tmp_path / 'resumed', '--csv_out', '--sqlite_out', '--resume')
+
+    full = registrations(tmp_path / 'full' / 'datagen.db')
+    assert len({row[1] for row in full}) == 1
+    assert registrations(tmp_path / 'resumed' / 'datagen.db') == full
+    files = [file for file in output_files(tmp_path / 'full') if file.endswith('.csv')]
+    _, mismatch, errors = filecmp.cmpfiles(str(tmp_path / 'full'), str(tmp_path / 'resumed'), files, shallow=False)
+    assert mismatch == [] and errors == []
+
+
+def test_too_many_students_for_ssids(tmp_path):
+    # 30,000 schools of 4,000 students don't fit in the 8-digit SSID sequence
+    hierarchy_file = str(tmp_path / 'hierarchy.csv')
+    with open(hierarchy_file, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(['state_id', 'state_code', 'state_name', 'state_type', 'district_id', 'district_name',
+                         'district_type', 'school_id', 'school_name', 'school_type', 'school_interims'])
+        for school in range(30000):
+            writer.writerow(['00', 'CA', 'California', 'udl_test', '0600001', 'UDL District', 'Big UDL',
+                             '0600001{:05}'.format(school), 'School {}'.format(school), 'UDL High School', '0'])
+
+    with pytest.raises(subprocess.CalledProcessError):
+        generate_data(tmp_path / 'out', '--csv_out', common_args=['--hier_source', hierarchy_file] + ARGS[2:])
+    assert not os.path.exists(str(tmp_path / 'out' / 'hierarchy.csv'))
+    assert not os.path.exists(str(tmp_path / 'out' / 'CA'))
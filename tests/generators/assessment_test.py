@@ -14,10 +14,11 @@ import datagen.generators.hierarchy as hier_gen
 import datagen.generators.population as pop_gen
 import datagen.generators.summative_or_ica_assessment as asmt_gen
 import datagen.model.itemdata as item_lvl_data
-from datagen.generators.assessment import generate_response, _pick_accommodation_code
+from datagen.generators.assessment import LazyItemResponses, generate_response, _pick_accommodation_code
 from datagen.generators.subject import generate_default_subjects
 from datagen.model.assessment import Assessment
 from datagen.model.item import AssessmentItem
+from datagen.model.itemdata import response_date
 from datagen.model.scorable import Scorable
 from datagen.model.segment import AssessmentSegment
 from datagen.util.id_gen import IDGen
@@ -60,6 +61,24 @@ def test_generate_item_data():
     assert item_data.format == 'MC'
 
 
+def test_item_responses():
+    items = ['item 1', 'item 2', 'item 3']
+    responses = item_lvl_data.ItemResponses(items, datetime.datetime(2015, 5, 15, 9))
+    responses.append(12000, True, 1, 'B')
+    responses.append(1234, False, 0, None)
+    responses.append(300000, True, 3, '<p>Text</p>', [1, 2, 1])
+
+    assert len(responses) == 3
+    assert responses.response_date(0) == datetime.datetime(2015, 5, 15, 9, 0, 12)
+    assert responses.response_date(-1) == datetime.datetime(2015, 5, 15, 9, 5, 13, 234000)
+    aid = responses[1]
+    assert (aid.item, aid.is_selected, aid.page_time, aid.score, aid.response_value, aid.sub_scores) == \
+        ('item 2', '0', 1234, 0, None, None)
+    assert aid.response_date == datetime.datetime(2015, 5, 15, 9, 0, 13, 234000)
+    assert responses[2].sub_scores == [1, 2, 1]
+    assert [aid.item for aid in responses] == items
+
+
 def test_generate_assessment_outcome_default_status():
     # Create objects
     asmt = generate_assessment('SUM', 2015, 'ELA', 3, ID_GEN)
@@ -206,6 +225,31 @@ def test_create_assessment_outcome_object_item_data():
     assert len(outcomes[asmt.guid][0].item_data) == cfg.ASMT_ITEM_BANK_SIZE
 
 
+def test_create_assessment_outcome_object_lazy_item_data():
+    # Create objects
+    asmt = generate_assessment('ICA', 2015, 'ELA', 3, ID_GEN)
+    state = hier_gen.generate_state('devel', 'Example State', 'ES', ID_GEN)
+    district = hier_gen.generate_district('Small Average', state, ID_GEN)
+    school = hier_gen.generate_school('Elementary School', district, ID_GEN)
+    student = pop_gen.generate_student(school, 3, ID_GEN, 2015, ['ELA', 'Math'])
+    outcomes = {}
+
+    # Create outcomes
+    asmt_gen.create_assessment_outcome_object(datetime.date(2015, 5, 15), student, asmt, ID_GEN, outcomes,
+                                              skip_rate=0, retake_rate=0, delete_rate=0, update_rate=0, gen_item=True,
+                                              lazy_item=True)
+
+    # Tests: the item data is generated when read, the same every time, with the dates of the outcome
+    outcome = outcomes[asmt.guid][0]
+    assert isinstance(outcome.item_data, LazyItemResponses)
+    assert len(outcome.item_data) == cfg.ASMT_ITEM_BANK_SIZE
+    rows = list(outcome.item_data.rows())
+    assert rows == list(outcome.item_data.rows())
+    assert [row[0] for row in rows] == asmt.item_bank
+    assert outcome.start_date == response_date(outcome.item_data.admin_date, rows[0][-1])
+    assert outcome.submit_date == response_date(outcome.item_data.admin_date, rows[-1][-1])
+
+
 def test_create_assessment_outcome_object_skipped():
     # Create objects
     asmt = generate_assessment('SUM', 2015, 'ELA', 3, ID_GEN)
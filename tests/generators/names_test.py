@@ -0,0 +1,57 @@
+"""
+Unit tests for the names module.
+
+"""
+
+import random
+import re
+
+import pytest
+
+import datagen.generators.names as name_gen
+
+
+def test_generate_person_names():
+    genders = ['male', 'female', 'non_binary', 'none'] * 50
+    names = name_gen.generate_person_names(genders, random.Random(1))
+
+    male_names, female_names = set(name_gen.PEOPLE_NAMES.male_names), set(name_gen.PEOPLE_NAMES.female_names)
+    first_names = male_names | female_names
+    last_names = set(name_gen.PEOPLE_NAMES.last_names)
+    assert len(names) == len(genders)
+    for gender, (first, middle, last) in zip(genders, names):
+        if gender == 'male':
+            assert first in male_names
+        elif gender == 'female':
+            assert first in female_names
+        assert middle is None or middle in first_names
+        assert all(part in last_names for part in last.split('-'))
+    assert any(middle is None for _, middle, _ in names)
+    assert any('-' in last for _, _, last in names)
+
+
+def test_generate_person_names_seeded():
+    assert name_gen.generate_person_names(['male', 'female'], random.Random(7)) == \
+        name_gen.generate_person_names(['male', 'female'], random.Random(7))
+    assert name_gen.generate_person_name('female', random.Random(7)) == \
+        name_gen.generate_person_names(['female'], random.Random(7))[0]
+
+
+def test_generate_person_names_unknown_gender():
+    with pytest.raises(Exception):
+        name_gen.generate_person_names(['male', 'other'])
+
+
+def test_generate_street_addresses():
+    addresses = name_gen.generate_street_addresses(200, 0.5, random.Random(1))
+
+    assert len(addresses) == 200
+    for line_1, line_2, city in addresses:
+        number, street = line_1.split(' ', 1)
+        assert 1 <= int(number) <= 5000
+        assert street.rsplit(' ', 1)[1] in name_gen.STREET_SUFFIXES
+        assert line_2 is None or re.fullmatch('(#|Apt|Suite) ([1-9]|1[0-9]|20)', line_2)
+        assert city
+    assert any(line_2 is None for _, line_2, _ in addresses)
+    assert any(line_2 is not None for _, line_2, _ in addresses)
+    assert all(line_2 is None for _, line_2, _ in name_gen.generate_street_addresses(10, 0.0))
@@ -11,6 +11,7 @@ import datagen.generators.population as pop_gen
 from datagen.model.staff import TeachingStaff
 from datagen.model.student import Student
 from datagen.util.id_gen import IDGen
+from datagen.util.rng import derive_rng
 
 ID_GEN = IDGen()
 
@@ -27,6 +28,20 @@ def test_generate_staff():
     assert isinstance(staff, TeachingStaff)
 
 
+def test_generate_staff_seeded():
+    state = hier_gen.generate_state('devel', 'Example State', 'ES', ID_GEN)
+    district = hier_gen.generate_district('Big Average', state, ID_GEN)
+    school = hier_gen.generate_school('High School', district, ID_GEN, interim_asmt_rate=1)
+    staff1 = pop_gen.generate_teaching_staff_member(school, ID_GEN, rng=derive_rng(42, 'staff'))
+    staff2 = pop_gen.generate_teaching_staff_member(school, ID_GEN, rng=derive_rng(42, 'staff'))
+    member1 = pop_gen.generate_district_staff_member(district, ID_GEN, rng=derive_rng(42, 'staff'))
+    member2 = pop_gen.generate_district_staff_member(district, ID_GEN, rng=derive_rng(42, 'staff'))
+
+    # Tests
+    assert (staff1.guid, staff1.gender, staff1.name) == (staff2.guid, staff2.gender, staff2.name)
+    assert (member1.guid, member1.gender, member1.name) == (member2.guid, member2.gender, member2.name)
+
+
 def test_generate_student():
     # Create objects
     state = hier_gen.generate_state('devel', 'Example State', 'ES', ID_GEN)
@@ -399,3 +414,41 @@ def test_set_lang_items_lep_entry_date_exited():
     assert student.lang_title_3_prg is None
     assert student.prg_lep_entry_date is not None
     assert student.prg_lep_exit_date is not None
+
+
+def test_generate_student_seeded():
+    state = hier_gen.generate_state('devel', 'Example State', 'ES', ID_GEN)
+    district = hier_gen.generate_district('Big Average', state, ID_GEN)
+    school = hier_gen.generate_school('High School', district, ID_GEN, interim_asmt_rate=1)
+    student1 = pop_gen.generate_student(school, 11, ID_GEN, 2015, ['ELA', 'Math'], rng=derive_rng(42, 'school'))
+    student2 = pop_gen.generate_student(school, 11, ID_GEN, 2015, ['ELA', 'Math'], rng=derive_rng(42, 'school'))
+
+    # Tests
+    assert student1.guid == student2.guid
+    assert student1.first_name == student2.first_name
+    assert student1.last_name == student2.last_name
+    assert student1.dob == student2.dob
+    assert student1.eth_hispanic == student2.eth_hispanic
+    assert student1.capability == student2.capability
+
+
+def test_generate_students():
+    state = hier_gen.generate_state('devel', 'Example State', 'ES', ID_GEN)
+    district = hier_gen.generate_district('Big Average', state, ID_GEN)
+    school = hier_gen.generate_school('High School', district, ID_GEN, interim_asmt_rate=1)
+    students = pop_gen.generate_students(school, 11, 2000, ID_GEN, 2015, ['ELA', 'Math'], rng=derive_rng(42, 'school'))
+
+    # Tests
+    assert len(students) == 2000
+    assert len(set(s.guid for s in students)) == 2000
+    assert all(s.school == school and s.grade == 11 and s.dob.year == 1998 for s in students)
+    assert all(set(s.capability.keys()) == {'ELA', 'Math'} for s in students)
+    assert all(s.eth_multi or s.derived_demographic != 7 for s in students)
+    # the configured (california) rates
+    assert 0.45 < sum(s.gender == 'male' for s in students) / 2000 < 0.57
+    assert 0.05 < sum(bool(s.prg_iep) for s in students) / 2000 < 0.15
+    assert sum(s.address_line_1 is not None for s in students) > 1800
+
+    again = pop_gen.generate_students(school, 11, 2000, ID_GEN, 2015, ['ELA', 'Math'], rng=derive_rng(42, 'school'))
+    assert [(s.guid, s.first_name, s.capability) for s in again] == \
+        [(s.guid, s.first_name, s.capability) for s in students]
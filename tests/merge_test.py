@@ -0,0 +1,57 @@
+import csv
+import glob
+import json
+import os
+
+import pytest
+
+from datagen.merge import merge, merge_organizations, order_shards
+from tests.generate_data_test import generate_data, registrations
+
+
+def _write(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def test_order_shards(tmp_path):
+    for i in range(3):
+        os.makedirs(str(tmp_path / str(i)))
+        _write(str(tmp_path / str(i) / 'args.txt'), '--out_dir out --shard {}/3 --seed 1\n'.format(i))
+    dirs = [str(tmp_path / str(i)) for i in (2, 0, 1)]
+    assert order_shards(dirs) == [str(tmp_path / str(i)) for i in range(3)]
+
+    with pytest.raises(ValueError):
+        order_shards(dirs + [str(tmp_path / '0')])
+
+
+def test_merge_organizations(tmp_path):
+    def org(district, schools):
+        return json.dumps({'districts': [{'entityId': district}],
+                           'institutions': [{'entityId': s, 'parentEntityId': district} for s in schools]})
+
+    _write(str(tmp_path / 'a.json'), org('d1', ['s1', 's2']))
+    _write(str(tmp_path / 'b.json'), org('d2', ['s3']))
+    merge_organizations([str(tmp_path / 'a.json'), str(tmp_path / 'b.json')], str(tmp_path / 'out.json'))
+
+    with open(str(tmp_path / 'out.json')) as f:
+        merged = json.load(f)
+    assert [d['entityId'] for d in merged['districts']] == ['d1', 'd2']
+    assert [s['entityId'] for s in merged['institutions']] == ['s1', 's2', 's3']
+
+
+def test_merge_registration_system(tmp_path):
+    for shard in range(2):
+        generate_data(tmp_path / str(shard), '--csv_out', '--sqlite_out', '--shard', '{}/2'.format(shard))
+    merge([str(tmp_path / '0'), str(tmp_path / '1')], str(tmp_path / 'merged'))
+    generate_data(tmp_path / 'whole', '--sqlite_out')
+
+    # the shards share the registration system of an unsharded run
+    merged = registrations(tmp_path / 'merged' / 'datagen.db')
+    assert {row[1] for row in merged} == {row[1] for row in registrations(tmp_path / 'whole' / 'datagen.db')}
+    assert len({row[1] for row in merged}) == 1
+    reg_sys_guids = set()
+    for file in glob.glob(str(tmp_path / 'merged' / 'CA' / '*' / 'registrations.*.csv')):
+        with open(file) as f:
+            reg_sys_guids.update(row['reg_sys_guid'] for row in csv.DictReader(f))
+    assert reg_sys_guids == {merged[0][1]}
@@ -0,0 +1,70 @@
+import csv
+import io
+
+from datagen.model.registrationsystem import RegistrationSystem
+from datagen.outputworkers.csv_worker import CsvWorker, FILES, _text
+from datagen.util.id_gen import IDGen
+from tests.outputworkers.xml_worker_test import _outcome
+
+
+def _read(tmp_path, outcome, name):
+    district = outcome.school.district
+    with open(str(tmp_path / district.state.code / district.id / '{}.2017.csv'.format(name)), newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_write(tmp_path):
+    outcome = _outcome('ICA', IDGen())
+    student = outcome.student
+    student.reg_sys = RegistrationSystem()
+    student.reg_sys.academic_year = 2017
+
+    worker = CsvWorker(str(tmp_path))
+    worker.write_assessment_outcome([outcome], outcome.assessment.guid, 'ES', outcome.school.district.guid)
+    worker.write_students_dim([student])
+    worker.write_students_reg([student], 'rs1', 2017)
+    worker.cleanup()
+
+    [row] = _read(tmp_path, outcome, 'outcomes')
+    assert list(row.keys()) == list(FILES['outcomes'])
+    assert row['outcome_rec_id'] == str(outcome.rec_id)
+    assert row['student_rec_id'] == str(student.rec_id)
+    assert row['score'] == str(outcome.overall.score)
+
+    scores = _read(tmp_path, outcome, 'scores')
+    assert scores[0]['score_type'] == 'overall'
+    assert len(scores) == 1 + len(outcome.claim_scores or []) + len(outcome.alt_scores or []) + \
+        len(outcome.trait_scores or []) + len(outcome.target_scores or [])
+
+    items = _read(tmp_path, outcome, 'item_responses')
+    assert [item['item_key'] for item in items] == [item_data.item.item_key for item_data in outcome.item_data]
+    assert items[0]['response_value'] == outcome.item_data[0].response_value
+
+    [row] = _read(tmp_path, outcome, 'students')
+    assert (row['student_rec_id'], row['dob'], row['prg_iep']) == \
+        (str(student.rec_id), student.dob.isoformat(), str(int(student.prg_iep)))
+    [row] = _read(tmp_path, outcome, 'registrations')
+    assert (row['reg_sys_guid'], row['school_id']) == ('rs1', outcome.school.id)
+
+
+def test_append_after_flush(tmp_path):
+    id_gen = IDGen()
+    outcome = _outcome('IAB', id_gen)
+    other = _outcome('IAB', id_gen)
+    worker = CsvWorker(str(tmp_path))
+    worker.write_iab_outcome([outcome], outcome.assessment.guid)
+    # writing another district closes the files of the first
+    worker.write_iab_outcome([other], other.assessment.guid)
+    worker.write_iab_outcome([outcome], outcome.assessment.guid)
+    worker.cleanup()
+
+    assert [row['outcome_rec_id'] for row in _read(tmp_path, outcome, 'outcomes')] == [str(outcome.rec_id)] * 2
+    assert len(_read(tmp_path, other, 'outcomes')) == 1
+
+
+def test_text_quoted_like_csv_writer():
+    for value in ('plain', 'a,b', 'say "hi"', 'two\nlines', 'cr\r', "it's <p>"):
+        buf = io.StringIO()
+        csv.writer(buf).writerow(['x', value])
+        assert buf.getvalue() == 'x,' + _text(value) + '\r\n'
+    assert _text(None) == ''
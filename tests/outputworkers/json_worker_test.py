@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from datagen.outputworkers import json_worker
+from datagen.outputworkers.json_worker import JsonWorker
+from datagen.util.id_gen import IDGen
+from tests.outputworkers.xml_worker_test import _outcome
+
+
+def _read(tmp_path, outcome):
+    school = outcome.school
+    path = tmp_path / school.district.state.code / school.district.id / '{}.2017.ndjson'.format(school.id)
+    with open(str(path), encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_write(tmp_path):
+    outcome = _outcome('ICA', IDGen())
+    worker = JsonWorker(str(tmp_path))
+    worker.write_assessment_outcome([outcome], outcome.assessment.guid, 'ES', outcome.school.district.guid)
+    worker.cleanup()
+
+    [doc] = _read(tmp_path, outcome)
+    assert doc['test']['name'] == outcome.assessment.id
+    assert doc['examinee']['key'] == outcome.student.rec_id
+    assert doc['examinee']['relationships']['SchoolId'] == outcome.school.id
+    opportunity = doc['opportunity']
+    assert opportunity['key'] == outcome.rec_id
+    assert opportunity['scores'][0] == {'measureOf': 'Overall', 'measureLabel': 'ScaleScore',
+                                        'value': outcome.overall.score, 'standardError': outcome.overall.stderr}
+    assert [item['key'] for item in opportunity['items']] == \
+        [item_data.item.item_key for item_data in outcome.item_data]
+    assert opportunity['items'][0]['response']['value'] == outcome.item_data[0].response_value
+
+
+def test_summative_without_responses(tmp_path):
+    outcome = _outcome('SUM', IDGen())
+    worker = JsonWorker(str(tmp_path))
+    worker.write_assessment_outcome([outcome], outcome.assessment.guid, 'ES', outcome.school.district.guid)
+    worker.cleanup()
+
+    [doc] = _read(tmp_path, outcome)
+    assert all(item['response'] is None for item in doc['opportunity']['items'])
+
+
+def test_append_after_flush(tmp_path):
+    id_gen = IDGen()
+    outcome = _outcome('IAB', id_gen)
+    other = _outcome('IAB', id_gen)
+    worker = JsonWorker(str(tmp_path))
+    worker.write_iab_outcome([outcome], outcome.assessment.guid)
+    # writing another district closes the files of the first
+    worker.write_iab_outcome([other], other.assessment.guid)
+    worker.write_iab_outcome([outcome], outcome.assessment.guid)
+    worker.cleanup()
+
+    assert [doc['opportunity']['key'] for doc in _read(tmp_path, outcome)] == [outcome.rec_id] * 2
+    assert len(_read(tmp_path, other)) == 1
+
+
+@pytest.mark.skipif(json_worker.orjson is None, reason='orjson is not installed')
+def test_json_matches_orjson(tmp_path, monkeypatch):
+    outcome = _outcome('ICA', IDGen())
+    fast = JsonWorker(str(tmp_path / 'orjson'))
+    monkeypatch.setattr(json_worker, 'orjson', None)
+    slow = JsonWorker(str(tmp_path / 'json'))
+    for worker in (fast, slow):
+        worker.write_assessment_outcome([outcome], outcome.assessment.guid, 'ES', outcome.school.district.guid)
+        worker.cleanup()
+
+    assert _read(tmp_path / 'json', outcome) == _read(tmp_path / 'orjson', outcome)
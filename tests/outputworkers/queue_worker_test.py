@@ -0,0 +1,49 @@
+import pytest
+
+from datagen.outputworkers.queue_worker import QueueWorker
+from datagen.outputworkers.worker import Worker
+
+
+class RecordingWorker(Worker):
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def prepare(self):
+        self.calls.append('prepare')
+
+    def cleanup(self):
+        self.calls.append('cleanup')
+
+    def write_iab_outcome(self, results, assessment_guid):
+        if self.fail:
+            raise IOError('disk full')
+        self.calls.append(('iab', list(results), assessment_guid))
+
+
+def test_queue_worker_writes_in_order():
+    worker = RecordingWorker()
+    qw = QueueWorker([worker], queue_size=2)
+    qw.prepare()
+    for i in range(10):
+        qw.write_iab_outcome([i], 'guid')
+    qw.flush()
+    assert len(worker.calls) == 11
+    qw.cleanup()
+
+    assert worker.calls == ['prepare'] + [('iab', [i], 'guid') for i in range(10)] + ['cleanup']
+
+
+def test_queue_worker_without_prepare_writes_synchronously():
+    worker = RecordingWorker()
+    qw = QueueWorker([worker])
+    qw.write_iab_outcome([1], 'guid')
+    assert worker.calls == [('iab', [1], 'guid')]
+
+
+def test_queue_worker_error():
+    qw = QueueWorker([RecordingWorker(fail=True)])
+    qw.prepare()
+    qw.write_iab_outcome([1], 'guid')
+    with pytest.raises(RuntimeError):
+        qw.cleanup()
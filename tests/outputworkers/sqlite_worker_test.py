@@ -0,0 +1,76 @@
+import os
+import sqlite3
+
+import datagen.generators.hierarchy as hier_gen
+from datagen.model.registrationsystem import RegistrationSystem
+from datagen.outputworkers.sqlite_worker import DB_FILE, INDEXES, SqliteWorker, merge_databases
+from datagen.util.id_gen import IDGen
+from tests.outputworkers.xml_worker_test import _outcome
+
+
+def _write(out_dir, outcome, resume=False):
+    student = outcome.student
+    student.reg_sys = RegistrationSystem()
+    student.reg_sys.academic_year = 2017
+
+    worker = SqliteWorker(out_dir, resume=resume)
+    worker.prepare()
+    worker.write_hierarchies([hier_gen.generate_institution_hierarchy(outcome.school.district.state,
+                                                                      outcome.school.district, outcome.school, IDGen())])
+    worker.write_assessment_outcome([outcome], outcome.assessment.guid, 'ES', outcome.school.district.guid)
+    worker.write_students_dim([student])
+    worker.write_students_reg([student], 'rs1', 2017)
+    worker.cleanup()
+
+
+def _counts(path):
+    connection = sqlite3.connect(path)
+    counts = {table: connection.execute('SELECT COUNT(*) FROM ' + table).fetchone()[0]
+              for table in ('schools', 'assessments', 'items', 'students', 'registrations', 'outcomes', 'scores',
+                            'item_data')}
+    connection.close()
+    return counts
+
+
+def test_write(tmp_path):
+    outcome = _outcome('ICA', IDGen())
+    _write(str(tmp_path), outcome)
+
+    path = str(tmp_path / DB_FILE)
+    counts = _counts(path)
+    assert counts['outcomes'] == counts['students'] == counts['registrations'] == 1
+    assert counts['items'] == len(outcome.assessment.item_bank)
+    assert counts['item_data'] == len(outcome.item_data)
+
+    connection = sqlite3.connect(path)
+    assert connection.execute('SELECT student_rec_id, asmt_id, score FROM outcomes').fetchone() == \
+        (outcome.student.rec_id, outcome.assessment.id, outcome.overall.score)
+    indexes = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    assert set(INDEXES.keys()) <= set(indexes)
+    connection.close()
+
+
+def test_resume_replaces_district_year(tmp_path):
+    outcome = _outcome('IAB', IDGen())
+    _write(str(tmp_path), outcome)
+    counts = _counts(str(tmp_path / DB_FILE))
+
+    _write(str(tmp_path), outcome, resume=True)
+    assert _counts(str(tmp_path / DB_FILE)) == counts
+
+    # a run that isn't resumed replaces the database
+    _write(str(tmp_path), outcome)
+    assert _counts(str(tmp_path / DB_FILE)) == counts
+
+
+def test_merge_databases(tmp_path):
+    id_gen = IDGen()
+    outcomes = [_outcome('IAB', id_gen), _outcome('IAB', id_gen)]
+    for i, outcome in enumerate(outcomes):
+        os.makedirs(str(tmp_path / str(i)))
+        _write(str(tmp_path / str(i)), outcome)
+
+    merge_databases([str(tmp_path / '0' / DB_FILE), str(tmp_path / '1' / DB_FILE)], str(tmp_path / DB_FILE))
+    counts = _counts(str(tmp_path / DB_FILE))
+    assert counts['schools'] == counts['outcomes'] == 2
+    assert counts['assessments'] == 1
@@ -0,0 +1,140 @@
+import datetime
+import gzip
+
+import pytest
+
+import datagen.generators.hierarchy as hier_gen
+import datagen.generators.iab_assessment as iab_asmt_gen
+import datagen.generators.population as pop_gen
+import datagen.generators.summative_or_ica_assessment as asmt_gen
+from datagen.outputworkers.trt_template import escape_attrib, escape_text
+from datagen.outputworkers.xml_worker import XmlWorker
+from datagen.util.id_gen import IDGen
+from datagen.writers.archive_writer import read_member
+from tests.generators.assessment_test import generate_assessment
+
+
+def _outcome(asmt_type, id_gen, lazy_item=False):
+    state = hier_gen.generate_state('devel', 'Example State', 'ES', id_gen)
+    district = hier_gen.generate_district('Big Average', state, id_gen)
+    school = hier_gen.generate_school('High School', district, id_gen)
+    student = pop_gen.generate_student(school, 11, id_gen, 2017, ['ELA'])
+    asmt = generate_assessment(asmt_type, 2017, 'ELA', 11, id_gen)
+    if asmt_type == 'IAB':
+        return iab_asmt_gen.generate_interim_assessment_outcome(datetime.date(2017, 1, 20), student, asmt, id_gen,
+                                                                lazy_item=lazy_item)
+    return asmt_gen.generate_assessment_outcome(datetime.date(2017, 5, 10), student, asmt, id_gen, lazy_item=lazy_item)
+
+
+@pytest.mark.parametrize('asmt_type', ['SUM', 'ICA', 'IAB'])
+def test_template_matches_etree(asmt_type):
+    outcome = _outcome(asmt_type, IDGen())
+    worker = XmlWorker('out')
+    assert worker._template_xml(outcome) == worker._etree_xml(outcome)
+
+
+@pytest.mark.parametrize('asmt_type', ['SUM', 'ICA', 'IAB'])
+def test_lazy_item_data(asmt_type):
+    outcome = _outcome(asmt_type, IDGen(), lazy_item=True)
+    worker = XmlWorker('out')
+    xml = worker._template_xml(outcome)
+    assert xml == worker._etree_xml(outcome) == worker._template_xml(outcome)
+    assert xml.count('<Item ') == len(outcome.item_data)
+
+
+def test_template_matches_etree_escaped():
+    outcome = _outcome('ICA', IDGen())
+    outcome.student.first_name = 'A & "B"\t<C>'
+    outcome.student.middle_name = ''
+    outcome.school.name = "O'Neil\r\nSchool"
+    outcome.item_data.response_values[0] = '<p>1 & 2 > "0"</p>'
+    outcome.item_data.response_values[1] = ''
+    outcome.item_data.sub_scores[2] = [1, 2, 3]
+    worker = XmlWorker('out')
+    xml = worker._template_xml(outcome)
+    assert xml == worker._etree_xml(outcome)
+    assert 'value="A &amp; &quot;B&quot;&#09;&lt;C&gt;"' in xml
+
+
+@pytest.mark.parametrize('asmt_type', ['SUM', 'ICA', 'IAB'])
+def test_stream_matches_etree(asmt_type, tmp_path):
+    outcome = _outcome(asmt_type, IDGen())
+    outcome.student.first_name = 'A & "B"\t<C>'
+    outcome.item_data.sub_scores[0] = [1, 2, 3]
+    worker = XmlWorker(str(tmp_path), 'stream')
+    assert worker._stream_xml_string(outcome) == worker._etree_xml(outcome)
+
+    worker.write_asmt_to_file(outcome)
+    with open(worker.file_path_for_outcome(outcome)) as f:
+        assert f.read() == worker._stream_xml_string(outcome)
+
+
+def test_escape():
+    assert escape_attrib('a&<>"\r\n\tb') == 'a&amp;&lt;&gt;&quot;&#13;&#10;&#09;b'
+    assert escape_text('a&<>"\nb') == 'a&amp;&lt;&gt;"\nb'
+
+
+def test_unknown_serializer():
+    with pytest.raises(ValueError):
+        XmlWorker('out', 'lxml')
+
+
+def test_template_fragments():
+    id_gen = IDGen()
+    outcome = _outcome('IAB', id_gen)
+    again = iab_asmt_gen.generate_interim_assessment_outcome(datetime.date(2017, 2, 3), outcome.student,
+                                                             outcome.assessment, id_gen)
+    assert again.status_date != outcome.status_date
+
+    worker = XmlWorker('out')
+    for o in (outcome, again):
+        assert worker._template_xml(o) == worker._etree_xml(o)
+    assert len(worker._test_fragments) == 1
+    assert len(worker._examinee_fragments) == 1
+    assert len(worker._item_fragments) == len(outcome.assessment.item_bank)
+
+    # the examinee fragments are dropped when the school changes
+    other = _outcome('IAB', id_gen)
+    assert worker._template_xml(other) == worker._etree_xml(other)
+    assert list(worker._examinee_fragments.keys()) == [(other.student, 'ELA')]
+
+
+def test_archive(tmp_path):
+    outcome = _outcome('IAB', IDGen())
+    worker = XmlWorker(str(tmp_path), archive='tar')
+    worker.write_iab_outcome([outcome], outcome.assessment.guid)
+    worker.flush()
+
+    archive = tmp_path / outcome.school.district.state.code / outcome.school.district.id / \
+        '{}.2017.tar'.format(outcome.school.id)
+    name = '{}/{}/{}/{}.xml'.format(outcome.school.district.state.code, outcome.school.district.id,
+                                    outcome.school.id, outcome.rec_id)
+    assert read_member(str(archive), name) == worker._etree_xml(outcome).encode('utf-8')
+
+    # the archive of a school and year is finished when the worker is flushed
+    with pytest.raises(RuntimeError):
+        worker.write_iab_outcome([outcome], outcome.assessment.guid)
+
+
+def test_dirs_created_once(tmp_path):
+    id_gen = IDGen()
+    outcome = _outcome('IAB', id_gen)
+    again = iab_asmt_gen.generate_interim_assessment_outcome(datetime.date(2017, 2, 3), outcome.student,
+                                                             outcome.assessment, id_gen)
+    worker = XmlWorker(str(tmp_path))
+    worker.write_iab_outcome([outcome, again], outcome.assessment.guid)
+
+    assert (tmp_path / outcome.school.district.state.code / outcome.school.district.id / outcome.school.id /
+            '{}.xml'.format(again.rec_id)).exists()
+    assert worker.stats() == {'dirs_created': 1, 'makedirs_avoided': 1, 'fs_calls_avoided': 3}
+
+
+def test_compress(tmp_path):
+    outcome = _outcome('ICA', IDGen())
+    worker = XmlWorker(str(tmp_path), compress='gzip')
+    worker.write_assessment_outcome([outcome], outcome.assessment.guid, 'ES', outcome.school.district.guid)
+    worker.cleanup()
+
+    path = tmp_path / outcome.school.district.state.code / outcome.school.district.id / outcome.school.id / \
+        '{}.xml.gz'.format(outcome.rec_id)
+    assert gzip.decompress(path.read_bytes()) == worker._etree_xml(outcome).encode('utf-8')
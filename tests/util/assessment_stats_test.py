@@ -1,13 +1,16 @@
 """
 
 """
+import random
+
 import pytest
 
+import datagen.config.cfg as cfg
 from datagen.util.assessment_stats import DemographicLevels, Stats, score_given_capability, performance_level, \
     random_subscores
 from datagen.util.assessment_stats import RandomLevelByDemographics, Properties, GradeLevels
 from datagen.util.assessment_stats import random_capability
-from datagen.util.weighted_choice import weighted_choice
+from datagen.util.weighted_choice import AliasSampler, weighted_choice
 
 
 def gen_random_entity(demographics):
@@ -63,6 +66,26 @@ def test_random_level():
         level = level_generator.random_level(entity)
 
 
+def test_distribution_cached():
+    level_generator = RandomLevelByDemographics(cfg.DEMOGRAPHICS_BY_GRADE[5], cfg.LEVELS_BY_GRADE_BY_SUBJ['ELA'][5])
+    for _ in range(200):
+        entity = Properties(gen_random_entity(cfg.DEMOGRAPHICS_BY_GRADE[5]))
+        assert level_generator.distribution(entity) == level_generator._distribution(entity)
+    assert level_generator.distribution(entity) is level_generator.distribution(Properties(entity))
+
+
+def test_random_draws_cached():
+    level_generator = RandomLevelByDemographics(cfg.DEMOGRAPHICS_BY_GRADE[5], cfg.LEVELS_BY_GRADE_BY_SUBJ['ELA'][5])
+    for i in range(200):
+        entity = Properties(gen_random_entity(cfg.DEMOGRAPHICS_BY_GRADE[5]))
+        distribution = level_generator.distribution(entity)
+        # the same draws as from the distribution itself
+        assert level_generator.random_capability(entity, 0.2, random.Random(i)) == \
+            random_capability(distribution, 0.2, random.Random(i))
+        assert level_generator.random_level(entity, random.Random(i)) == \
+            AliasSampler(dict(enumerate(distribution))).choose(random.Random(i))
+
+
 def test_random_capability():
     avg = 0
     for _ in range(0, 100):
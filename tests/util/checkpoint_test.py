@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from datagen.util.checkpoint import Checkpoint
+
+
+def test_checkpoint(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path))
+    assert not checkpoint.load()
+
+    checkpoint.start(42, '0/2', {'inst_hier': 1000001000})
+    checkpoint.finish_district('0600001', 100, 150)
+
+    resumed = Checkpoint(str(tmp_path))
+    assert resumed.load()
+    assert resumed.seed == 42
+    assert resumed.is_finished('0600001')
+    assert not resumed.is_finished('0600002')
+    assert resumed.districts['0600001'] == (100, 150)
+    resumed.validate(42, '0/2', {'inst_hier': 1000001000})
+    with pytest.raises(ValueError):
+        resumed.validate(43, '0/2', {'inst_hier': 1000001000})
+    with pytest.raises(ValueError):
+        resumed.validate(42, '0/2', {'inst_hier': 1000002000})
+
+
+def test_checkpoint_start_removes_cohorts(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path))
+    os.makedirs(checkpoint.cohort_dir)
+    with open(checkpoint.cohort_file('0600001'), 'w') as f:
+        f.write('cohort')
+
+    checkpoint.start(42, None, {})
+    assert not os.path.exists(checkpoint.cohort_file('0600001'))
@@ -0,0 +1,90 @@
+import copyreg
+import pickle
+
+import pytest
+
+import datagen.generators.hierarchy as hier_gen
+import datagen.generators.population as pop_gen
+from datagen.model.student import Student
+from datagen.util.cohort import CohortStore, _CohortPickler, load_cohort, save_cohort
+from datagen.util.id_gen import IDGen
+
+
+def test_cohort_round_trip(tmp_path):
+    id_gen = IDGen()
+    state = hier_gen.generate_state('devel', 'Example State', 'ES', id_gen)
+    district = hier_gen.generate_district('Big Average', state, id_gen)
+    school = hier_gen.generate_school('High School', district, id_gen)
+    students = {s.guid: s for s in (pop_gen.generate_student(school, 11, id_gen, 2015, ['ELA']) for _ in range(3))}
+
+    file = str(tmp_path / 'cohort.pickle')
+    save_cohort(file, {'year': 2015, 'students': students, 'id_gen': id_gen})
+    cohort = load_cohort(file, [school])
+
+    assert cohort['year'] == 2015
+    assert list(cohort['students'].keys()) == list(students.keys())
+    for guid, student in cohort['students'].items():
+        # the hierarchy is not copied, the loaded students refer to the same school
+        assert student.school is school
+        assert student.name == students[guid].name
+    assert cohort['id_gen'].get_rec_id('student') == id_gen.get_rec_id('student')
+
+
+def test_cohort_unknown_school(tmp_path):
+    id_gen = IDGen()
+    state = hier_gen.generate_state('devel', 'Example State', 'ES', id_gen)
+    district = hier_gen.generate_district('Big Average', state, id_gen)
+    school = hier_gen.generate_school('High School', district, id_gen)
+    other = hier_gen.generate_school('High School', district, id_gen)
+    student = pop_gen.generate_student(school, 11, id_gen, 2015, ['ELA'])
+
+    file = str(tmp_path / 'cohort.pickle')
+    save_cohort(file, {'students': [student]})
+    with pytest.raises(pickle.UnpicklingError):
+        load_cohort(file, [other])
+
+
+def test_cohort_store(tmp_path):
+    store = CohortStore(str(tmp_path))
+    assert not store.load()
+
+    store.start(42, None, {'student': 1000}, 2018)
+    save_cohort(store.cohort_file('0600001'), {'year': 2018})
+    store.start(42, None, {'student': 1000}, 2019)
+    assert not (tmp_path / 'cohorts' / '0600001.pickle').exists()
+
+    loaded = CohortStore(str(tmp_path))
+    assert loaded.load()
+    assert (loaded.seed, loaded.shard, loaded.ids, loaded.year) == (42, None, {'student': 1000}, 2019)
+    loaded.validate(42, None, {'student': 1000}, 2020)
+    with pytest.raises(ValueError):
+        loaded.validate(43, None, {'student': 1000}, 2020)
+    with pytest.raises(ValueError):
+        loaded.validate(42, None, {'student': 2000}, 2020)
+    with pytest.raises(ValueError):
+        loaded.validate(42, None, {'student': 1000}, 2019)
+
+
+def test_cohort_student_without_slots(tmp_path):
+    # a cohort saved before the student had slots has the instance dictionary of each student
+    id_gen = IDGen()
+    state = hier_gen.generate_state('devel', 'Example State', 'ES', id_gen)
+    district = hier_gen.generate_district('Big Average', state, id_gen)
+    school = hier_gen.generate_school('High School', district, id_gen)
+    student = pop_gen.generate_student(school, 11, id_gen, 2015, ['ELA'])
+
+    class _DictPickler(_CohortPickler):
+        def reducer_override(self, obj):
+            if isinstance(obj, Student):
+                return copyreg.__newobj__, (Student,), dict(obj.__getstate__())
+            return NotImplemented
+
+    file = str(tmp_path / 'cohort.pickle')
+    with open(file, 'wb') as f:
+        _DictPickler(f, pickle.HIGHEST_PROTOCOL).dump({'students': [student]})
+    [loaded] = load_cohort(file, [school])['students']
+
+    assert not hasattr(loaded, '__dict__')
+    assert loaded.school is school
+    assert loaded.__getstate__().keys() == student.__getstate__().keys()
+    assert loaded.name == student.name and loaded.capability == student.capability
@@ -4,7 +4,7 @@ import pytest
 from inspect import getsourcefile
 from os.path import abspath, dirname, join
 
-from datagen.util.hierarchy import read_hierarchy, write_hierarchy
+from datagen.util.hierarchy import read_hierarchy, write_hierarchy, parse_shard, shard_hierarchy
 
 # technique for getting current directory regardless of how it is being run
 test_data_dir = abspath(join(dirname(abspath(getsourcefile(lambda: 0))), '../../test_data/'))
@@ -17,6 +17,14 @@ def test_reading_hierarchy():
     assert len(schools) == 9
 
 
+def test_reading_hierarchy_seeded():
+    state, districts, schools = read_hierarchy(join(test_data_dir, 'hierarchy.good.csv'), 42)
+    again, _, again_schools = read_hierarchy(join(test_data_dir, 'hierarchy.good.csv'), 42)
+    assert state.guid == again.guid
+    assert [s.guid for s in schools] == [s.guid for s in again_schools]
+    assert len({s.guid for s in schools}) == len(schools)
+
+
 def test_writing_hierarchy():
     state, districts, schools = read_hierarchy(join(test_data_dir, 'hierarchy.good.csv'))
     write_hierarchy(join(test_data_dir, 'hierarchy.good.copy.csv'), schools)
@@ -33,3 +41,28 @@ def test_value_errors():
         read_hierarchy(join(test_data_dir, 'hierarchy.bad_school_type.csv'))
     with pytest.raises(ValueError):
         read_hierarchy(join(test_data_dir, 'hierarchy.multiple_states.csv'))
+
+
+def test_parse_shard():
+    assert parse_shard('0/1') == (0, 1)
+    assert parse_shard('3/4') == (3, 4)
+    with pytest.raises(ValueError):
+        parse_shard('4/4')
+    with pytest.raises(ValueError):
+        parse_shard('a/4')
+    with pytest.raises(ValueError):
+        parse_shard('1')
+
+
+def test_shard_hierarchy():
+    state, districts, schools = read_hierarchy(join(test_data_dir, 'hierarchy.good.csv'))
+    shards = [shard_hierarchy(districts, schools, i, 3) for i in range(3)]
+
+    # shards are disjoint and, in order, make up the whole hierarchy
+    assert [d for shard_districts, _ in shards for d in shard_districts] == districts
+    assert [s for _, shard_schools in shards for s in shard_schools] == schools
+    for shard_districts, shard_schools in shards:
+        assert all(s.district in shard_districts for s in shard_schools)
+
+    with pytest.raises(ValueError):
+        shard_hierarchy(districts, schools, 3, 3)
@@ -3,8 +3,11 @@ Unit tests for the project.sbac.util.id_gen module.
 
 """
 
+import random
 import re
 
+import pytest
+
 from datagen.util.id_gen import IDGen
 
 GUID_REGEX = '[a-f0-9]{8}(-[a-f0-9]{4}){3}-[a-f0-9]{12}'
@@ -37,6 +40,52 @@ def test_rec_id_from_two_types_bigger():
     assert idg.get_rec_id('some_object_type_2') == 1000000000
 
 
+def test_rec_id_blocks():
+    idg = IDGen(block_size=3)
+    assert [idg.get_rec_id('some_object_type') for _ in range(5)] == list(range(1000000000, 1000000005))
+    assert idg.get_rec_id_state() == {'some_object_type': 1000000006}
+
+
+def test_rec_id_lanes():
+    idg = IDGen(block_size=2, first_lane=1, lane_count=2, total_lanes=4)
+    # blocks of 2 from lanes 1, 2 of round 0, then lanes 1, 2 of round 1
+    assert [idg.get_rec_id('some_object_type') for _ in range(6)] == \
+           [1000000002, 1000000003, 1000000004, 1000000005, 1000000010, 1000000011]
+
+
+def test_rec_id_invalid_lanes():
+    with pytest.raises(ValueError):
+        IDGen(first_lane=3, lane_count=2, total_lanes=4)
+
+
+def test_partition():
+    idg = IDGen(block_size=10)
+    idg.get_rec_id('some_object_type')
+    idg.get_group_id('group')
+
+    idg1 = idg.partition(0, 1, 3)
+    idg2 = idg.partition(1, 2, 3)
+    ids1 = [idg1.get_rec_id('some_object_type') for _ in range(100)]
+    ids2 = [idg2.get_rec_id('some_object_type') for _ in range(100)]
+    assert min(ids1 + ids2) == 1000000010
+    assert len(set(ids1 + ids2)) == 200
+    assert idg1.get_group_id('group') == 1100
+    assert idg2.get_group_id('group') == 2100
+
+
+def test_student_id_many_lanes():
+    # a lane per school of a big state: every lane still gets 10-digit SSIDs for thousands of students
+    idg = IDGen().partition(15999, 1, 16000)
+    ids = [idg.get_student_id() for _ in range(6000)]
+    assert all(re.fullmatch('[1-9][0-9]{9}', id) for id in ids)
+    assert len(set(id[1:9] for id in ids)) == 6000
+
+    # the sequence of the lane is used up rather than widened
+    with pytest.raises(RuntimeError):
+        for _ in range(300):
+            idg.get_student_id()
+
+
 def test_guid():
     idg = IDGen()
     assert re.match(GUID_REGEX, idg.get_uuid())
@@ -60,3 +109,8 @@ def test_student_id():
     idg = IDGen()
     for _ in range(0, 10):
         assert re.match('^[1-9][0-9]{9}$', idg.get_student_id())
+
+
+def test_uuid_seeded():
+    assert IDGen.get_uuid(random.Random(42)) == IDGen.get_uuid(random.Random(42))
+    assert re.match(GUID_REGEX, IDGen.get_uuid(random.Random(42)))
@@ -0,0 +1,24 @@
+import pytest
+
+from datagen.util.memory import MemoryGuard, peak_rss_mb, rss_mb
+
+
+def test_rss():
+    assert 0 < rss_mb() <= peak_rss_mb() + 1
+
+
+def test_memory_guard():
+    guard = MemoryGuard(100000)
+    guard.check()
+    assert guard.peak_mb > 0
+    guard.reset()
+    assert guard.peak_mb == 0
+
+    with pytest.raises(MemoryError):
+        MemoryGuard(1).check('test')
+
+
+def test_memory_guard_without_ceiling():
+    guard = MemoryGuard()
+    guard.check()
+    assert guard.peak_mb == 0
@@ -0,0 +1,25 @@
+"""
+Unit tests for the rng module.
+
+"""
+
+from datagen.util.rng import derive_rng, new_seed, SEED_MAX
+
+
+def test_new_seed():
+    seed = new_seed()
+    assert 0 <= seed < SEED_MAX
+
+
+def test_derive_rng_same_keys():
+    rng1 = derive_rng(42, 'district', 2019, 'school')
+    rng2 = derive_rng(42, 'district', 2019, 'school')
+    assert [rng1.random() for _ in range(10)] == [rng2.random() for _ in range(10)]
+
+
+def test_derive_rng_different_keys():
+    rng1 = derive_rng(42, 'district', 2019)
+    rng2 = derive_rng(42, 'district', 2020)
+    rng3 = derive_rng(43, 'district', 2019)
+    values = [rng1.random(), rng2.random(), rng3.random()]
+    assert len(set(values)) == 3
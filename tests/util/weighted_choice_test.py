@@ -0,0 +1,49 @@
+import random
+from collections import Counter
+
+import pytest
+
+import datagen.config.population as pop_config
+from datagen.util.weighted_choice import AliasSampler, WeightedChooser, weighted_choice
+
+
+def _frequencies(choose, count=200000):
+    counts = Counter(choose() for _ in range(count))
+    return {element: n / count for element, n in counts.items()}
+
+
+def test_alias_frequencies():
+    weights = {name: obj['perc'] for name, obj in pop_config.DEMOGRAPHICS['california']['3']['ethnicity'].items()}
+    total = sum(weights.values())
+    sampler = AliasSampler(weights)
+    rng = random.Random(1)
+
+    alias = _frequencies(lambda: sampler.choose(rng))
+    bisect = _frequencies(lambda: weighted_choice(weights, rng=rng))
+    for element, weight in weights.items():
+        # within 5 standard deviations of the expected frequency, as are the frequencies of weighted_choice
+        p = weight / total
+        tolerance = 5 * (p * (1 - p) / 200000) ** 0.5
+        assert abs(alias.get(element, 0.0) - p) < tolerance
+        assert abs(bisect.get(element, 0.0) - p) < tolerance
+
+
+def test_alias_zero_weight():
+    sampler = AliasSampler({'a': 0.0, 'b': 3.0, 'c': 1.0, 'd': 0.0})
+    rng = random.Random(2)
+    assert set(sampler.choose(rng) for _ in range(10000)) == {'b', 'c'}
+    assert AliasSampler({None: 1.0}).choose(rng) is None
+
+
+def test_alias_bad_weights():
+    with pytest.raises(ValueError):
+        AliasSampler({'a': 0.0, 'b': 0.0})
+    with pytest.raises(ValueError):
+        AliasSampler({'a': -1.0, 'b': 2.0})
+
+
+def test_weighted_chooser_seed():
+    chooser = WeightedChooser({'a': 1.0, 'b': 2.0, 'c': 3.0}, random.Random())
+    first = [chooser.choose(seed=7)] + [chooser.choose() for _ in range(20)]
+    again = [chooser.choose(seed=7)] + [chooser.choose() for _ in range(20)]
+    assert first == again
@@ -0,0 +1,57 @@
+import datetime
+import tarfile
+import zipfile
+
+import pytest
+
+import datagen.writers.archive_writer as archive_writer
+from datagen.writers.archive_writer import ArchiveWriter, read_member
+
+DATE = datetime.datetime(2017, 5, 10, 9, 30)
+
+
+def _members(count):
+    return {'CA/01/0101/{}.xml'.format(i): '<TDSReport>{}</TDSReport>'.format('x' * (i * 37 % 900)) for i in range(count)}
+
+
+@pytest.mark.parametrize('archive_format', ['tar', 'zip', 'tar.gz'])
+def test_archive(tmp_path, monkeypatch, archive_format):
+    # small chunks so the tar.gz has several
+    monkeypatch.setattr(archive_writer, 'CHUNK_SIZE', 4096)
+    members = _members(50)
+    path = str(tmp_path / ('school.2017.' + archive_format))
+    writer = ArchiveWriter(path, archive_format)
+    for name, data in members.items():
+        writer.add(name, data, DATE)
+    writer.close()
+
+    for name, data in members.items():
+        assert read_member(path, name) == data.encode('utf-8')
+    with pytest.raises(KeyError):
+        read_member(path, 'CA/01/0101/none.xml')
+
+    # the archive is a regular archive too
+    if archive_format == 'zip':
+        with zipfile.ZipFile(path) as z:
+            assert z.namelist() == list(members.keys())
+    else:
+        with tarfile.open(path) as t:
+            assert t.getnames() == list(members.keys())
+            assert t.getmember('CA/01/0101/1.xml').mtime == 1494408600
+
+
+def test_archive_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive_writer, 'CHUNK_SIZE', 4096)
+    path = str(tmp_path / 'school.2017.tar.gz')
+    writer = ArchiveWriter(path, 'tar.gz')
+    for name, data in _members(50).items():
+        writer.add(name, data, DATE)
+    writer.close()
+    with open(path + '.idx') as f:
+        chunks = set(line.split('\t')[1] for line in f)
+    assert len(chunks) > 1
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        ArchiveWriter(str(tmp_path / 'school.rar'), 'rar')
@@ -0,0 +1,65 @@
+import bz2
+import gzip
+import lzma
+
+import pytest
+
+from datagen.writers.compressed_writer import Compressor
+
+DECOMPRESS = {'gzip': gzip.decompress, 'bz2': bz2.decompress, 'lzma': lzma.decompress}
+EXTENSIONS = {'gzip': '.gz', 'bz2': '.bz2', 'lzma': '.xz'}
+
+
+def _read(path, compression):
+    with open(path + EXTENSIONS[compression], 'rb') as f:
+        return DECOMPRESS[compression](f.read())
+
+
+@pytest.mark.parametrize('compression', ['gzip', 'bz2', 'lzma'])
+def test_compress(tmp_path, compression):
+    compressor = Compressor(compression, 1)
+    path = str(tmp_path / 'data.csv')
+    lines = ['{},café,{}\n'.format(i, 'x' * (i % 300)) for i in range(5000)]
+    with compressor.open(path) as f:
+        f.writelines(lines)
+    compressor.write_file(str(tmp_path / '1.xml'), '<TDSReport />')
+    compressor.close()
+
+    assert _read(path, compression) == ''.join(lines).encode('utf-8')
+    assert _read(str(tmp_path / '1.xml'), compression) == b'<TDSReport />'
+
+
+@pytest.mark.parametrize('compression', ['gzip', 'bz2', 'lzma'])
+def test_append(tmp_path, compression):
+    compressor = Compressor(compression)
+    path = str(tmp_path / 'data.ndjson')
+    for mode, data in (('wb', b'{"a":1}\n'), ('ab', b'{"b":2}\n')):
+        with compressor.open(path, mode) as f:
+            f.write(data)
+    compressor.wait()
+
+    # appending adds a stream, read as one
+    assert _read(path, compression) == b'{"a":1}\n{"b":2}\n'
+
+
+def test_gzip_reproducible(tmp_path):
+    compressor = Compressor('gzip')
+    for name in ('a', 'b'):
+        compressor.write_file(str(tmp_path / name), 'same')
+    compressor.close()
+    assert (tmp_path / 'a.gz').read_bytes() == (tmp_path / 'b.gz').read_bytes()
+
+
+def test_error_raised(tmp_path):
+    compressor = Compressor('gzip')
+    compressor.write_file(str(tmp_path / 'missing' / '1.xml'), 'data')
+    with pytest.raises(RuntimeError):
+        compressor.close()
+
+
+def test_bad_arguments():
+    with pytest.raises(ValueError):
+        Compressor('zip')
+    with pytest.raises(ValueError):
+        Compressor('gzip', 0)
+    Compressor('lzma', 0)
@@ -0,0 +1,38 @@
+import json
+
+import datagen.generators.hierarchy as hier_gen
+from datagen.util.id_gen import IDGen
+from datagen.writers.organizations_writer import OrganizationsWriter
+
+
+def test_write_once(tmp_path):
+    id_gen = IDGen()
+    state = hier_gen.generate_state('devel', 'Example State', 'ES', id_gen)
+    district = hier_gen.generate_district('Big Average', state, id_gen)
+    schools = [hier_gen.generate_school('High School', district, id_gen) for _ in range(3)]
+
+    organizations = OrganizationsWriter()
+    for school in schools + schools[:1]:
+        organizations.add_hierarchy(hier_gen.generate_institution_hierarchy(state, district, school, id_gen))
+    file = str(tmp_path / 'organizations.json')
+    organizations.write(file)
+
+    with open(file) as f:
+        org = json.load(f)
+    assert org['districts'] == [{'entityId': district.id, 'entityName': district.name, 'entityType': 'DISTRICT',
+                                 'parentEntityType': 'STATE', 'parentEntityId': 'ES'}]
+    assert [s['entityId'] for s in org['institutions']] == [s.id for s in schools]
+    assert all(s['parentEntityId'] == district.id for s in org['institutions'])
+
+
+def test_load(tmp_path):
+    file = str(tmp_path / 'organizations.json')
+    with open(file, 'w') as f:
+        json.dump({'districts': [{'entityId': 'd1'}], 'institutions': [{'entityId': 's1'}]}, f)
+
+    organizations = OrganizationsWriter()
+    organizations.load(file)
+    organizations.add_district({'entityId': 'd2'})
+    organizations.add_school({'entityId': 's1', 'entityName': 'again'})
+    assert list(organizations.districts.keys()) == ['d1', 'd2']
+    assert organizations.schools['s1'] == {'entityId': 's1'}